@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from wallet.models import Profile
+
+AUTH_CACHE_TTL = getattr(settings, "AUTH_CACHE_TTL", 60)
+
+# Columns kept in the cache. Everything else (password, balance, KYC ...) is
+# left deferred on the rebuilt instances and loads from the database on first
+# access, so money fields are never served stale.
+USER_FIELDS = ["id", "username", "email", "first_name", "last_name", "is_active", "is_staff", "is_superuser"]
+PROFILE_FIELDS = ["id", "user_id", "player_uuid", "game_id", "game_id_verified"]
+
+
+def auth_cache_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def invalidate_cached_users(user_ids):
+    """Drop cached auth rows now and again once the surrounding transaction commits.
+
+    The second delete covers a request that re-cached the old row between
+    the write and the commit.
+    """
+    keys = [auth_cache_key(user_id) for user_id in user_ids]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def load_auth_row(user_id):
+    """User + hot profile columns in one LEFT JOIN query; None if the user is gone"""
+    columns = USER_FIELDS + [f"profile__{field}" for field in PROFILE_FIELDS]
+    return User.objects.filter(pk=user_id).values(*columns).first()
+
+
+def cached_auth_row(user_id):
+    """The cached auth row of a user, loading and caching it on a miss; None if the user is gone"""
+    key = auth_cache_key(user_id)
+    row = cache.get(key)
+    if row is None:
+        row = load_auth_row(user_id)
+        if row is not None:
+            cache.set(key, row, AUTH_CACHE_TTL)
+    return row
+
+
+def _from_row(model, fields, row, prefix=""):
+    # from_db() wants the loaded values in the model's field order
+    names = [f.attname for f in model._meta.concrete_fields if f.attname in fields]
+    return model.from_db(DEFAULT_DB_ALIAS, names, [row[prefix + name] for name in names])
+
+
+def build_user(row):
+    """Rebuild User (and its cached profile) from a cache row without touching the DB"""
+    user = _from_row(User, USER_FIELDS, row)
+    if row["profile__id"] is not None:
+        user.profile = _from_row(Profile, PROFILE_FIELDS, row, prefix="profile__")
+    return user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that resolves the token's user from a short-TTL cache.
+
+    Cache entries hold the user row and the hot profile columns, and are
+    dropped whenever a User or Profile is saved or deleted (see api.signals),
+    so a warm request authenticates with no queries at all.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Revocation compares against the password hash, which we don't cache
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        row = cached_auth_row(user_id)
+        if row is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not row["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return build_user(row)
@@ -0,0 +1,16 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from wallet.models import Profile
+from .authentication import invalidate_cached_users
+
+
+@receiver([post_save, post_delete], sender=User)
+def drop_cached_user(sender, instance, **kwargs):
+    invalidate_cached_users([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=Profile)
+def drop_cached_profile(sender, instance, **kwargs):
+    invalidate_cached_users([instance.user_id])
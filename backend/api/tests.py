@@ -1,3 +1,103 @@
+from unittest import mock
+
 from django.test import TestCase
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from wallet.models import Profile
+from .authentication import CachedJWTAuthentication
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    # Read endpoint -> queries saved per request (the User lookup, plus the
+    # profile lookup where the view only needs its cached columns)
+    SAVINGS = {"/api/profile/": 1, "/api/me/": 2, "/wallet/balance/": 1, "/wallet/transactions/": 2}
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="player")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+    def count_queries(self, path):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200, path)
+        return len(ctx.captured_queries)
+
+    def test_warm_request_needs_no_auth_queries(self):
+        self.client.get("/api/profile/")
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/profile/")
+        self.assertEqual(response.data["username"], "player")
+
+    def test_query_savings_per_endpoint(self):
+        # Stock simplejwt lookup as the baseline
+        with mock.patch.object(CachedJWTAuthentication, "get_user", JWTAuthentication.get_user):
+            baseline = {path: self.count_queries(path) for path in self.SAVINGS}
+        self.client.get("/api/profile/")
+        cached = {path: self.count_queries(path) for path in self.SAVINGS}
+
+        self.assertEqual({path: baseline[path] - cached[path] for path in self.SAVINGS}, self.SAVINGS)
+
+    def test_balance_is_never_served_from_cache(self):
+        self.client.get("/wallet/balance/")
+        Profile.objects.filter(user=self.user).update(balance=42)
+        self.assertEqual(self.client.get("/wallet/balance/").data["balance"], 42.0)
+
+    def test_saving_user_invalidates(self):
+        self.client.get("/api/profile/")
+        self.user.is_staff = True
+        self.user.save()
+        self.assertTrue(self.client.get("/api/profile/").data["is_staff"])
+
+    def test_deactivated_user_rejected(self):
+        self.client.get("/api/profile/")
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get("/api/profile/").status_code, 401)
+
+    def test_full_profile_loads_in_one_query(self):
+        self.client.get("/api/profile/")
+        with self.assertNumQueries(1):
+            response = self.client.get("/wallet/profile/")
+        self.assertEqual(response.data["username"], "player")
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class AccountQueryCountTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_register_writes_profile_once(self):
+        # username check, savepoint, user INSERT, profile INSERT, release
+        with self.assertNumQueries(5):
+            response = self.client.post("/api/register/", {"username": "new", "password": "pw12345!"}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(str(Profile.objects.get(user__username="new").player_uuid), response.data["player_uuid"])
+
+    def test_register_with_game_id(self):
+        # + game_id UPDATE and the GameIdentity sync (savepoint, SELECT + INSERT)
+        with self.assertNumQueries(10):
+            self.client.post(
+                "/api/register/", {"username": "new", "password": "pw12345!", "game_id": "G-1"}, format="json"
+            )
+        self.assertEqual(Profile.objects.get(user__username="new").game_identities.get().external_id, "G-1")
+
+    def test_login_does_not_touch_profile(self):
+        User.objects.create_user(username="player", password="pw12345!")
+        with self.assertNumQueries(1):
+            response = self.client.post("/api/login/", {"username": "player", "password": "pw12345!"}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_user_save_does_not_rewrite_profile(self):
+        user = User.objects.create_user(username="player")
+        with self.assertNumQueries(1):
+            user.first_name = "P"
+            user.save()
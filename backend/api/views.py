@@ -13,6 +13,7 @@ from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
 from django.core.mail import send_mail
 from django.conf import settings
+from django.db import IntegrityError, transaction
 from wallet.models import Profile
 
 
@@ -29,15 +30,19 @@ def register_api(request):
     if User.objects.filter(username=username).exists():
         return Response({"error": "Username already exists"}, status=status.HTTP_400_BAD_REQUEST)
 
-    user = User.objects.create_user(username=username, email=email, password=password)
-    
-    # Profile is created by signal, but let's be sure we update it
-    profile, created = Profile.objects.get_or_create(user=user)
-    profile.game_id = game_id
-    if not profile.player_uuid:
-        import uuid
-        profile.player_uuid = uuid.uuid4()
-    profile.save()
+    with transaction.atomic():
+        # The post_save signal creates the profile (with its player_uuid) and
+        # leaves it cached on user.profile
+        user = User.objects.create_user(username=username, email=email, password=password)
+        if game_id:
+            profile = user.profile
+            profile.game_id = game_id
+            profile.save(update_fields=["game_id"])
+            try:
+                profile.sync_game_identities()
+            except IntegrityError:
+                transaction.set_rollback(True)
+                return Response({"error": "Game ID already registered with another account"}, status=status.HTTP_400_BAD_REQUEST)
 
     # Generate JWT tokens after register
     refresh = RefreshToken.for_user(user)
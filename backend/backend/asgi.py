@@ -1,7 +1,7 @@
 import os
 import django
 
-from channels.routing import ProtocolTypeRouter, URLRouter
+from channels.routing import ChannelNameRouter, ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
 from django.core.asgi import get_asgi_application
 
@@ -13,6 +13,8 @@ django.setup()
 
 # ✅ Now it is safe to import routing
 import chat.routing
+from tournaments.consumers import JoinAdmissionConsumer
+from tournaments.utils import ADMISSION_CHANNEL
 
 application = ProtocolTypeRouter({
     "http": get_asgi_application(),
@@ -21,4 +23,8 @@ application = ProtocolTypeRouter({
             chat.routing.websocket_urlpatterns
         )
     ),
+    # Background workers: python manage.py runworker join-admissions
+    "channel": ChannelNameRouter({
+        ADMISSION_CHANNEL: JoinAdmissionConsumer.as_asgi(),
+    }),
 })
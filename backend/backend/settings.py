@@ -110,6 +110,13 @@ if REDIS_URL:
             },
         },
     }
+    # Shared cache so every worker sees auth cache invalidations
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        },
+    }
 else:
     # Development: Use in-memory channel layer
     CHANNEL_LAYERS = {
@@ -181,10 +188,13 @@ from datetime import timedelta
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.CachedJWTAuthentication",
     ),
 }
 
+# Seconds a token's user + hot profile fields stay cached (dropped early on save)
+AUTH_CACHE_TTL = 60
+
 import os
 RAZORPAY_KEY_ID = os.environ.get("RAZORPAY_KEY_ID", "")
 RAZORPAY_KEY_SECRET = os.environ.get("RAZORPAY_KEY_SECRET", "")
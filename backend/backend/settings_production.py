@@ -92,6 +92,15 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Shared cache: uvicorn runs several workers, and every one of them has to
+# see auth / room-access cache invalidations
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ.get('REDIS_URL', 'redis://localhost:6379/0'),
+    },
+}
+
 # Database - PostgreSQL for production
 # Parse DATABASE_URL if provided
 DATABASE_URL = os.environ.get('DATABASE_URL', '')
@@ -165,10 +174,13 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.CachedJWTAuthentication",
     ),
 }
 
+# Seconds a token's user + hot profile fields stay cached (dropped early on save)
+AUTH_CACHE_TTL = 60
+
 # Razorpay Configuration
 RAZORPAY_KEY_ID = os.environ.get("RAZORPAY_KEY_ID", "")
 RAZORPAY_KEY_SECRET = os.environ.get("RAZORPAY_KEY_SECRET", "")
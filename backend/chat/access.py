@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from tournaments.models import Room, RoomParticipant
+
+# Cache backends that live inside one process: an invalidation there never
+# reaches the other workers, so entries must expire quickly on their own
+LOCAL_CACHE_BACKENDS = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+if settings.CACHES["default"]["BACKEND"] in LOCAL_CACHE_BACKENDS:
+    ROOM_ACCESS_TTL = getattr(settings, "ROOM_ACCESS_LOCAL_TTL", 5)
+else:
+    ROOM_ACCESS_TTL = getattr(settings, "ROOM_ACCESS_TTL", 300)
+
+
+def room_access_key(room_id, user_id):
+    return f"chat:room_access:{room_id}:{user_id}"
+
+
+def room_access(room_id, user_id):
+    """(tournament_id, is_participant) for a room socket, or None if the room doesn't exist.
+
+    Room and membership are read in one query and cached; chat.signals drops
+    the entry when the user joins or leaves the room.
+    """
+    key = room_access_key(room_id, user_id)
+    access = cache.get(key)
+    if access is None:
+        try:
+            access = Room.objects.filter(pk=room_id).annotate(
+                is_participant=Exists(RoomParticipant.objects.filter(room=OuterRef("pk"), user_id=user_id))
+            ).values_list("tournament_id", "is_participant").first()
+        except ValidationError:
+            # Not a UUID
+            return None
+        if access is None:
+            return None
+        cache.set(key, access, ROOM_ACCESS_TTL)
+    return access
+
+
+def invalidate_room_access(room_id, user_id):
+    """Drop a cached membership now and again once the surrounding transaction commits"""
+    key = room_access_key(room_id, user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
@@ -0,0 +1,98 @@
+import asyncio
+import atexit
+import logging
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+
+from .models import RoomMessage
+
+logger = logging.getLogger(__name__)
+
+CHAT_BUFFER_MAX_SIZE = getattr(settings, "CHAT_BUFFER_MAX_SIZE", 200)
+CHAT_BUFFER_FLUSH_INTERVAL = getattr(settings, "CHAT_BUFFER_FLUSH_INTERVAL", 0.5)
+# Unwritten messages kept across failed flushes before the oldest are dropped
+CHAT_BUFFER_MAX_BACKLOG = getattr(settings, "CHAT_BUFFER_MAX_BACKLOG", 10000)
+
+
+class MessageBuffer:
+    """Write-behind buffer for chat messages, one per worker process.
+
+    Consumers broadcast first and then ``add`` the message here. Rows are
+    written with one ``bulk_create`` once ``max_size`` messages are queued
+    or ``flush_interval`` seconds after the first queued one, whichever
+    comes first, and whatever is left is written when the process exits.
+    """
+
+    def __init__(self, max_size=CHAT_BUFFER_MAX_SIZE, flush_interval=CHAT_BUFFER_FLUSH_INTERVAL,
+                 max_backlog=CHAT_BUFFER_MAX_BACKLOG):
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self.max_backlog = max_backlog
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+
+    def __len__(self):
+        return len(self._pending)
+
+    async def add(self, **fields):
+        # created_at is stamped now (send time), not at flush time
+        self._pending.append(RoomMessage(**fields))
+        if len(self._pending) >= self.max_size:
+            self._spawn(self.flush())
+        elif self._timer is None or self._timer.done():
+            self._timer = self._spawn(self._flush_later())
+
+    async def flush(self):
+        """Write everything queued so far; returns the number of rows written"""
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            # This flush takes the timer's batch with it
+            self._timer.cancel()
+        self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return 0
+        try:
+            await database_sync_to_async(self._write)(batch)
+        except Exception:
+            logger.exception("Could not persist %d chat messages, will retry", len(batch))
+            self._requeue(batch)
+            return 0
+        return len(batch)
+
+    def flush_sync(self):
+        """Blocking flush for process shutdown"""
+        batch, self._pending = self._pending, []
+        if batch:
+            try:
+                self._write(batch)
+            except Exception:
+                logger.exception("Lost %d chat messages on shutdown", len(batch))
+
+    # ================= INTERNALS =================
+
+    def _spawn(self, coro):
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    def _requeue(self, batch):
+        self._pending[:0] = batch
+        overflow = len(self._pending) - self.max_backlog
+        if overflow > 0:
+            logger.error("Chat buffer backlog full, dropping %d oldest messages", overflow)
+            del self._pending[:overflow]
+
+    @staticmethod
+    def _write(batch):
+        RoomMessage.objects.bulk_create(batch, batch_size=500)
+
+
+message_buffer = MessageBuffer()
+atexit.register(message_buffer.flush_sync)
@@ -1,9 +1,57 @@
 import json
+import logging
+import uuid
+from urllib.parse import parse_qs
+
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from tournaments.models import Room, RoomParticipant
-from .models import RoomMessage
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from api.authentication import CachedJWTAuthentication
+from .access import room_access
+from .buffer import message_buffer
+from .notifications import chat_access_group, user_group_name
+from .recent import history_event, recent_messages
+from .views import history_page
+
+logger = logging.getLogger(__name__)
+
+
+def get_user_from_scope(scope):
+    """Authenticate a socket via the ?token=<JWT> query string"""
+    token = parse_qs(scope.get("query_string", b"").decode()).get("token", [None])[0]
+    if not token:
+        logger.info("WS auth: no token in query string")
+        return None
+    jwt_auth = CachedJWTAuthentication()
+    try:
+        return jwt_auth.get_user(jwt_auth.get_validated_token(token))
+    except (InvalidToken, TokenError, AuthenticationFailed) as e:
+        logger.info("WS auth rejected: %s", e)
+        return None
+
+
+def get_last_messages(room_id):
+    """The newest messages of the room, oldest first, as chat_message events"""
+    rows, _ = history_page(room_id, limit=recent_messages.size)
+    return [history_event(msg) for msg in rows]
+
+
+def resolve_room_connection(scope, room_id):
+    """Everything a room socket needs to connect, for a single thread hop.
+
+    Returns ``(user, tournament_id, can_send)`` or None to reject. User and
+    room access come from the cache when warm.
+    """
+    user = get_user_from_scope(scope)
+    if user is None:
+        return None
+    access = room_access(room_id, user.id)
+    if access is None:
+        logger.info("WS rejected: room %s not found", room_id)
+        return None
+    tournament_id, is_participant = access
+    return user, tournament_id, user.is_staff or is_participant
 
 
 class RoomChatConsumer(AsyncWebsocketConsumer):
@@ -11,34 +59,51 @@ class RoomChatConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.room_id = self.scope["url_route"]["kwargs"]["room_id"]
 
-        # 🎯 Get tournament ID from room
-        self.tournament_id = await self.get_tournament_id()
-        if not self.tournament_id:
-            print(f"WS REJECTED: Tournament ID not found for room {self.room_id}")
+        # 🔐 JWT, room and membership in one hop
+        resolved = await database_sync_to_async(resolve_room_connection)(self.scope, self.room_id)
+        if resolved is None:
             await self.close()
             return
-
-        self.room_group_name = f"tournament_{self.tournament_id}"
-
-        # 🔐 Authenticate user via JWT
-        self.user = await self.get_user_from_token()
-        if not self.user:
-            await self.close()
-            return
-
+        # 🔒 can_send is kept for the socket's life; changes arrive as chat_access events
+        self.user, self.tournament_id, self.can_send = resolved
         self.scope["user"] = self.user
+        self.room_group_name = f"tournament_{self.tournament_id}"
+        self.access_group_name = chat_access_group(self.user.id)
 
         await self.channel_layer.group_add(
             self.room_group_name,
             self.channel_name
         )
+        await self.channel_layer.group_add(self.access_group_name, self.channel_name)
+
+        # 📜 Replay recent history; only the first socket in this process seeds it
+        recent_messages.join(self.room_id)
+        self.joined_recent = True
+        history = recent_messages.get(self.room_id)
+        if history is None:
+            # From here on broadcasts are recorded; anything sent before the
+            # group_add is in the database once the write buffers flushed it
+            history = await recent_messages.seed_once(
+                self.room_id, database_sync_to_async(get_last_messages), settle=message_buffer.flush_interval
+            )
+
         await self.accept()
+        await self.send(text_data=json.dumps({
+            "type": "chat_history",
+            "messages": history,
+            "has_more": len(history) >= recent_messages.size,
+        }))
 
     async def disconnect(self, close_code):
-        await self.channel_layer.group_discard(
-            self.room_group_name,
-            self.channel_name
-        )
+        if getattr(self, "joined_recent", False):
+            recent_messages.leave(self.room_id)
+        if getattr(self, "access_group_name", None):
+            await self.channel_layer.group_discard(self.access_group_name, self.channel_name)
+        if getattr(self, "room_group_name", None):
+            await self.channel_layer.group_discard(
+                self.room_group_name,
+                self.channel_name
+            )
 
     async def receive(self, text_data):
         data = json.loads(text_data)
@@ -48,85 +113,65 @@ class RoomChatConsumer(AsyncWebsocketConsumer):
         if not message:
             return
 
-        allowed = await self.can_chat(self.user)
-        if not allowed:
+        if not self.can_send:
             return
 
-        # 💾 Save message to DB
-        await self.save_message(self.room_id, self.user, message)
-
+        sent_at = timezone.now()
         await self.channel_layer.group_send(
             self.room_group_name,
             {
                 "type": "chat_message",
+                "event_id": uuid.uuid4().hex,
+                "room_id": self.room_id,
                 "message": message,
                 "sender": self.user.username,
                 "is_admin": self.user.is_staff,
                 "msg_type": msg_type,
+                "created_at": sent_at.isoformat(),
             }
         )
 
+        # 💾 Persist behind the broadcast, batched per worker
+        await message_buffer.add(room_id=self.room_id, sender=self.user, message=message,
+                                 is_admin=self.user.is_staff, created_at=sent_at)
+
     async def chat_message(self, event):
+        recent_messages.record(event["room_id"], event)
         await self.send(text_data=json.dumps(event))
 
-    # ================= HELPERS =================
+    async def chat_access(self, event):
+        """Membership change pushed by chat.signals"""
+        if event["room_id"] is None:
+            if not event["allowed"]:
+                await self.close()
+            return
+        if event["room_id"] == str(self.room_id):
+            self.can_send = event["allowed"] or self.user.is_staff
 
-    @database_sync_to_async
-    def get_tournament_id(self):
-        try:
-            room = Room.objects.get(id=self.room_id)
-            return room.tournament_id
-        except Exception as e:
-            print(f"WS ERROR: Room {self.room_id} not found or {str(e)}")
-            return None
 
-    @database_sync_to_async
-    def get_user_from_token(self):
-        try:
-            query_string = self.scope.get("query_string", b"").decode()
-            if not query_string or "token=" not in query_string:
-                print("WS AUTH: No token provided in query string")
-                return None
-            
-            token = query_string.split("token=")[1].split("&")[0]
-
-            jwt_auth = JWTAuthentication()
-            validated_token = jwt_auth.get_validated_token(token)
-            return jwt_auth.get_user(validated_token)
-        except Exception as e:
-            print(f"WS AUTH ERROR: {str(e)}")
-            return None
+class NotificationConsumer(AsyncWebsocketConsumer):
+    """Per-user push channel (join tickets, team invitations)"""
 
-    @database_sync_to_async
-    def can_chat(self, user):
-        if user.is_staff:
-            return True
-        try:
-            return RoomParticipant.objects.filter(
-                room_id=self.room_id,
-                user=user
-            ).exists()
-        except:
-            return False
+    async def connect(self):
+        self.user = await self.get_user_from_token()
+        if not self.user:
+            await self.close()
+            return
 
-    @database_sync_to_async
-    def save_message(self, room_id, user, message):
-        try:
-            RoomMessage.objects.create(
-                room_id=room_id,
-                sender=user,
-                message=message,
-                is_admin=user.is_staff
-            )
-        except Exception as e:
-            print(f"ERROR SAVING MESSAGE: {str(e)}")
+        self.group_name = user_group_name(self.user.id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        if getattr(self, "group_name", None):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def notify(self, event):
+        await self.send(text_data=json.dumps({
+            "event": event["event"],
+            "payload": event["payload"],
+        }))
 
     @database_sync_to_async
-    def get_last_messages(self, room_id):
-        try:
-            from .models import RoomMessage
-            # Get last 50 messages ordered by creation time
-            messages = RoomMessage.objects.filter(room_id=room_id).select_related('sender').order_by('created_at')[:50]
-            return list(messages)
-        except:
-            return []
+    def get_user_from_token(self):
+        return get_user_from_scope(self.scope)
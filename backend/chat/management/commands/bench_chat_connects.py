@@ -0,0 +1,75 @@
+import asyncio
+import time
+import uuid
+from decimal import Decimal
+
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.authentication import auth_cache_key
+from chat.access import room_access_key
+from chat.consumers import resolve_room_connection
+from tournaments.models import Tournament, Room, RoomParticipant
+
+
+def legacy_connect(scope, room_id):
+    # What RoomChatConsumer.connect used to do: three thread hops and three queries
+    async def run():
+        room = await database_sync_to_async(Room.objects.get)(id=room_id)
+        jwt_auth = JWTAuthentication()
+        token = scope["query_string"].decode().split("token=")[1].split("&")[0]
+        user = await database_sync_to_async(jwt_auth.get_user)(jwt_auth.get_validated_token(token))
+        await database_sync_to_async(RoomParticipant.objects.filter(room_id=room_id, user=user).exists)()
+        return room.tournament_id
+    return run()
+
+
+def resolved_connect(scope, room_id):
+    return database_sync_to_async(resolve_room_connection)(scope, room_id)
+
+
+class Command(BaseCommand):
+    help = "Compare reconnect-storm throughput of the room socket auth/lookup path, old vs single-hop"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sockets", type=int, default=2000, help="Distinct users reconnecting at once")
+
+    def handle(self, *args, **options):
+        count = options["sockets"]
+        # Throwaway room full of distinct players, removed afterwards
+        marker = f"bench-{uuid.uuid4().hex[:8]}"
+        tournament = Tournament.objects.create(name=marker, game="bgmi", entry_fee=Decimal("0"), max_participants=count)
+        room = Room.objects.create(tournament=tournament, participant_count=count)
+        users = User.objects.bulk_create([User(username=f"{marker}-{i}") for i in range(count)])
+        RoomParticipant.objects.bulk_create([RoomParticipant(room=room, user=user) for user in users])
+        room_id = str(room.pk)
+        scopes = [{"query_string": f"token={AccessToken.for_user(user)}".encode()} for user in users]
+
+        def cold_cache():
+            cache.delete_many(
+                [auth_cache_key(user.pk) for user in users] + [room_access_key(room_id, user.pk) for user in users]
+            )
+
+        async def storm(connect):
+            # Every socket of a reconnect storm arrives at once, each a different user
+            await asyncio.gather(*(connect(scope, room_id) for scope in scopes))
+
+        try:
+            for label, connect in (
+                ("three hops", legacy_connect), ("single hop, cold", resolved_connect), ("single hop, warm", resolved_connect)
+            ):
+                if label != "single hop, warm":
+                    cold_cache()
+                started = time.monotonic()
+                async_to_sync(storm)(connect)
+                elapsed = time.monotonic() - started
+                self.stdout.write(f"{label:>16}: {count} connects in {elapsed:.2f}s ({count / elapsed:,.0f} connects/s)")
+        finally:
+            cold_cache()
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+            tournament.delete()
@@ -0,0 +1,74 @@
+import asyncio
+import time
+import uuid
+
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from chat.buffer import CHAT_BUFFER_FLUSH_INTERVAL, MessageBuffer
+from chat.models import RoomMessage
+from tournaments.models import Room
+
+
+class RecordingBuffer(MessageBuffer):
+    """MessageBuffer that keeps the size of every batch it writes"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.batches = []
+
+    def _write(self, batch):
+        self.batches.append(len(batch))
+        super()._write(batch)
+
+
+class Command(BaseCommand):
+    help = "Compare chat persistence throughput: one INSERT per message vs the write-behind buffer"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=2000)
+        parser.add_argument("--batch", type=int, default=200, help="Buffer max_size")
+        parser.add_argument("--interval", type=float, default=CHAT_BUFFER_FLUSH_INTERVAL,
+                            help="Buffer flush_interval in seconds")
+        parser.add_argument("--pause", type=float, default=0,
+                            help="Seconds between buffered messages, to exercise the interval flush")
+
+    def handle(self, *args, **options):
+        room = Room.objects.first()
+        sender = User.objects.first()
+        if not room or not sender:
+            raise CommandError("Needs at least one room and one user")
+
+        count = options["messages"]
+        # Tagged so the benchmark rows can be removed afterwards
+        marker = f"benchmark-{uuid.uuid4()}"
+        fields = {"room_id": room.pk, "sender": sender, "message": marker, "is_admin": False}
+
+        async def per_message():
+            # What RoomChatConsumer.receive used to do: a thread hop + INSERT per message
+            create = database_sync_to_async(RoomMessage.objects.create)
+            for _ in range(count):
+                await create(**fields)
+
+        buffer = RecordingBuffer(max_size=options["batch"], flush_interval=options["interval"])
+
+        async def buffered():
+            for _ in range(count):
+                await buffer.add(**fields)
+                # A consumer yields between messages; this is what lets the
+                # size and interval flushes run while messages keep coming
+                await asyncio.sleep(options["pause"])
+            await buffer.flush()
+            await asyncio.gather(*buffer._tasks, return_exceptions=True)
+
+        try:
+            for label, run in (("per-message INSERT", per_message), ("write-behind buffer", buffered)):
+                started = time.monotonic()
+                async_to_sync(run)()
+                elapsed = time.monotonic() - started
+                self.stdout.write(f"{label:>20}: {count} messages in {elapsed:.2f}s ({count / elapsed:,.0f} msg/s)")
+            self.stdout.write(f"{'buffer batches':>20}: {len(buffer.batches)} writes, sizes {buffer.batches}")
+        finally:
+            RoomMessage.objects.filter(message=marker).delete()
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.6 on 2026-10-17 22:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0001_initial'),
+        ('tournaments', '0013_prizedistribution_rules'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='roommessage',
+            index=models.Index(fields=['room', 'created_at', 'id'], name='chat_roomme_room_id_26f500_idx'),
+        ),
+    ]
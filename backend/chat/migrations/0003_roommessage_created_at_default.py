@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-17 22:27
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0002_roommessage_history_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='roommessage',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
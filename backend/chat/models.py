@@ -2,6 +2,7 @@
 
 # Create your models here.
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
 from tournaments.models import Room
 
@@ -10,7 +11,12 @@ class RoomMessage(models.Model):
     sender = models.ForeignKey(User, on_delete=models.CASCADE)
     message = models.TextField()
     is_admin = models.BooleanField(default=False)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Stamped when the message is sent; rows may be written later in batches
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        # Cursor pagination of a room's history
+        indexes = [models.Index(fields=["room", "created_at", "id"])]
 
     def __str__(self):
         return f"{self.sender.username}: {self.message[:20]}"
@@ -0,0 +1,42 @@
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+logger = logging.getLogger(__name__)
+
+
+def user_group_name(user_id):
+    """Channel group every NotificationConsumer socket of a user joins"""
+    return f"user_{user_id}"
+
+
+def send_to_group(group, message):
+    """Best-effort group_send: pushes are hints, so a channel layer outage is
+    logged instead of failing the request that already committed"""
+    try:
+        async_to_sync(get_channel_layer().group_send)(group, message)
+    except Exception:
+        logger.exception("Could not push %s to %s", message.get("type"), group)
+
+
+def notify_user(user_id, event, payload):
+    """Push an event to all open notification sockets of a user (call from on_commit)"""
+    send_to_group(user_group_name(user_id), {"type": "notify", "event": event, "payload": payload})
+
+
+def chat_access_group(user_id):
+    """Channel group every RoomChatConsumer socket of a user joins"""
+    return f"chat_access_{user_id}"
+
+
+def set_chat_access(user_id, room_id, allowed):
+    """Tell a user's open room sockets their send permission changed.
+
+    ``room_id=None`` applies to every room; revoking it that way (a ban)
+    also closes the sockets.
+    """
+    send_to_group(
+        chat_access_group(user_id),
+        {"type": "chat_access", "room_id": str(room_id) if room_id else None, "allowed": allowed}
+    )
@@ -0,0 +1,139 @@
+import asyncio
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime
+
+from django.conf import settings
+
+CHAT_RECENT_SIZE = getattr(settings, "CHAT_RECENT_SIZE", 50)
+
+
+def history_event(msg):
+    """A stored message in the same shape as a live chat_message event"""
+    return {
+        "type": "chat_message",
+        "event_id": f"db-{msg.id}",
+        "id": msg.id,
+        "room_id": str(msg.room_id),
+        "sender": msg.sender.username,
+        "message": msg.message,
+        "is_admin": msg.is_admin,
+        "msg_type": "chat",
+        "created_at": msg.created_at.isoformat(),
+    }
+
+
+def message_key(event):
+    """Identity of a chat message whether it came from the database or a broadcast"""
+    return event["sender"], datetime.fromisoformat(event["created_at"]), event["message"]
+
+
+class RecentMessages:
+    """Ring of the latest chat events per room, one per worker process.
+
+    Rooms are fed from the broadcast their sockets receive. The first socket
+    of a room starts recording and then seeds the ring from the database, so
+    a message is caught by one or the other; sockets joining while that
+    read runs wait for it instead of reading too. The ring is dropped when
+    the last socket leaves, and joins in between replay it without touching
+    the database.
+    """
+
+    def __init__(self, size=CHAT_RECENT_SIZE):
+        self.size = size
+        self._rings = {}
+        self._started = {}
+        self._seeded = set()
+        self._seeding = {}
+        self._sockets = Counter()
+
+    def join(self, room_id):
+        """Count a socket in; a room without a ring starts recording now"""
+        self._sockets[room_id] += 1
+        if room_id not in self._rings:
+            self._rings[room_id] = OrderedDict()
+            self._started[room_id] = time.monotonic()
+
+    def leave(self, room_id):
+        self._sockets[room_id] -= 1
+        if self._sockets[room_id] <= 0:
+            del self._sockets[room_id]
+            self._rings.pop(room_id, None)
+            self._started.pop(room_id, None)
+            self._seeded.discard(room_id)
+            self._seeding.pop(room_id, None)
+
+    def recording_for(self, room_id):
+        """Seconds since this process started recording the room"""
+        return time.monotonic() - self._started[room_id]
+
+    def get(self, room_id):
+        """Oldest-first events, or None when the room has to be seeded"""
+        if room_id not in self._seeded:
+            return None
+        return list(self._rings[room_id].values())
+
+    def seed(self, room_id, events):
+        """Merge stored history read after ``join`` into the recorded events.
+
+        A message in both is kept once and the ring is ordered by send time;
+        a concurrent seed wins if first.
+        """
+        ring = self._rings[room_id]
+        if room_id not in self._seeded:
+            merged = sorted([*events, *ring.values()], key=lambda e: datetime.fromisoformat(e["created_at"]))
+            ring.clear()
+            for event in merged:
+                ring.setdefault(message_key(event), event)
+            self._trim(ring)
+            self._seeded.add(room_id)
+        return list(ring.values())
+
+    async def seed_once(self, room_id, load, settle=0):
+        """Seed a joined room from ``load(room_id)``, one read per cold ring.
+
+        ``load`` runs ``settle`` seconds after recording began, once, however
+        many sockets are waiting; they all get the seeded ring.
+        """
+        seeding = self._seeding.get(room_id)
+        if seeding is None:
+            seeding = self._seeding[room_id] = asyncio.ensure_future(self._seed_later(room_id, load, settle))
+            seeding.add_done_callback(lambda task: self._forget_failed(room_id, task))
+        # A socket giving up must not cancel the read the others wait on
+        return await asyncio.shield(seeding)
+
+    async def _seed_later(self, room_id, load, settle):
+        ring = self._rings[room_id]
+        await asyncio.sleep(max(0, settle - self.recording_for(room_id)))
+        events = await load(room_id)
+        if self._rings.get(room_id) is not ring:
+            # Every socket left during the read; this ring is gone
+            return list(self._trim(OrderedDict((message_key(e), e) for e in events)).values())
+        return self.seed(room_id, events)
+
+    def _forget_failed(self, room_id, task):
+        # The next socket retries the read instead of inheriting the error
+        if (task.cancelled() or task.exception()) and self._seeding.get(room_id) is task:
+            del self._seeding[room_id]
+
+    def record(self, room_id, event):
+        # Every socket of the room in this process sees the same event
+        ring = self._rings.get(room_id)
+        key = message_key(event)
+        if ring is None or key in ring:
+            return
+        ring[key] = event
+        if len(ring) > 1 and key[1] < list(ring)[-2][1]:
+            # Sent before events already recorded (seeded while it was in flight)
+            ordered = sorted(ring.items(), key=lambda item: item[0][1])
+            ring.clear()
+            ring.update(ordered)
+        self._trim(ring)
+
+    def _trim(self, ring):
+        while len(ring) > self.size:
+            ring.popitem(last=False)
+        return ring
+
+
+recent_messages = RecentMessages()
@@ -1,6 +1,7 @@
 from django.urls import re_path
-from .consumers import RoomChatConsumer
+from .consumers import RoomChatConsumer, NotificationConsumer
 
 websocket_urlpatterns = [
     re_path(r"ws/room/(?P<room_id>[0-9a-fA-F-]+)/$", RoomChatConsumer.as_asgi()),
+    re_path(r"ws/notifications/$", NotificationConsumer.as_asgi()),
 ]
@@ -0,0 +1,33 @@
+from functools import partial
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from tournaments.models import RoomParticipant
+from .access import invalidate_room_access
+from .notifications import set_chat_access
+
+
+@receiver(post_save, sender=RoomParticipant)
+def grant_chat_access(sender, instance, created, **kwargs):
+    """Let a new participant chat on sockets opened before they joined"""
+    if created:
+        invalidate_room_access(instance.room_id, instance.user_id)
+        transaction.on_commit(partial(set_chat_access, instance.user_id, instance.room_id, True))
+
+
+@receiver(post_delete, sender=RoomParticipant)
+def revoke_chat_access(sender, instance, **kwargs):
+    """Removed participants stop being able to send on open sockets"""
+    invalidate_room_access(instance.room_id, instance.user_id)
+    transaction.on_commit(partial(set_chat_access, instance.user_id, instance.room_id, False))
+
+
+@receiver(post_save, sender=User)
+def ban_from_chat(sender, instance, update_fields=None, **kwargs):
+    """Deactivated users are dropped from every room socket"""
+    if instance.is_active or (update_fields is not None and "is_active" not in update_fields):
+        return
+    transaction.on_commit(partial(set_chat_access, instance.pk, None, False))
@@ -1,3 +1,258 @@
+import asyncio
+import uuid
+from decimal import Decimal
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.backends.utils import CursorWrapper
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from tournaments.models import Tournament, Room, RoomParticipant
+from .buffer import MessageBuffer
+from .consumers import get_last_messages, resolve_room_connection
+from .routing import websocket_urlpatterns
+from .models import RoomMessage
+from .recent import recent_messages
+
+
+class ChatHistoryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="player")
+        tournament = Tournament.objects.create(name="Cup", game="bgmi", entry_fee=Decimal("10.00"))
+        self.room = Room.objects.create(tournament=tournament)
+        RoomMessage.objects.bulk_create([
+            RoomMessage(room=self.room, sender=self.user, message=f"m{i}") for i in range(7)
+        ])
+        self.client.force_authenticate(self.user)
+
+    def history(self, **params):
+        response = self.client.get(f"/chat/room/{self.room.id}/messages/", params)
+        self.assertEqual(response.status_code, 200)
+        return [msg["message"] for msg in response.data["messages"]], response.data["has_more"]
+
+    def test_default_is_latest_page_in_order(self):
+        self.assertEqual(self.history(limit=3), (["m4", "m5", "m6"], True))
+
+    def test_before_and_after_cursors(self):
+        ids = {msg.message: msg.id for msg in RoomMessage.objects.all()}
+        self.assertEqual(self.history(limit=3, before=ids["m4"]), (["m1", "m2", "m3"], True))
+        self.assertEqual(self.history(limit=3, before=ids["m1"]), (["m0"], False))
+        self.assertEqual(self.history(limit=3, after=ids["m4"]), (["m5", "m6"], False))
+
+    def test_before_time_cursor(self):
+        m4 = RoomMessage.objects.get(message="m4")
+        self.assertEqual(self.history(limit=2, before_time=m4.created_at.isoformat()), (["m2", "m3"], True))
+
+    def test_page_is_one_query(self):
+        last = RoomMessage.objects.order_by("-id").first()
+        with self.assertNumQueries(1):
+            self.client.get(f"/chat/room/{self.room.id}/messages/", {"before": last.id, "limit": 2})
+
+
+class MessageBufferTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="player")
+        tournament = Tournament.objects.create(name="Cup", game="bgmi", entry_fee=Decimal("10.00"))
+        self.room = Room.objects.create(tournament=tournament)
+
+    def fields(self, i):
+        return {"room_id": self.room.pk, "sender": self.user, "message": f"m{i}", "is_admin": False}
+
+    async def test_flushes_on_size(self):
+        buffer = MessageBuffer(max_size=3, flush_interval=60)
+        for i in range(3):
+            await buffer.add(**self.fields(i))
+        await asyncio.gather(*buffer._tasks, return_exceptions=True)
+        self.assertEqual(await RoomMessage.objects.acount(), 3)
+        self.assertEqual(len(buffer), 0)
+
+    async def test_flushes_on_time(self):
+        buffer = MessageBuffer(max_size=100, flush_interval=0.01)
+        await buffer.add(**self.fields(0))
+        self.assertEqual(await RoomMessage.objects.acount(), 0)
+        await asyncio.sleep(0.05)
+        self.assertEqual(await RoomMessage.objects.acount(), 1)
+
+    def test_shutdown_flush_keeps_send_order(self):
+        buffer = MessageBuffer(max_size=100, flush_interval=60)
+
+        async def send():
+            for i in range(3):
+                await buffer.add(**self.fields(i))
+            for task in buffer._tasks:
+                task.cancel()
+
+        asyncio.run(send())
+        buffer.flush_sync()
+        messages = RoomMessage.objects.order_by("created_at").values_list("message", flat=True)
+        self.assertEqual(list(messages), ["m0", "m1", "m2"])
+
+
+@mock.patch("chat.consumers.message_buffer", new=mock.AsyncMock(flush_interval=0))
+class RoomChatAccessTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="player")
+        tournament = Tournament.objects.create(name="Cup", game="bgmi", entry_fee=Decimal("10.00"))
+        self.room = Room.objects.create(tournament=tournament, participant_count=1)
+
+    async def connect(self):
+        token = await sync_to_async(AccessToken.for_user)(self.user)
+        communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f"/ws/room/{self.room.pk}/?token={token}")
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        self.history = await communicator.receive_json_from()
+        self.assertEqual(self.history["type"], "chat_history")
+        return communicator
+
+    async def can_send(self, communicator):
+        await communicator.send_json_to({"message": "hi"})
+        return not await communicator.receive_nothing(timeout=0.05)
+
+    def change(self, action):
+        with self.captureOnCommitCallbacks(execute=True):
+            action()
+
+    async def test_membership_is_checked_once_per_socket(self):
+        communicator = await self.connect()
+        self.assertFalse(await self.can_send(communicator))
+        # A silent change (no signal) is not seen by the open socket
+        await RoomParticipant.objects.abulk_create([RoomParticipant(room=self.room, user=self.user)])
+        self.assertFalse(await self.can_send(communicator))
+        await communicator.disconnect()
+
+    async def test_join_and_removal_arrive_over_channel_layer(self):
+        communicator = await self.connect()
+        await sync_to_async(self.change)(lambda: RoomParticipant.objects.create(room=self.room, user=self.user))
+        self.assertTrue(await self.can_send(communicator))
+        self.assertEqual((await communicator.receive_json_from())["message"], "hi")
+        await sync_to_async(self.change)(lambda: RoomParticipant.objects.filter(user=self.user).delete())
+        self.assertFalse(await self.can_send(communicator))
+        await communicator.disconnect()
+
+    async def test_deactivated_user_is_disconnected(self):
+        communicator = await self.connect()
+        self.user.is_active = False
+        await sync_to_async(self.change)(self.user.save)
+        self.assertEqual((await communicator.receive_output())["type"], "websocket.close")
+
+    async def test_join_replays_newest_messages(self):
+        await RoomMessage.objects.abulk_create([
+            RoomMessage(room=self.room, sender=self.user, message=f"m{i}") for i in range(4)
+        ])
+        with mock.patch.object(recent_messages, "size", 2):
+            communicator = await self.connect()
+            await communicator.disconnect()
+        self.assertEqual([msg["message"] for msg in self.history["messages"]], ["m2", "m3"])
+        self.assertTrue(self.history["has_more"])
+
+    async def test_hot_room_join_replays_from_memory(self):
+        await sync_to_async(self.change)(lambda: RoomParticipant.objects.create(room=self.room, user=self.user))
+        first = await self.connect()
+        await first.send_json_to({"message": "live"})
+        await first.receive_json_from()
+        with mock.patch("chat.consumers.get_last_messages") as get_last_messages:
+            second = await self.connect()
+        get_last_messages.assert_not_called()
+        self.assertEqual([msg["message"] for msg in self.history["messages"]], ["live"])
+        await first.disconnect()
+        await second.disconnect()
+        self.assertIsNone(recent_messages.get(str(self.room.pk)))
+
+    async def test_cold_seed_keeps_messages_sent_during_the_read(self):
+        await RoomMessage.objects.acreate(room=self.room, sender=self.user, message="stored")
+        group = f"tournament_{self.room.tournament_id}"
+        read = get_last_messages
+
+        def broadcast(message, sent_at):
+            async_to_sync(get_channel_layer().group_send)(group, {
+                "type": "chat_message", "event_id": uuid.uuid4().hex, "room_id": str(self.room.pk),
+                "sender": "player", "message": message, "is_admin": False, "msg_type": "chat",
+                "created_at": sent_at.isoformat(),
+            })
+
+        def read_while_chatting(room_id):
+            # One message still in a write buffer, one already stored
+            broadcast("unflushed", timezone.now())
+            sent_at = timezone.now()
+            broadcast("flushed", sent_at)
+            RoomMessage.objects.create(room=self.room, sender=self.user, message="flushed", created_at=sent_at)
+            return read(room_id)
+
+        with mock.patch("chat.consumers.get_last_messages", side_effect=read_while_chatting):
+            first = await self.connect()
+        self.assertEqual([msg["message"] for msg in self.history["messages"]], ["stored", "flushed"])
+        self.assertEqual((await first.receive_json_from())["message"], "unflushed")
+        self.assertEqual((await first.receive_json_from())["message"], "flushed")
+        second = await self.connect()
+        # Nothing lost, nothing twice, in send order
+        self.assertEqual([msg["message"] for msg in self.history["messages"]], ["stored", "unflushed", "flushed"])
+        await first.disconnect()
+        await second.disconnect()
+
+    async def test_concurrent_cold_joins_share_one_history_read(self):
+        await RoomMessage.objects.acreate(room=self.room, sender=self.user, message="stored")
+        # Resolve once so auth and room access are cached for every socket
+        await (await self.connect()).disconnect()
+        token = await sync_to_async(AccessToken.for_user)(self.user)
+        communicators = [
+            WebsocketCommunicator(URLRouter(websocket_urlpatterns), f"/ws/room/{self.room.pk}/?token={token}")
+            for _ in range(20)
+        ]
+
+        statements = []
+        execute = CursorWrapper._execute
+
+        def record(cursor, sql, *args):
+            statements.append(sql)
+            return execute(cursor, sql, *args)
+
+        # Patched on the class: every async context gets its own connection
+        with mock.patch.object(CursorWrapper, "_execute", record):
+            await asyncio.gather(*(communicator.connect() for communicator in communicators))
+            histories = [await communicator.receive_json_from() for communicator in communicators]
+
+        self.assertEqual(len([sql for sql in statements if "chat_roommessage" in sql]), 1)
+        self.assertEqual({tuple(m["message"] for m in h["messages"]) for h in histories}, {("stored",)})
+        for communicator in communicators:
+            await communicator.disconnect()
+
+
+class RoomConnectResolverTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="player")
+        tournament = Tournament.objects.create(name="Cup", game="bgmi", entry_fee=Decimal("10.00"))
+        self.room = Room.objects.create(tournament=tournament)
+        self.scope = {"query_string": f"lang=en&token={AccessToken.for_user(self.user)}".encode()}
+
+    def resolve(self, room_id=None):
+        return resolve_room_connection(self.scope, str(room_id or self.room.pk))
+
+    def test_cold_connect_is_one_hop_and_warm_connect_is_free(self):
+        with self.assertNumQueries(2):
+            user, tournament_id, can_send = self.resolve()
+        self.assertEqual((user.pk, tournament_id, can_send), (self.user.pk, self.room.tournament_id, False))
+        with self.assertNumQueries(0):
+            self.resolve()
+
+    def test_joining_the_room_refreshes_cached_access(self):
+        self.assertFalse(self.resolve()[2])
+        with self.captureOnCommitCallbacks(execute=True):
+            RoomParticipant.objects.create(room=self.room, user=self.user)
+        self.assertTrue(self.resolve()[2])
 
-# Create your tests here.
+    def test_rejects_bad_token_and_unknown_room(self):
+        self.assertIsNone(self.resolve(room_id="not-a-room"))
+        self.assertIsNone(self.resolve(room_id=uuid.uuid4()))
+        self.scope = {"query_string": b"token=garbage"}
+        self.assertIsNone(self.resolve())
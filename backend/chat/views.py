@@ -1,25 +1,76 @@
-from django.shortcuts import render
+from django.db.models import Q, Subquery
+from django.utils.dateparse import parse_datetime
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from .models import RoomMessage
 
+DEFAULT_HISTORY_SIZE = 50
+MAX_HISTORY_SIZE = 200
+
+
+def message_payload(msg):
+    return {
+        "id": msg.id,
+        "sender": msg.sender.username,
+        "message": msg.message,
+        "is_admin": msg.is_admin,
+        "msg_type": "chat",
+        "created_at": msg.created_at,
+    }
+
+
+def history_page(room_id, before=None, after=None, limit=DEFAULT_HISTORY_SIZE, before_time=None):
+    """One page of a room's history, oldest first, plus whether more exist past it.
+
+    With no cursor this is the latest ``limit`` messages; ``before`` / ``after``
+    (message ids) page backwards / forwards. The anchor's timestamp is read
+    in a subquery, so every page is a single seek on (room, created_at, id).
+    ``before_time`` pages back from a message that has no id yet (one still
+    in the write buffer, as replayed on socket join).
+    """
+    messages = RoomMessage.objects.filter(room_id=room_id).select_related("sender")
+    anchor_id = before or after
+    if anchor_id:
+        anchor = Subquery(RoomMessage.objects.filter(pk=anchor_id, room_id=room_id).values("created_at")[:1])
+        op = "lt" if before else "gt"
+        messages = messages.filter(
+            Q(**{f"created_at__{op}": anchor}) | Q(created_at=anchor, **{f"id__{op}": anchor_id})
+        )
+    elif before_time:
+        messages = messages.filter(created_at__lt=before_time)
+
+    newest_first = not after
+    ordering = ("-created_at", "-id") if newest_first else ("created_at", "id")
+    rows = list(messages.order_by(*ordering)[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if newest_first:
+        rows.reverse()
+    return rows, has_more
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_room_messages(request, room_id):
-    """Fetch chat history for a specific room"""
-    # Fetch messages for this room
-    messages = RoomMessage.objects.filter(room_id=room_id).select_related('sender').order_by('created_at')
-    
-    data = []
-    for msg in messages:
-        data.append({
-            "id": msg.id,
-            "sender": msg.sender.username,
-            "message": msg.message,
-            "is_admin": msg.is_admin,
-            "msg_type": "chat",
-            "created_at": msg.created_at
-        })
-    
-    return Response(data)
+    """Chat history for a room: latest N by default, ?before=<id> / ?after=<id> to page.
+
+    ?before_time=<ISO timestamp> pages back from a replayed message without an id.
+    """
+    params = request.query_params
+    try:
+        before = int(params["before"]) if params.get("before") else None
+        after = int(params["after"]) if params.get("after") else None
+        limit = max(1, min(int(params.get("limit", DEFAULT_HISTORY_SIZE)), MAX_HISTORY_SIZE))
+    except ValueError:
+        return Response({"error": "before, after and limit must be integers"}, status=400)
+    before_time = params.get("before_time")
+    if before_time:
+        before_time = parse_datetime(before_time)
+        if before_time is None:
+            return Response({"error": "before_time must be an ISO timestamp"}, status=400)
+    if len([cursor for cursor in (before, after, before_time) if cursor]) > 1:
+        return Response({"error": "Use only one of before, after or before_time"}, status=400)
+
+    rows, has_more = history_page(room_id, before=before, after=after, limit=limit, before_time=before_time)
+    return Response({"messages": [message_payload(msg) for msg in rows], "has_more": has_more})
@@ -1,24 +1,24 @@
 from django.contrib import admin
-from .models import Tournament, Room, RoomParticipant, PrizeDistribution, RoomResult
+from .models import Tournament, Room, RoomParticipant, PrizeDistribution, RoomResult, JoinTicket
 
 
 class PrizeDistributionInline(admin.TabularInline):
     model = PrizeDistribution
     extra = 1
-    fields = ["rank", "prize_amount"]
+    fields = ["rank", "rank_to", "prize_type", "prize_amount", "percentage"]
 
 
 @admin.register(Tournament)
 class TournamentAdmin(admin.ModelAdmin):
     list_display = ["name", "game", "entry_fee", "max_players_per_room", "is_active", "created_at"]
-    list_filter = ["game", "is_active"]
+    list_filter = ["game", "is_active", "admission_queue"]
     search_fields = ["name"]
     inlines = [PrizeDistributionInline]
 
 
 @admin.register(PrizeDistribution)
 class PrizeDistributionAdmin(admin.ModelAdmin):
-    list_display = ["tournament", "rank", "prize_amount", "created_at"]
+    list_display = ["tournament", "rank", "rank_to", "prize_type", "prize_amount", "percentage", "created_at"]
     list_filter = ["tournament"]
     ordering = ["tournament", "rank"]
 
@@ -53,6 +53,13 @@ class RoomParticipantAdmin(admin.ModelAdmin):
     search_fields = ["user__username", "room__id"]
 
 
+@admin.register(JoinTicket)
+class JoinTicketAdmin(admin.ModelAdmin):
+    list_display = ["id", "user", "room", "status", "created_at", "processed_at"]
+    list_filter = ["status"]
+    search_fields = ["user__username", "room__id"]
+
+
 @admin.register(RoomResult)
 class RoomResultAdmin(admin.ModelAdmin):
     list_display = ["participant_username", "room", "rank", "prize_amount", "payout_status", "approved_by", "approved_at"]
@@ -67,35 +74,10 @@ class RoomResultAdmin(admin.ModelAdmin):
     
     def approve_selected_payouts(self, request, queryset):
         """Bulk action to approve selected payouts"""
-        from django.utils import timezone
-        from wallet.models import Transaction
-        from django.db import transaction as db_transaction
-        
-        pending_results = queryset.filter(payout_status="pending")
-        count = 0
+        from .utils import pay_out_results
         
-        with db_transaction.atomic():
-            for result in pending_results:
-                if result.prize_amount > 0:
-                    # Credit winner's wallet
-                    profile = result.participant.user.profile
-                    profile.balance += result.prize_amount
-                    profile.save()
-                    
-                    # Create transaction record
-                    Transaction.objects.create(
-                        profile=profile,
-                        tx_type="credit",
-                        amount=result.prize_amount,
-                        note=f"Prize for Rank {result.rank} in room {result.room.id}"
-                    )
-                    
-                    # Update result status
-                    result.payout_status = "paid"
-                    result.approved_by = request.user
-                    result.approved_at = timezone.now()
-                    result.save()
-                    count += 1
+        # Zero-prize results stay pending here, as they always have
+        count, _ = pay_out_results(queryset.filter(prize_amount__gt=0), request.user)
         
         self.message_user(request, f"Successfully approved {count} payouts")
     approve_selected_payouts.short_description = "Approve selected payouts"
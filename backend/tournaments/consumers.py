@@ -0,0 +1,13 @@
+from channels.consumer import SyncConsumer
+
+from .utils import admit_pending_tickets
+
+
+class JoinAdmissionConsumer(SyncConsumer):
+    """Background worker draining queued join tickets.
+
+    Run with: python manage.py runworker join-admissions
+    """
+
+    def admit_batch(self, message):
+        admit_pending_tickets(message["room_id"])
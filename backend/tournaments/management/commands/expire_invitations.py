@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tournaments.utils import expire_stale_invitations
+
+
+class Command(BaseCommand):
+    help = "Expire pending team invitations for rooms that started, completed or passed their registration deadline"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--every", type=int, default=0, help="Keep running, sweeping every N seconds")
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            expired, chunks = expire_stale_invitations(chunk_size=options["chunk_size"])
+            elapsed = time.monotonic() - started
+            rate = expired / elapsed if elapsed else 0
+            self.stdout.write(
+                f"Expired {expired} invitations in {chunks} chunks, "
+                f"{elapsed:.2f}s ({rate:.0f} rows/s)"
+            )
+            if not options["every"]:
+                break
+            time.sleep(options["every"])
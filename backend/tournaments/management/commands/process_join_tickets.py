@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from tournaments.models import JoinTicket
+from tournaments.utils import admit_pending_tickets, ADMISSION_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = "Admit pending join tickets for every queued room (fallback for the join-admissions worker)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=ADMISSION_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        room_ids = JoinTicket.objects.filter(status="pending").values_list("room_id", flat=True).distinct()
+        for room_id in list(room_ids):
+            processed = admit_pending_tickets(room_id, batch_size=options["batch_size"])
+            self.stdout.write(f"Room {room_id}: processed {len(processed)} tickets")
+        self.stdout.write(self.style.SUCCESS("Done"))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from tournaments.models import Room, RoomParticipant
+
+
+def participant_count_subquery(aggregate=None, **filters):
+    counts = RoomParticipant.objects.filter(room=OuterRef("pk"), **filters).order_by().values("room")
+    return Coalesce(
+        Subquery(counts.annotate(c=aggregate or Count("pk")).values("c"), output_field=IntegerField()),
+        0,
+    )
+
+
+class Command(BaseCommand):
+    help = "Recompute Room.participant_count and Room.paid_count from RoomParticipant (incl. reserved team seats)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--room", help="Only recount a single room (UUID)")
+
+    def handle(self, *args, **options):
+        rooms = Room.objects.all()
+        if options["room"]:
+            rooms = rooms.filter(pk=options["room"])
+
+        updated = rooms.update(
+            # Seats held by team leaders for teammates count as taken
+            participant_count=participant_count_subquery() + participant_count_subquery(Sum("reserved_seats")),
+            paid_count=participant_count_subquery(paid=True),
+        )
+        self.stdout.write(self.style.SUCCESS(f"Recounted {updated} rooms"))
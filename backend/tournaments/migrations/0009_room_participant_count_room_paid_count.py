@@ -0,0 +1,37 @@
+# Generated by Django 5.1.6 on 2026-10-17 22:05
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_room_counts(apps, schema_editor):
+    Room = apps.get_model('tournaments', 'Room')
+    RoomParticipant = apps.get_model('tournaments', 'RoomParticipant')
+
+    def counted(**filters):
+        counts = RoomParticipant.objects.filter(room=OuterRef('pk'), **filters).order_by().values('room')
+        return Coalesce(Subquery(counts.annotate(c=Count('pk')).values('c'), output_field=IntegerField()), 0)
+
+    Room.objects.update(participant_count=counted(), paid_count=counted(paid=True))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0008_room_payment_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='room',
+            name='paid_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='participant_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_room_counts, migrations.RunPython.noop),
+    ]
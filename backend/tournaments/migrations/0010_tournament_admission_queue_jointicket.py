@@ -0,0 +1,38 @@
+# Generated by Django 5.1.6 on 2026-10-17 22:08
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0009_room_participant_count_room_paid_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='admission_queue',
+            field=models.BooleanField(default=False, help_text='Queue join requests and admit them in batches (for hot tournaments)'),
+        ),
+        migrations.CreateModel(
+            name='JoinTicket',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('admitted', 'Admitted'), ('rejected', 'Rejected')], default='pending', max_length=10)),
+                ('error', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='join_tickets', to='tournaments.room')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='join_tickets', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['room', 'status', 'created_at'], name='tournaments_room_id_648bba_idx')],
+                'unique_together': {('room', 'user')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-17 22:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0010_tournament_admission_queue_jointicket'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='teaminvitation',
+            name='invitee_game_id',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+    ]
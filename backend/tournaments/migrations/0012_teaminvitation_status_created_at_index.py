@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-17 22:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0011_alter_teaminvitation_invitee_game_id'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='teaminvitation',
+            index=models.Index(fields=['status', 'created_at'], name='tournaments_status_54e8da_idx'),
+        ),
+    ]
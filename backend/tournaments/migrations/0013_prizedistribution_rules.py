@@ -0,0 +1,28 @@
+# Generated by Django 5.1.6 on 2026-10-17 22:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0012_teaminvitation_status_created_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='prizedistribution',
+            name='percentage',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Percentage of the prize pool per rank', max_digits=5),
+        ),
+        migrations.AddField(
+            model_name='prizedistribution',
+            name='prize_type',
+            field=models.CharField(choices=[('fixed', 'Fixed amount'), ('percentage', 'Percentage of pool')], default='fixed', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='prizedistribution',
+            name='rank_to',
+            field=models.IntegerField(blank=True, help_text='Last rank of a rank range (e.g. 4-10), empty for a single rank', null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-17 22:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0013_prizedistribution_rules'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='roomparticipant',
+            name='reserved_seats',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import F
 from django.contrib.auth.models import User
 from django.utils import timezone
 import uuid
@@ -18,6 +19,7 @@ class Tournament(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name="created_tournaments")
     created_at = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True)
+    admission_queue = models.BooleanField(default=False, help_text="Queue join requests and admit them in batches (for hot tournaments)")
     
     def get_team_size(self):
         """Get number of players based on team mode"""
@@ -28,10 +30,15 @@ class Tournament(models.Model):
 
 class PrizeDistribution(models.Model):
     """Defines rank-wise prize structure for tournaments"""
+    PRIZE_TYPES = (("fixed","Fixed amount"),("percentage","Percentage of pool"))
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE, related_name="prize_distributions")
     rank = models.IntegerField()  # 1, 2, 3, etc.
+    rank_to = models.IntegerField(null=True, blank=True, help_text="Last rank of a rank range (e.g. 4-10), empty for a single rank")
+    prize_type = models.CharField(max_length=10, choices=PRIZE_TYPES, default="fixed")
     prize_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0, help_text="Fixed prize amount")
+    percentage = models.DecimalField(max_digits=5, decimal_places=2, default=0, help_text="Percentage of the prize pool per rank")
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -41,9 +48,14 @@ class PrizeDistribution(models.Model):
     def __str__(self):
         return f"{self.tournament.name} - Rank {self.rank}: ₹{self.prize_amount}"
 
+    @property
+    def last_rank(self):
+        return max(self.rank_to or self.rank, self.rank)
+
     def calculate_prize_amount(self, total_pool):
-        """Return fixed prize amount"""
-        return self.prize_amount
+        """Return the per-rank prize for this rule given the pool"""
+        from .prizes import PrizeTable
+        return PrizeTable([self], total_pool).amount_for_rank(self.rank)
 
 
 class Room(models.Model):
@@ -57,8 +69,13 @@ class Room(models.Model):
     payment_type = models.CharField(max_length=20, choices=PAYMENT_TYPES, default="split_equally", help_text="How team payment is handled")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Denormalized counters, kept in sync by adjust_counts() and the
+    # recount_rooms management command
+    participant_count = models.PositiveIntegerField(default=0)
+    paid_count = models.PositiveIntegerField(default=0)
+
     def current_count(self):
-        return self.participants.count()
+        return self.participant_count
 
     def required_per_user_amount(self):
         # Each participant pays the FULL entry fee (not split)
@@ -66,8 +83,38 @@ class Room(models.Model):
 
     def total_prize_pool(self):
         """Calculate total prize pool from all paid participants"""
-        paid_count = self.participants.filter(paid=True).count()
-        return self.tournament.entry_fee * paid_count
+        return self.tournament.entry_fee * self.paid_count
+
+    def adjust_counts(self, participants=0, paid=0):
+        """Atomically shift the stored counters and refresh them on this instance"""
+        Room.objects.filter(pk=self.pk).update(
+            participant_count=F("participant_count") + participants,
+            paid_count=F("paid_count") + paid,
+        )
+        self.refresh_from_db(fields=["participant_count", "paid_count"])
+
+    def claim_slots(self, seats=1, paid=0, headroom=None):
+        """Claim seats with a single conditional UPDATE, returns False if the tournament is full.
+
+        ``headroom`` is how many free slots must exist for the claim to succeed
+        (defaults to ``seats``), so a team leader only gets in if the whole team fits.
+        """
+        headroom = seats if headroom is None else headroom
+        claimed = Room.objects.filter(
+            pk=self.pk,
+            participant_count__lte=self.tournament.max_participants - headroom,
+        ).update(
+            participant_count=F("participant_count") + seats,
+            paid_count=F("paid_count") + paid,
+        )
+        if claimed:
+            self.refresh_from_db(fields=["participant_count", "paid_count"])
+        return bool(claimed)
+
+    def mark_full_if_needed(self):
+        if self.status == "open" and self.participant_count >= self.tournament.max_participants:
+            self.status = "full"
+            self.save(update_fields=["status"])
 
     def __str__(self):
         return f"{self.tournament.name} room {self.id}"
@@ -81,14 +128,25 @@ class TeamInvitation(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="invitations")
     inviter = models.ForeignKey(User, on_delete=models.CASCADE, related_name="sent_invitations")
-    invitee_game_id = models.CharField(max_length=100)
+    invitee_game_id = models.CharField(max_length=100, db_index=True)
     invitee = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name="received_invitations")
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "created_at"])]
     
     def __str__(self):
         return f"Invitation from {self.inviter.username} to {self.invitee_game_id}"
 
+    def is_for(self, user):
+        """True if the invited game ID (or resolved invitee) belongs to ``user``"""
+        from wallet.models import GameIdentity
+
+        if self.invitee_id is not None:
+            return self.invitee_id == user.id
+        return GameIdentity.objects.filter(external_id=self.invitee_game_id, profile__user=user).exists()
+
 
 class RoomParticipant(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -99,6 +157,8 @@ class RoomParticipant(models.Model):
     team_leader = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name="team_members")
     is_team_leader = models.BooleanField(default=False)
     payment_share = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    # Seats a team leader has paid for and holds for teammates who haven't joined yet
+    reserved_seats = models.PositiveSmallIntegerField(default=0)
     razorpay_order_id = models.CharField(max_length=255, blank=True, null=True)
     razorpay_payment_id = models.CharField(max_length=255, blank=True, null=True)
 
@@ -109,6 +169,36 @@ class RoomParticipant(models.Model):
         return f"{self.user.username} in {self.room.id}"
 
 
+class JoinTicket(models.Model):
+    """A queued join request for tournaments running in admission-queue mode"""
+    STATUS_CHOICES = (("pending","Pending"),("admitted","Admitted"),("rejected","Rejected"))
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="join_tickets")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="join_tickets")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    error = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ("room", "user")
+        indexes = [models.Index(fields=["room", "status", "created_at"])]
+
+    def as_payload(self):
+        return {
+            "ticket_id": str(self.id),
+            "room_id": str(self.room_id),
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "processed_at": self.processed_at.isoformat() if self.processed_at else None,
+        }
+
+    def __str__(self):
+        return f"Ticket {self.id} ({self.status})"
+
+
 class RoomResult(models.Model):
     """Stores results and prize payout information for room participants"""
     PAYOUT_STATUS = (("pending","Pending"),("approved","Approved"),("paid","Paid"),("rejected","Rejected"))
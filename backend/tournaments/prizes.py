@@ -0,0 +1,94 @@
+from collections import Counter
+from decimal import Decimal, ROUND_DOWN
+
+from .models import PrizeDistribution
+
+PAISE = Decimal("0.01")
+
+
+def to_paise(amount):
+    return int((Decimal(amount) * 100).to_integral_value(rounding=ROUND_DOWN))
+
+
+def from_paise(paise):
+    return (Decimal(paise) / 100).quantize(PAISE)
+
+
+class PrizeTable:
+    """A tournament's prize rules, loaded once and evaluated in batch.
+
+    Rules are PrizeDistribution rows: a fixed amount or a percentage of the
+    pool, for a single rank or a rank range (``rank`` .. ``rank_to``). All
+    math runs on integer paise so payouts are exact and never exceed what
+    the rules allow.
+    """
+
+    def __init__(self, rules, total_pool=0):
+        self.rules = sorted(rules, key=lambda rule: rule.rank)
+        self.pool_paise = to_paise(total_pool)
+        # Positions past the last ruled rank pay nothing and are never materialised
+        self.last_paid_rank = max((rule.last_rank for rule in self.rules), default=0)
+
+    @classmethod
+    def load(cls, tournament, total_pool=0):
+        return cls(PrizeDistribution.objects.filter(tournament=tournament), total_pool)
+
+    def rule_paise(self, rule):
+        """Per-rank prize of a single rule, in paise"""
+        if rule.prize_type == "percentage":
+            # percentage has two decimals, so basis points keep it integral
+            return self.pool_paise * to_paise(rule.percentage) // 10000
+        return to_paise(rule.prize_amount)
+
+    def position_prizes(self, last_position):
+        """Prize per finishing position 1..min(last_position, last_paid_rank) (index 0 is unused)"""
+        last_position = min(last_position, self.last_paid_rank)
+        prizes = [0] * (last_position + 1)
+        for rule in self.rules:
+            amount = self.rule_paise(rule)
+            for position in range(rule.rank, min(rule.last_rank, last_position) + 1):
+                prizes[position] = amount
+        return prizes
+
+    def amount_for_rank(self, rank):
+        if rank > self.last_paid_rank:
+            return from_paise(0)
+        return from_paise(self.position_prizes(rank)[rank])
+
+    def fixed_total(self):
+        """Money the fixed rules pay out in total (what a creator must fund)"""
+        return from_paise(sum(
+            to_paise(rule.prize_amount) * (rule.last_rank - rule.rank + 1)
+            for rule in self.rules if rule.prize_type == "fixed"
+        ))
+
+    def payout_vector(self, ranks):
+        """Per-player prize for every rank in ``ranks``, splitting ties.
+
+        The ``k`` players tied on rank ``r`` occupy the next ``k`` positions
+        from ``r`` that no better rank has taken (so dense ranks like 1,1,2
+        put the 2 on position 3) and share the prizes of those positions
+        equally. Leftover paise from the split go to nobody, so the total
+        never exceeds the rule table. Returns a ``{rank: Decimal}`` mapping.
+        """
+        ties = Counter(ranks)
+        if not ties:
+            return {}
+
+        spans, next_free = {}, 1
+        for rank in sorted(ties):
+            first = max(rank, next_free)
+            next_free = first + ties[rank]
+            spans[rank] = (first, next_free - 1)
+
+        prefix = [0]
+        for amount in self.position_prizes(next_free - 1)[1:]:
+            prefix.append(prefix[-1] + amount)
+
+        def paid_through(position):
+            return prefix[min(position, len(prefix) - 1)]
+
+        return {
+            rank: from_paise((paid_through(last) - paid_through(first - 1)) // ties[rank])
+            for rank, (first, last) in spans.items()
+        }
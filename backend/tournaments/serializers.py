@@ -5,7 +5,7 @@ from .models import Tournament, Room, RoomParticipant, PrizeDistribution, RoomRe
 class PrizeDistributionSerializer(serializers.ModelSerializer):
     class Meta:
         model = PrizeDistribution
-        fields = ["id", "tournament", "rank", "prize_amount", "created_at"]
+        fields = ["id", "tournament", "rank", "rank_to", "prize_type", "prize_amount", "percentage", "created_at"]
         read_only_fields = ["id", "created_at"]
 
 
@@ -27,21 +27,27 @@ class TournamentSerializer(serializers.ModelSerializer):
     
     def get_rooms(self, obj):
         """Get simplified room data to avoid circular references"""
-        from .models import Room
-        rooms = Room.objects.filter(tournament=obj)
+        try:
+            room = obj.room
+        except Room.DoesNotExist:
+            return []
+
         return [{
             'id': str(room.id),
             'status': room.status,
             'current_players': room.current_count(),
             'max_players': obj.max_participants,  # Use max_participants instead of team_size
-            'prize_pool': str(room.total_prize_pool()),
+            'prize_pool': str(obj.entry_fee * room.paid_count),
             'owner': {'username': room.owner.username} if room.owner else None,
             'created_at': room.created_at
-        } for room in rooms]
+        }]
 
     def get_total_participants(self, obj):
         """Count total participants across all rooms"""
-        return RoomParticipant.objects.filter(room__tournament=obj).count()
+        try:
+            return obj.room.participant_count
+        except Room.DoesNotExist:
+            return 0
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
@@ -0,0 +1,14 @@
+# tournaments/signals.py
+from django.db.models import F
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from .models import Room, RoomParticipant
+
+
+@receiver(post_delete, sender=RoomParticipant)
+def release_room_counts(sender, instance, **kwargs):
+    """Keep Room counters in sync when a participant is removed (with any seats it reserved)"""
+    Room.objects.filter(pk=instance.room_id).update(
+        participant_count=F("participant_count") - 1 - instance.reserved_seats,
+        paid_count=F("paid_count") - (1 if instance.paid else 0),
+    )
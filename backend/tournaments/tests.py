@@ -1,30 +1,558 @@
-# Create your tests here.
-from rest_framework import serializers
-from .models import Tournament, Room, RoomParticipant
-
-class TournamentSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Tournament
-        fields = "__all__"
-        read_only_fields = ["created_by","created_at"]
-
-class RoomSerializer(serializers.ModelSerializer):
-    tournament = TournamentSerializer(read_only=True)
-    required_amount = serializers.SerializerMethodField()
-    current_players = serializers.SerializerMethodField()
-
-    class Meta:
-        model = Room
-        fields = ["id","tournament","owner","status","created_at","required_amount","current_players"]
-
-    def get_required_amount(self,obj):
-        return obj.required_per_user_amount()
-
-    def get_current_players(self,obj):
-        return obj.current_count()
-
-class RoomParticipantSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = RoomParticipant
-        fields = "__all__"
-        read_only_fields = ["joined_at","paid","razorpay_order_id","razorpay_payment_id"]
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.contrib.admin import AdminSite
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from chat.notifications import user_group_name
+from wallet.models import Profile, Transaction
+
+from .admin import RoomResultAdmin
+from .models import Tournament, Room, RoomParticipant, PrizeDistribution, JoinTicket, TeamInvitation, RoomResult
+from .prizes import PrizeTable
+from .utils import admit_pending_tickets, resolve_game_ids, pay_out_results, build_prize_rules, PrizeRulesRejected
+
+
+def make_player(username, balance="100.00", **game_ids):
+    """A verified player with ``balance`` in the wallet and the given game ID columns"""
+    user = User.objects.create_user(username=username)
+    Profile.objects.filter(user=user).update(balance=Decimal(balance), game_id_verified=True, **game_ids)
+    user = User.objects.get(pk=user.pk)
+    if game_ids:
+        user.profile.sync_game_identities()
+    return user
+
+
+class TournamentListingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username="admin", is_staff=True)
+
+    def make_tournaments(self, count, players=3):
+        start = Tournament.objects.count()
+        for i in range(start, start + count):
+            t = Tournament.objects.create(
+                name=f"Cup {i}", game="bgmi", entry_fee=Decimal("50.00"), created_by=self.admin
+            )
+            room = Room.objects.create(tournament=t, owner=self.admin)
+            PrizeDistribution.objects.create(tournament=t, rank=1, prize_amount=Decimal("100.00"))
+            for j in range(players):
+                user = User.objects.create_user(username=f"p{i}_{j}")
+                RoomParticipant.objects.create(room=room, user=user, paid=(j != 0))
+            room.adjust_counts(participants=players, paid=players - 1)
+
+    def list_query_count(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/tournaments/tournaments/")
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response.data
+
+    def test_listing_uses_constant_queries(self):
+        self.make_tournaments(2)
+        small, _ = self.list_query_count()
+        self.make_tournaments(10)
+        large, data = self.list_query_count()
+
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, 2)
+        self.assertEqual(len(data), 12)
+
+    def test_listing_payload_counts(self):
+        self.make_tournaments(1, players=3)
+        _, data = self.list_query_count()
+
+        tournament = data[0]
+        self.assertEqual(tournament["total_participants"], 3)
+        self.assertEqual(tournament["created_by_username"], "admin")
+        self.assertEqual(len(tournament["prize_distributions"]), 1)
+        room = tournament["rooms"][0]
+        self.assertEqual(room["current_players"], 3)
+        self.assertEqual(room["prize_pool"], "100.00")
+        self.assertEqual(room["owner"], {"username": "admin"})
+
+
+class RoomCounterTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.tournament = Tournament.objects.create(
+            name="Solo Cup", game="bgmi", entry_fee=Decimal("20.00"), max_participants=10
+        )
+        self.room = Room.objects.create(tournament=self.tournament)
+
+    def test_join_updates_counters(self):
+        user = make_player("solo")
+        self.client.force_authenticate(user)
+        response = self.client.post(f"/tournaments/room/{self.room.id}/join-solo/")
+        self.assertEqual(response.status_code, 200)
+
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.participant_count, 1)
+        self.assertEqual(self.room.paid_count, 1)
+        self.assertEqual(self.room.total_prize_pool(), Decimal("20.00"))
+
+    def test_removal_releases_counters(self):
+        user = make_player("leaver")
+        participant = RoomParticipant.objects.create(room=self.room, user=user, paid=True)
+        self.room.adjust_counts(participants=1, paid=1)
+
+        participant.delete()
+        self.room.refresh_from_db()
+        self.assertEqual((self.room.participant_count, self.room.paid_count), (0, 0))
+
+    def test_recount_rooms_repairs_drift(self):
+        for i in range(3):
+            RoomParticipant.objects.create(room=self.room, user=make_player(f"p{i}"), paid=(i > 0))
+        Room.objects.filter(pk=self.room.pk).update(participant_count=42, paid_count=42)
+
+        call_command("recount_rooms", stdout=StringIO())
+        self.room.refresh_from_db()
+        self.assertEqual((self.room.participant_count, self.room.paid_count), (3, 2))
+
+
+class SlotReservationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.tournament = Tournament.objects.create(
+            name="Hot Cup", game="bgmi", entry_fee=Decimal("10.00"), max_participants=25
+        )
+        self.room = Room.objects.create(tournament=self.tournament)
+
+    def join(self, user):
+        self.client.force_authenticate(user)
+        return self.client.post(f"/tournaments/room/{self.room.id}/join-solo/")
+
+    def test_burst_never_overfills(self):
+        players = [make_player(f"burst{i}") for i in range(40)]
+        statuses = [self.join(player).status_code for player in players]
+
+        self.assertEqual(statuses.count(200), 25)
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.participant_count, 25)
+        self.assertEqual(self.room.status, "full")
+        self.assertEqual(RoomParticipant.objects.filter(room=self.room).count(), 25)
+        # Rejected players keep their money
+        self.assertEqual(Profile.objects.filter(balance=Decimal("90.00")).count(), 25)
+        self.assertEqual(Profile.objects.filter(balance=Decimal("100.00")).count(), 15)
+
+    def test_duplicate_join_is_rolled_back(self):
+        player = make_player("twice")
+        self.assertEqual(self.join(player).status_code, 200)
+        response = self.join(User.objects.get(pk=player.pk))
+
+        self.assertEqual(response.data["error"], "Already joined")
+        self.assertEqual(Profile.objects.get(user=player).balance, Decimal("90.00"))
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.participant_count, 1)
+
+    def test_claim_slots_respects_headroom(self):
+        Room.objects.filter(pk=self.room.pk).update(participant_count=22)
+        self.room.refresh_from_db()
+
+        self.assertFalse(self.room.claim_slots(seats=1, headroom=4))
+        self.assertTrue(self.room.claim_slots(seats=1, headroom=3))
+        self.assertEqual(self.room.participant_count, 23)
+
+
+class AdmissionQueueTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.tournament = Tournament.objects.create(
+            name="Launch Cup", game="bgmi", entry_fee=Decimal("10.00"), max_participants=3, admission_queue=True
+        )
+        self.room = Room.objects.create(tournament=self.tournament)
+
+    def test_join_returns_ticket_and_worker_admits_in_order(self):
+        tickets = []
+        for i in range(5):
+            self.client.force_authenticate(make_player(f"q{i}"))
+            response = self.client.post(f"/tournaments/room/{self.room.id}/join-solo/")
+            self.assertEqual(response.status_code, 202)
+            tickets.append(response.data["ticket_id"])
+        self.assertEqual(RoomParticipant.objects.count(), 0)
+
+        admit_pending_tickets(self.room.id, batch_size=2)
+
+        statuses = [JoinTicket.objects.get(pk=t).status for t in tickets]
+        self.assertEqual(statuses, ["admitted"] * 3 + ["rejected"] * 2)
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.participant_count, 3)
+
+        response = self.client.get(f"/tournaments/join-ticket/{tickets[-1]}/")
+        self.assertEqual(response.data["status"], "rejected")
+        self.assertEqual(response.data["error"], "Tournament is full (Max participants reached)")
+
+    def test_channel_layer_outage_does_not_fail_queued_join(self):
+        self.client.force_authenticate(make_player("q0"))
+        with mock.patch("tournaments.utils.get_channel_layer", side_effect=ConnectionError("redis down")):
+            with self.assertLogs("tournaments.utils", "ERROR"), self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(f"/tournaments/room/{self.room.id}/join-solo/")
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(JoinTicket.objects.get(pk=response.data["ticket_id"]).status, "pending")
+
+
+class TeamInvitationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.tournament = Tournament.objects.create(
+            name="Squad Cup", game="bgmi", team_mode="squad", entry_fee=Decimal("40.00"), max_participants=8
+        )
+        self.room = Room.objects.create(tournament=self.tournament)
+
+    def test_resolve_game_ids_matches_every_column_in_one_query(self):
+        bgmi = make_player("bgmi", bgmi_id="B-1")
+        legacy = make_player("legacy", game_id="L-1")
+        make_player("other_game", freefire_id="B-2")
+
+        with self.assertNumQueries(1):
+            resolved = resolve_game_ids("bgmi", ["B-1", "L-1", "B-2", ""])
+
+        self.assertEqual(resolved, {"B-1": bgmi.id, "L-1": legacy.id, "B-2": None})
+
+    def test_create_team_bulk_creates_invitations(self):
+        leader = make_player("leader")
+        mate = make_player("mate", bgmi_id="B-7")
+        self.client.force_authenticate(leader)
+
+        response = self.client.post(
+            f"/tournaments/room/{self.room.id}/create-team/", {"game_ids": ["B-7", "UNKNOWN"]}, format="json"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["invitations"]), 2)
+        invitations = TeamInvitation.objects.filter(room=self.room)
+        self.assertEqual(invitations.get(invitee_game_id="B-7").invitee, mate)
+        self.assertIsNone(invitations.get(invitee_game_id="UNKNOWN").invitee)
+        self.assertEqual(Profile.objects.get(user=leader).balance, Decimal("60.00"))
+
+    def test_team_seats_are_held_until_teammates_accept(self):
+        leader = make_player("leader")
+        mate = make_player("mate", bgmi_id="B-9")
+        self.client.force_authenticate(leader)
+        self.client.post(f"/tournaments/room/{self.room.id}/create-team/", {"game_ids": ["B-9"]}, format="json")
+
+        # Solo players fill every seat the team didn't reserve
+        for i in range(5):
+            self.client.force_authenticate(make_player(f"solo{i}"))
+            response = self.client.post(f"/tournaments/room/{self.room.id}/join-solo/")
+            self.assertEqual(response.status_code, 200 if i < 4 else 400)
+
+        self.client.force_authenticate(mate)
+        invitation = TeamInvitation.objects.get(invitee=mate)
+        response = self.client.post(f"/tournaments/invitation/{invitation.id}/accept/")
+
+        self.assertEqual(response.status_code, 200)
+        self.room.refresh_from_db()
+        self.assertEqual((self.room.participant_count, self.room.paid_count), (8, 6))
+        self.assertEqual(RoomParticipant.objects.get(room=self.room, user=leader).reserved_seats, 2)
+
+        # The leader leaving releases the seats still held for the team
+        RoomParticipant.objects.get(room=self.room, user=leader).delete()
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.participant_count, 5)
+        call_command("recount_rooms", stdout=StringIO())
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.participant_count, 5)
+
+    def test_channel_layer_outage_does_not_fail_reject(self):
+        leader = make_player("leader")
+        mate = make_player("mate", bgmi_id="B-5")
+        invitation = TeamInvitation.objects.create(room=self.room, inviter=leader, invitee=mate, invitee_game_id="B-5")
+        self.client.force_authenticate(mate)
+
+        with mock.patch("chat.notifications.get_channel_layer", side_effect=ConnectionError("redis down")), \
+                self.assertLogs("chat.notifications", "ERROR"), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f"/tournaments/invitation/{invitation.id}/reject/")
+
+        self.assertEqual(response.status_code, 200)
+        invitation.refresh_from_db()
+        self.assertEqual(invitation.status, "rejected")
+
+    def test_channel_layer_outage_does_not_fail_join(self):
+        self.client.force_authenticate(make_player("solo"))
+        with mock.patch("chat.notifications.get_channel_layer", side_effect=ConnectionError("redis down")), \
+                self.assertLogs("chat.notifications", "ERROR"), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f"/tournaments/room/{self.room.id}/join-solo/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(RoomParticipant.objects.filter(room=self.room).exists())
+
+    def test_invitations_are_pushed_to_invitee(self):
+        leader = make_player("leader")
+        mate = make_player("mate", bgmi_id="B-8")
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)(user_group_name(mate.id), channel)
+
+        self.client.force_authenticate(leader)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/tournaments/room/{self.room.id}/create-team/", {"game_ids": ["B-8"]}, format="json")
+        created = async_to_sync(layer.receive)(channel)
+
+        self.client.force_authenticate(mate)
+        invitation = TeamInvitation.objects.get(invitee=mate)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/tournaments/invitation/{invitation.id}/accept/")
+        updated = async_to_sync(layer.receive)(channel)
+
+        self.assertEqual(created["event"], "invitation_created")
+        self.assertEqual(created["payload"]["id"], str(invitation.id))
+        self.assertEqual(created["payload"]["inviter_username"], "leader")
+        self.assertEqual(updated["event"], "invitation_updated")
+        self.assertEqual(updated["payload"]["status"], "accepted")
+
+
+class InvitationExpiryTests(TestCase):
+    def setUp(self):
+        self.inviter = User.objects.create_user(username="inviter")
+
+    def invite(self, status="open", deadline=None):
+        tournament = Tournament.objects.create(
+            name="Duo Cup", game="bgmi", team_mode="duo", registration_deadline=deadline
+        )
+        room = Room.objects.create(tournament=tournament, status=status)
+        return TeamInvitation.objects.create(room=room, inviter=self.inviter, invitee_game_id="X-1")
+
+    def test_sweeper_expires_only_stale_invitations_in_chunks(self):
+        past = timezone.now() - timedelta(hours=1)
+        stale = [self.invite(status="started"), self.invite(status="completed"), self.invite(deadline=past)]
+        live = self.invite(deadline=timezone.now() + timedelta(hours=1))
+
+        out = StringIO()
+        call_command("expire_invitations", "--chunk-size", "2", stdout=out)
+
+        for invitation in stale:
+            invitation.refresh_from_db()
+            self.assertEqual(invitation.status, "expired")
+        live.refresh_from_db()
+        self.assertEqual(live.status, "pending")
+        self.assertIn("Expired 3 invitations in 2 chunks", out.getvalue())
+
+
+class DeclareResultsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username="admin", is_staff=True)
+        self.client.force_authenticate(self.admin)
+        tournament = Tournament.objects.create(name="Final", game="bgmi", entry_fee=Decimal("10.00"))
+        PrizeDistribution.objects.create(tournament=tournament, rank=1, prize_amount=Decimal("300.00"))
+        PrizeDistribution.objects.create(tournament=tournament, rank=2, prize_amount=Decimal("100.00"))
+        self.room = Room.objects.create(tournament=tournament)
+        self.participants = [
+            RoomParticipant.objects.create(room=self.room, user=User.objects.create_user(username=f"r{i}"), paid=True)
+            for i in range(30)
+        ]
+
+    def declare(self, results):
+        return self.client.post(f"/tournaments/room/{self.room.id}/declare-results/", {"results": results}, format="json")
+
+    def test_whole_sheet_declared_in_constant_queries(self):
+        results = [{"participant_id": str(p.id), "rank": i + 1} for i, p in enumerate(self.participants)]
+        # room, validate, prize table, upsert, close room (+ savepoint pair)
+        with self.assertNumQueries(7):
+            response = self.declare(results)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["declared"], 30)
+        self.assertEqual(set(response.data["timings_ms"]), {"validate", "prizes", "upsert", "total"})
+        self.assertEqual(RoomResult.objects.get(rank=1).prize_amount, Decimal("300.00"))
+        self.assertEqual(RoomResult.objects.get(rank=3).prize_amount, Decimal("0.00"))
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.status, "completed")
+
+        # Re-declaring updates in place
+        self.declare([{"participant_id": str(self.participants[0].id), "rank": 2}])
+        self.assertEqual(RoomResult.objects.get(participant=self.participants[0]).prize_amount, Decimal("100.00"))
+        self.assertEqual(RoomResult.objects.count(), 30)
+
+    def test_unknown_participant_rejects_whole_sheet(self):
+        response = self.declare([
+            {"participant_id": str(self.participants[0].id), "rank": 1},
+            {"participant_id": "00000000-0000-0000-0000-000000000000", "rank": 2},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["participant_ids"], ["00000000-0000-0000-0000-000000000000"])
+        self.assertFalse(RoomResult.objects.exists())
+
+    def test_participant_ids_are_parsed_as_uuids(self):
+        response = self.declare([{"participant_id": "not-a-uuid", "rank": 1}])
+        self.assertEqual(response.status_code, 400)
+
+        response = self.declare([{"participant_id": self.participants[0].id.hex.upper(), "rank": 1}])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(RoomResult.objects.get().participant, self.participants[0])
+
+
+class PayoutTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username="admin", is_staff=True)
+        tournament = Tournament.objects.create(name="Payday", game="bgmi")
+        self.room = Room.objects.create(tournament=tournament)
+        self.winners = []
+        for rank in range(1, 8):
+            user = User.objects.create_user(username=f"w{rank}")
+            participant = RoomParticipant.objects.create(room=self.room, user=user, paid=True)
+            prize = Decimal("50.00") if rank <= 3 else Decimal("0.00")
+            RoomResult.objects.create(room=self.room, participant=participant, rank=rank, prize_amount=prize)
+            self.winners.append(user)
+
+    def test_chunked_payout_credits_once(self):
+        paid, total = pay_out_results(RoomResult.objects.filter(room=self.room), self.admin, chunk_size=2)
+
+        self.assertEqual((paid, total), (7, Decimal("150.00")))
+        balances = [Profile.objects.get(user=u).balance for u in self.winners]
+        self.assertEqual(balances, [Decimal("50.00")] * 3 + [Decimal("0.00")] * 4)
+        self.assertEqual(Transaction.objects.count(), 3)
+        self.assertFalse(RoomResult.objects.filter(payout_status="pending").exists())
+
+        # Re-running is a no-op, so an interrupted run can simply be resumed
+        self.assertEqual(pay_out_results(RoomResult.objects.filter(room=self.room), self.admin), (0, Decimal("0")))
+        self.assertEqual(Profile.objects.get(user=self.winners[0]).balance, Decimal("50.00"))
+
+    def test_approve_payouts_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.post(f"/tournaments/room/{self.room.id}/approve-payouts/")
+
+        self.assertEqual(response.data["message"], "Approved 7 payouts")
+        self.assertEqual(response.data["total_credited"], "150.00")
+
+    def test_admin_action_skips_zero_prizes(self):
+        model_admin = RoomResultAdmin(RoomResult, AdminSite())
+        with mock.patch.object(model_admin, "message_user") as message_user:
+            model_admin.approve_selected_payouts(mock.Mock(user=self.admin), RoomResult.objects.all())
+
+        message_user.assert_called_once_with(mock.ANY, "Successfully approved 3 payouts")
+        self.assertEqual(RoomResult.objects.filter(payout_status="paid").count(), 3)
+        self.assertFalse(RoomResult.objects.filter(prize_amount=0).exclude(payout_status="pending").exists())
+
+
+class PrizeTableTests(TestCase):
+    def rules(self, *specs):
+        return [PrizeDistribution(rank=rank, rank_to=rank_to, prize_type=kind, prize_amount=Decimal(amount),
+                                  percentage=Decimal(pct)) for rank, rank_to, kind, amount, pct in specs]
+
+    def test_fixed_percentage_and_ranges(self):
+        table = PrizeTable(self.rules(
+            (1, None, "percentage", "0", "50.00"),
+            (2, None, "fixed", "100.00", "0"),
+            (3, 5, "fixed", "10.00", "0"),
+        ), total_pool=Decimal("1000.00"))
+
+        self.assertEqual(
+            table.payout_vector([1, 2, 3, 4, 5, 6]),
+            {1: Decimal("500.00"), 2: Decimal("100.00"), 3: Decimal("10.00"), 4: Decimal("10.00"),
+             5: Decimal("10.00"), 6: Decimal("0.00")}
+        )
+        self.assertEqual(table.fixed_total(), Decimal("130.00"))
+
+    def test_ties_share_the_positions_they_occupy(self):
+        table = PrizeTable(self.rules(
+            (1, None, "fixed", "100.00", "0"),
+            (2, None, "fixed", "50.00", "0"),
+            (3, None, "fixed", "0.01", "0"),
+        ))
+
+        # Three players tied for first split 100 + 50 + 0.01, rounded down to paise
+        self.assertEqual(table.payout_vector([1, 1, 1]), {1: Decimal("50.00")})
+        self.assertEqual(table.payout_vector([1, 2, 2]), {1: Decimal("100.00"), 2: Decimal("25.00")})
+
+    def test_dense_ranked_ties_never_pay_more_than_the_table(self):
+        table = PrizeTable(self.rules(
+            (1, None, "fixed", "100.00", "0"),
+            (2, None, "fixed", "50.00", "0"),
+            (3, None, "fixed", "25.00", "0"),
+        ))
+        table_total = Decimal("175.00")
+
+        for ranks in ([1, 1, 2], [1, 1, 3], [1, 2, 2, 3], [1, 1, 1, 2], [2, 2, 2]):
+            payouts = table.payout_vector(ranks)
+            self.assertLessEqual(sum(payouts[rank] for rank in ranks), table_total, ranks)
+        # Dense 1,1,2 is priced like competition ranking 1,1,3
+        self.assertEqual(table.payout_vector([1, 1, 2]), {1: Decimal("75.00"), 2: Decimal("25.00")})
+
+    def test_far_ranks_are_not_materialised(self):
+        table = PrizeTable(self.rules((1, 3, "fixed", "10.00", "0")))
+
+        self.assertEqual(len(table.position_prizes(10 ** 9)), 4)
+        self.assertEqual(
+            table.payout_vector([1, 10 ** 9, 10 ** 9]), {1: Decimal("10.00"), 10 ** 9: Decimal("0.00")}
+        )
+        self.assertEqual(table.amount_for_rank(10 ** 9), Decimal("0.00"))
+
+    def test_inconsistent_rule_tables_are_rejected(self):
+        bad_tables = [
+            [{"rank": 1, "prize_amount": "-5"}],
+            [{"rank": 3, "rank_to": 2, "prize_amount": "5"}],
+            [{"rank": 1, "rank_to": 3, "prize_amount": "5"}, {"rank": 2, "prize_amount": "5"}],
+            [{"rank": 1, "percentage": "60"}, {"rank": 2, "rank_to": 3, "percentage": "25"}],
+            [{"rank": 1, "rank_to": 10 ** 9, "prize_amount": "1"}],
+        ]
+        for distributions in bad_tables:
+            with self.assertRaises(PrizeRulesRejected):
+                build_prize_rules(None, distributions, max_rank=100)
+        self.assertEqual(len(build_prize_rules(None, [{"rank": 1, "percentage": "100"}], max_rank=100)), 1)
+
+    def test_ten_thousand_ranks_in_one_pass(self):
+        table = PrizeTable(self.rules(
+            (1, None, "percentage", "0", "10.00"),
+            (2, 100, "percentage", "0", "0.50"),
+            (101, 10000, "fixed", "1.00", "0"),
+        ), total_pool=Decimal("100000.00"))
+        ranks = list(range(1, 10001)) + [500] * 3  # a few ties thrown in
+
+        started = time.perf_counter()
+        payouts = table.payout_vector(ranks)
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(len(payouts), 10000)
+        self.assertEqual(payouts[1], Decimal("10000.00"))
+        self.assertEqual(payouts[50], Decimal("500.00"))
+        self.assertEqual(payouts[500], Decimal("1.00"))
+        self.assertLess(elapsed, 1.0)
+
+    def test_declare_results_uses_pool_percentages(self):
+        admin = User.objects.create_user(username="admin", is_staff=True)
+        tournament = Tournament.objects.create(name="Pool Cup", game="bgmi", entry_fee=Decimal("25.00"))
+        PrizeDistribution.objects.create(tournament=tournament, rank=1, prize_type="percentage", percentage=Decimal("60"))
+        room = Room.objects.create(tournament=tournament)
+        players = [RoomParticipant.objects.create(room=room, user=User.objects.create_user(username=f"x{i}"), paid=True)
+                   for i in range(4)]
+        room.adjust_counts(participants=4, paid=4)
+
+        client = APIClient()
+        client.force_authenticate(admin)
+        client.post(f"/tournaments/room/{room.id}/declare-results/",
+                    {"results": [{"participant_id": str(p.id), "rank": i + 1} for i, p in enumerate(players)]},
+                    format="json")
+
+        self.assertEqual(RoomResult.objects.get(rank=1).prize_amount, Decimal("60.00"))
+
+    def test_user_tournament_creator_funds_fixed_prizes_only(self):
+        creator = User.objects.create_user(username="creator")
+        Profile.objects.filter(user=creator).update(balance=Decimal("500.00"), game_id_verified=True)
+        client = APIClient()
+        client.force_authenticate(User.objects.get(pk=creator.pk))
+
+        response = client.post("/tournaments/user-create/", {
+            "name": "Community Cup", "game": "bgmi", "entry_fee": "20",
+            "prize_distributions": [{"rank": 1, "prize": 100}, {"rank": 2, "rank_to": 3, "prize": 25},
+                                    {"rank": 4, "percentage": 10}],
+        }, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["breakdown"]["prize_pool"], "150.00")
+        self.assertEqual(Profile.objects.get(user=creator).balance, Decimal("340.00"))
+        self.assertEqual(PrizeDistribution.objects.filter(tournament_id=response.data["tournament_id"]).count(), 3)
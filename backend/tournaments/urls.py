@@ -11,6 +11,7 @@ urlpatterns = [
     path("tournament/<int:tournament_id>/create-room/", views.create_room),
     path("room/<uuid:room_id>/join/", views.join_room),  # Legacy
     path("room/<uuid:room_id>/join-solo/", views.join_room_solo),
+    path("join-ticket/<uuid:ticket_id>/", views.get_join_ticket),
     path("room/<uuid:room_id>/create-team/", views.create_team_and_invite),
     path("room/<uuid:room_id>/verify-payment/", views.verify_payment),
     
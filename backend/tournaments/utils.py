@@ -0,0 +1,412 @@
+import logging
+import time
+import uuid
+from decimal import Decimal
+
+from asgiref.sync import async_to_sync
+from channels.exceptions import ChannelFull
+from channels.layers import get_channel_layer
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from wallet import ledger
+from wallet.models import GameIdentity
+from .models import Room, RoomParticipant, JoinTicket, TeamInvitation, PrizeDistribution, RoomResult
+from .prizes import PrizeTable
+
+logger = logging.getLogger(__name__)
+
+# Channel consumed by JoinAdmissionConsumer (python manage.py runworker join-admissions)
+ADMISSION_CHANNEL = "join-admissions"
+ADMISSION_BATCH_SIZE = 100
+
+
+class EntryRejected(Exception):
+    """Raised inside reserve_entry to roll back the join and report why"""
+
+    def __init__(self, payload):
+        super().__init__(payload.get("error"))
+        self.payload = payload
+
+
+def reserve_entry(room, user, fee, note, seats=1, **participant_fields):
+    """Debit the fee, insert the participant and claim its seats in one short transaction.
+
+    Every guard is enforced by the database (unique participant, conditional
+    balance debit, conditional seat claim), so concurrent joins can neither
+    overfill the tournament nor overdraw the wallet.  The hot room row is
+    touched last to keep its lock window as small as possible.  A team
+    leader claims ``seats`` for the whole team; the extra ones are held on
+    its row (``reserved_seats``) until teammates accept.
+    """
+    profile = user.profile
+    with transaction.atomic():
+        try:
+            participant = RoomParticipant.objects.create(
+                room=room, user=user, paid=True, reserved_seats=seats - 1, **participant_fields
+            )
+        except IntegrityError:
+            raise EntryRejected({"error": "Already joined"})
+
+        try:
+            ledger.debit(profile.pk, fee, note)
+        except ledger.InsufficientBalance:
+            raise EntryRejected({"error": "Insufficient balance", "required": str(fee)})
+
+        if not room.claim_slots(seats=seats, paid=1):
+            raise EntryRejected({"error": "Tournament is full (Max participants reached)"})
+
+    room.mark_full_if_needed()
+    return participant
+
+
+def take_reserved_seat(room, leader):
+    """Hand one of a team leader's reserved seats to a teammate; False if none are left"""
+    taken = RoomParticipant.objects.filter(room=room, user=leader, reserved_seats__gt=0).update(
+        reserved_seats=F("reserved_seats") - 1
+    )
+    if taken:
+        room.adjust_counts(paid=1)
+    return bool(taken)
+
+
+def solo_entry_fee(tournament):
+    """Per-player share of the entry fee based on team mode"""
+    return tournament.entry_fee / tournament.get_team_size()
+
+
+def join_solo(room, user):
+    tournament = room.tournament
+    payment_share = solo_entry_fee(tournament)
+    return reserve_entry(
+        room,
+        user,
+        payment_share,
+        note=f"Entry fee for {tournament.name} ({tournament.team_mode})",
+        is_team_leader=True,
+        payment_share=payment_share
+    )
+
+
+# ============= TEAM INVITATIONS =============
+
+def resolve_game_ids(game, game_ids):
+    """Map invited game IDs to user ids in one indexed GameIdentity query.
+
+    Matches the game's own IDs as well as legacy ``game_id`` values;
+    the game-specific identity wins when both match.
+    """
+    game_ids = [gid for gid in game_ids if gid]
+    if not game_ids:
+        return {}
+
+    legacy, specific = {}, {}
+    rows = GameIdentity.objects.filter(
+        game__in=[game, GameIdentity.LEGACY], external_id__in=game_ids
+    ).values_list("game", "external_id", "profile__user_id")
+    for row_game, external_id, user_id in rows:
+        (legacy if row_game == GameIdentity.LEGACY else specific)[external_id] = user_id
+    return {gid: specific.get(gid, legacy.get(gid)) for gid in game_ids}
+
+
+def create_invitations(room, inviter, game_ids, resolved):
+    """Write all invitations for a team with a single INSERT.
+
+    Invitees that are already known get the invitation pushed once the
+    surrounding transaction commits.
+    """
+    invitations = TeamInvitation.objects.bulk_create([
+        TeamInvitation(room=room, inviter=inviter, invitee_game_id=gid, invitee_id=resolved.get(gid))
+        for gid in game_ids if gid
+    ])
+    transaction.on_commit(lambda: push_invitations(invitations))
+    return invitations
+
+
+def invitation_payload(invitation):
+    """Serialized pending invitation as shown in My Invitations"""
+    tournament = invitation.room.tournament
+    return {
+        'id': str(invitation.id),
+        'tournament_name': tournament.name,
+        'tournament_game': tournament.game,
+        'team_mode': tournament.team_mode,
+        'inviter_username': invitation.inviter.username,
+        'payment_share': str(tournament.entry_fee / tournament.get_team_size()),
+        'created_at': invitation.created_at,
+        'room_id': str(invitation.room_id)
+    }
+
+
+def push_invitations(invitations):
+    from chat.notifications import notify_user
+
+    for invitation in invitations:
+        if invitation.invitee_id:
+            payload = invitation_payload(invitation)
+            payload["created_at"] = invitation.created_at.isoformat()
+            notify_user(invitation.invitee_id, "invitation_created", payload)
+
+
+def push_invitation_status(invitation):
+    """Tell the inviter and the invitee that an invitation changed state"""
+    from chat.notifications import notify_user
+
+    payload = {"id": str(invitation.id), "status": invitation.status, "room_id": str(invitation.room_id)}
+    for user_id in {invitation.inviter_id, invitation.invitee_id} - {None}:
+        notify_user(user_id, "invitation_updated", payload)
+
+
+def expire_stale_invitations(chunk_size=1000, now=None):
+    """Expire pending invitations whose room can no longer be joined.
+
+    Works in chunks of ``chunk_size`` rows, oldest first, so each UPDATE
+    stays short. Returns ``(expired, chunks)``.
+    """
+    now = now or timezone.now()
+    stale = TeamInvitation.objects.filter(status="pending").filter(
+        Q(room__status__in=["started", "completed", "cancelled"]) |
+        Q(room__tournament__registration_deadline__lt=now)
+    ).order_by("created_at")
+
+    expired = chunks = 0
+    while True:
+        ids = list(stale.values_list("id", flat=True)[:chunk_size])
+        if not ids:
+            break
+        expired += TeamInvitation.objects.filter(pk__in=ids, status="pending").update(status="expired")
+        chunks += 1
+    return expired, chunks
+
+
+# ============= PRIZES =============
+
+class PrizeRulesRejected(Exception):
+    """Raised by build_prize_rules when the rule table is inconsistent"""
+
+    def __init__(self, payload):
+        super().__init__(payload.get("error"))
+        self.payload = payload
+
+
+def validate_prize_rules(rules, max_rank):
+    """Reject negative prizes, inverted or overlapping ranges and more than 100% of the pool"""
+    percent_total = Decimal("0")
+    covered_to = 0
+    for rule in sorted(rules, key=lambda rule: rule.rank):
+        if rule.rank < 1 or (rule.rank_to is not None and rule.rank_to < rule.rank):
+            raise PrizeRulesRejected({"error": f"Invalid rank range starting at {rule.rank}"})
+        if max_rank is not None and rule.last_rank > max_rank:
+            raise PrizeRulesRejected({"error": f"Rank {rule.last_rank} is beyond the {max_rank} participants"})
+        if rule.rank <= covered_to:
+            raise PrizeRulesRejected({"error": f"Rank {rule.rank} is covered by more than one rule"})
+        if rule.prize_amount < 0 or rule.percentage < 0:
+            raise PrizeRulesRejected({"error": f"Negative prize for rank {rule.rank}"})
+        covered_to = rule.last_rank
+        percent_total += rule.percentage * (rule.last_rank - rule.rank + 1)
+    if percent_total > 100:
+        raise PrizeRulesRejected({"error": f"Percentage prizes add up to {percent_total}% of the pool"})
+
+
+def build_prize_rules(tournament, distributions, max_rank=None):
+    """Unsaved, validated PrizeDistribution rows from request data.
+
+    Accepts ``prize_amount`` (admin form) or ``prize`` (user-created
+    tournaments), plus optional ``rank_to`` and ``percentage``.  Raises
+    ValueError-family errors for malformed rows and PrizeRulesRejected for
+    an inconsistent table; ``max_rank`` caps ranges (the participant limit).
+    """
+    rules = []
+    for dist in distributions:
+        percentage = Decimal(str(dist.get('percentage') or 0))
+        rules.append(PrizeDistribution(
+            tournament=tournament,
+            rank=int(dist['rank']),
+            rank_to=int(dist['rank_to']) if dist.get('rank_to') else None,
+            prize_type="percentage" if percentage else "fixed",
+            prize_amount=Decimal(str(dist.get('prize_amount', dist.get('prize', 0)) or 0)),
+            percentage=percentage,
+        ))
+    validate_prize_rules(rules, max_rank)
+    return rules
+
+
+# ============= RESULTS =============
+
+class ResultsRejected(Exception):
+    """Raised by declare_room_results when the result sheet is invalid"""
+
+    def __init__(self, payload):
+        super().__init__(payload.get("error"))
+        self.payload = payload
+
+
+def declare_room_results(room, results_data):
+    """Validate, price and upsert a whole result sheet in one atomic batch.
+
+    Returns ``(declared, timings)`` where ``timings`` holds the per-phase
+    wall time in milliseconds.
+    """
+    timings = {}
+    started = phase_start = time.perf_counter()
+
+    def lap(name):
+        nonlocal phase_start
+        now = time.perf_counter()
+        timings[name] = round((now - phase_start) * 1000, 2)
+        phase_start = now
+
+    # 1. Validate every participant ID with a single query
+    try:
+        ranks = {uuid.UUID(str(row["participant_id"])): int(row["rank"]) for row in results_data}
+    except (KeyError, TypeError, ValueError):
+        raise ResultsRejected({"error": "Each result needs a participant_id (UUID) and an integer rank"})
+    if any(rank < 1 for rank in ranks.values()):
+        raise ResultsRejected({"error": "Ranks start at 1"})
+    known = set(RoomParticipant.objects.filter(room=room, pk__in=list(ranks)).values_list("pk", flat=True))
+    unknown = sorted(str(pk) for pk in set(ranks) - known)
+    if unknown:
+        raise ResultsRejected({"error": "Unknown participants for this room", "participant_ids": unknown})
+    lap("validate")
+
+    # 2. Map ranks to prizes from a single prize-table read (ties split the prizes)
+    payouts = PrizeTable.load(room.tournament, room.total_prize_pool()).payout_vector(ranks.values())
+    rows = [
+        RoomResult(room=room, participant_id=pk, rank=rank, prize_amount=payouts[rank])
+        for pk, rank in ranks.items()
+    ]
+    lap("prizes")
+
+    # 3. Upsert all results and close the room atomically
+    with transaction.atomic():
+        RoomResult.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["room", "participant"],
+            update_fields=["rank", "prize_amount"],
+        )
+        room.status = "completed"
+        room.save(update_fields=["status"])
+    lap("upsert")
+
+    timings["total"] = round((time.perf_counter() - started) * 1000, 2)
+    return len(rows), timings
+
+
+# ============= PAYOUTS =============
+
+PAYOUT_CHUNK_SIZE = 500
+
+
+def pay_out_results(results, approver, chunk_size=PAYOUT_CHUNK_SIZE):
+    """Credit and mark paid every pending result in ``results``, chunk by chunk.
+
+    Each chunk is its own short transaction: wallets are credited through
+    ``ledger.credit_many`` (one F() UPDATE per distinct credited total, one
+    bulk INSERT of ledger rows) and the results are flipped to paid with one
+    UPDATE.
+    A failed chunk rolls back alone; calling again resumes with the rows
+    that are still pending. Returns ``(paid, total_credited)``.
+    """
+    pending = results.filter(payout_status="pending").order_by("rank", "pk")
+    paid, total_credited = 0, Decimal("0")
+
+    while True:
+        with transaction.atomic():
+            chunk = list(pending.select_for_update(of=("self",)).values_list(
+                "pk", "rank", "prize_amount", "participant__user__profile__id", "room__tournament__name"
+            )[:chunk_size])
+            if not chunk:
+                break
+
+            entries = [
+                (profile_id, amount, f"Prize for Rank {rank} in {tournament_name}")
+                for _, rank, amount, profile_id, tournament_name in chunk
+                if amount > 0
+            ]
+            ledger.credit_many(entries)
+
+            RoomResult.objects.filter(pk__in=[row[0] for row in chunk], payout_status="pending").update(
+                payout_status="paid", approved_by=approver, approved_at=timezone.now()
+            )
+
+        paid += len(chunk)
+        total_credited += sum(amount for _, amount, _ in entries)
+    return paid, total_credited
+
+
+# ============= ADMISSION QUEUE =============
+
+def kick_admissions(room_id):
+    """Ask the admission worker to drain a room's pending tickets, once committed.
+
+    Best-effort: the ticket is already stored, so a channel layer outage is
+    logged instead of failing the join (the next kick picks it up).
+    """
+    def kick():
+        try:
+            async_to_sync(get_channel_layer().send)(
+                ADMISSION_CHANNEL, {"type": "admit.batch", "room_id": str(room_id)}
+            )
+        except ChannelFull:
+            # A kick is already queued, it will pick this ticket up too
+            pass
+        except Exception:
+            logger.exception("Could not kick admissions for room %s", room_id)
+
+    transaction.on_commit(kick)
+
+
+def admit_pending_tickets(room_id, batch_size=ADMISSION_BATCH_SIZE):
+    """Admit pending tickets for a room in arrival order, one batch at a time.
+
+    Returns the processed tickets. Once the room fills up, every remaining
+    pending ticket is rejected with a single UPDATE.
+    """
+    from chat.notifications import notify_user
+
+    room = Room.objects.select_related("tournament").get(pk=room_id)
+    processed = []
+
+    while True:
+        with transaction.atomic():
+            batch = list(
+                JoinTicket.objects.select_for_update(skip_locked=True)
+                .filter(room=room, status="pending")
+                .select_related("user__profile")
+                .order_by("created_at")[:batch_size]
+            )
+            for ticket in batch:
+                try:
+                    join_solo(room, ticket.user)
+                    ticket.status, ticket.error = "admitted", ""
+                except EntryRejected as e:
+                    ticket.status, ticket.error = "rejected", e.payload["error"]
+                ticket.processed_at = timezone.now()
+                processed.append(ticket)
+                if room.participant_count >= room.tournament.max_participants:
+                    break
+            JoinTicket.objects.bulk_update(
+                [t for t in batch if t.processed_at], ["status", "error", "processed_at"]
+            )
+
+            full = room.participant_count >= room.tournament.max_participants
+            if full:
+                pending = JoinTicket.objects.filter(room=room, status="pending")
+                leftovers = list(pending.only("id", "room_id", "user_id", "created_at"))
+                error, now = "Tournament is full (Max participants reached)", timezone.now()
+                pending.update(status="rejected", error=error, processed_at=now)
+                for ticket in leftovers:
+                    ticket.status, ticket.error, ticket.processed_at = "rejected", error, now
+                processed.extend(leftovers)
+
+        if full or len(batch) < batch_size:
+            break
+
+    def push_tickets():
+        for ticket in processed:
+            notify_user(ticket.user_id, "join_ticket", ticket.as_payload())
+
+    transaction.on_commit(push_tickets)
+    return processed
@@ -8,10 +8,18 @@ from rest_framework.response import Response
 from rest_framework import status as http_status
 
 from payments.utils import create_razorpay_order, verify_signature
-from wallet.models import Transaction, Profile
-from .models import Tournament, Room, RoomParticipant, PrizeDistribution, RoomResult, TeamInvitation
+from wallet import ledger
+from wallet.models import Profile
+from .models import Tournament, Room, RoomParticipant, PrizeDistribution, RoomResult, TeamInvitation, JoinTicket
 from .serializers import RoomSerializer, TournamentSerializer, PrizeDistributionSerializer, RoomResultSerializer, TournamentParticipantSerializer
+from .utils import (
+    EntryRejected, reserve_entry, take_reserved_seat, solo_entry_fee, join_solo, kick_admissions,
+    resolve_game_ids, create_invitations, invitation_payload, push_invitation_status,
+    ResultsRejected, declare_room_results, pay_out_results, PrizeRulesRejected, build_prize_rules
+)
+from .prizes import PrizeTable
 from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 
 
@@ -40,22 +48,15 @@ def join_room_solo(request, room_id):
     if not request.user.profile.game_id_verified:
         return Response({"error": "Game ID not verified"}, status=400)
     
-    room = get_object_or_404(Room, pk=room_id)
-    
-    # Check if already joined
-    if RoomParticipant.objects.filter(room=room, user=request.user).exists():
-        return Response({"error": "Already joined"}, status=400)
+    room = get_object_or_404(Room.objects.select_related("tournament"), pk=room_id)
     
-    # Check tournament capacity
+    # Fast-path capacity check, reserve_entry enforces it atomically
     tournament = room.tournament
-    total_participants = RoomParticipant.objects.filter(room__tournament=tournament).count()
-    if total_participants >= tournament.max_participants:
+    if room.participant_count >= tournament.max_participants:
         return Response({"error": "Tournament is full (Max participants reached)"}, status=400)
     
     # Get payment amount based on team mode
-    tournament = room.tournament
-    team_size = tournament.get_team_size()
-    payment_share = tournament.entry_fee / team_size
+    payment_share = solo_entry_fee(tournament)
     
     profile = request.user.profile
     
@@ -67,33 +68,38 @@ def join_room_solo(request, room_id):
             "balance": str(profile.balance)
         }, status=400)
     
-    # Deduct and create participant
-    profile.balance -= payment_share
-    profile.save()
-    
-    Transaction.objects.create(
-        profile=profile,
-        tx_type="debit",
-        amount=payment_share,
-        note=f"Entry fee for {tournament.name} ({tournament.team_mode})"
-    )
-    
-    RoomParticipant.objects.create(
-        room=room,
-        user=request.user,
-        paid=True,
-        is_team_leader=True,
-        payment_share=payment_share
-    )
+    # Hot tournaments hand the join to the admission worker and answer at once
+    if tournament.admission_queue:
+        ticket, created = JoinTicket.objects.get_or_create(room=room, user=request.user)
+        if not created and ticket.status == "rejected":
+            # Retry goes to the back of the queue
+            ticket.status, ticket.error, ticket.processed_at = "pending", "", None
+            ticket.created_at = timezone.now()
+            ticket.save(update_fields=["status", "error", "processed_at", "created_at"])
+        if ticket.status == "pending":
+            kick_admissions(room.id)
+        return Response({
+            "message": "Join request queued",
+            "ticket_id": str(ticket.id),
+            "status": ticket.status
+        }, status=202)
     
-    # Check if tournament is completely full
-    if room.current_count() >= tournament.max_participants:
-        room.status = "full"
-        room.save()
+    try:
+        join_solo(room, request.user)
+    except EntryRejected as e:
+        return Response(e.payload, status=400)
     
     return Response({"message": "Joined successfully", "payment": str(payment_share)})
 
 
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def get_join_ticket(request, ticket_id):
+    """Poll the outcome of a queued join request"""
+    ticket = get_object_or_404(JoinTicket, pk=ticket_id, user=request.user)
+    return Response(ticket.as_payload())
+
+
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def create_team_and_invite(request, room_id):
@@ -101,20 +107,15 @@ def create_team_and_invite(request, room_id):
     if not request.user.profile.game_id_verified:
         return Response({"error": "Game ID not verified"}, status=400)
     
-    room = get_object_or_404(Room, pk=room_id)
+    room = get_object_or_404(Room.objects.select_related("tournament"), pk=room_id)
     tournament = room.tournament
     team_size = tournament.get_team_size()
     
     if team_size == 1:
         return Response({"error": "This is a solo tournament"}, status=400)
     
-    # Check if already joined
-    if RoomParticipant.objects.filter(room=room, user=request.user).exists():
-        return Response({"error": "Already joined"}, status=400)
-    
-    # Check tournament capacity
-    total_participants = RoomParticipant.objects.filter(room__tournament=tournament).count()
-    if total_participants + team_size > tournament.max_participants:
+    # Fast-path capacity check, reserve_entry enforces it atomically
+    if room.participant_count + team_size > tournament.max_participants:
         return Response({"error": "Tournament is full (Not enough slots for team)"}, status=400)
     
     # Get invited game IDs
@@ -138,49 +139,31 @@ def create_team_and_invite(request, room_id):
             "your_balance": str(profile.balance)
         }, status=400)
     
-    # Deduct full team fee from leader's wallet
+    # Resolve invitees before opening the transaction to keep it short
+    resolved = resolve_game_ids(tournament.game, game_ids)
+    
+    # Deduct full team fee from leader's wallet and claim every seat of the team,
+    # so teammates can't be squeezed out before they accept
     with transaction.atomic():
-        profile.balance -= full_team_fee
-        profile.save()
-        
-        # Record transaction
-        Transaction.objects.create(
-            profile=profile,
-            tx_type="debit",
-            amount=full_team_fee,
-            note=f"Full team entry fee for {tournament.name} ({tournament.team_mode})"
-        )
-        
-        # Create team leader participant (already paid)
-        leader_participant = RoomParticipant.objects.create(
-            room=room,
-            user=request.user,
-            paid=True,
-            is_team_leader=True,
-            payment_share=full_team_fee  # Leader paid for everyone
-        )
+        try:
+            reserve_entry(
+                room,
+                request.user,
+                full_team_fee,
+                note=f"Full team entry fee for {tournament.name} ({tournament.team_mode})",
+                seats=team_size,
+                is_team_leader=True,
+                payment_share=full_team_fee  # Leader paid for everyone
+            )
+        except EntryRejected as e:
+            return Response(e.payload, status=400)
     
         # Create invitations
-        invitations = []
-        for game_id in game_ids:
-            # Try to find user by game_id
-            try:
-                invitee_profile = Profile.objects.get(game_id=game_id)
-                invitee_user = invitee_profile.user
-            except Profile.DoesNotExist:
-                invitee_user = None
-            
-            invitation = TeamInvitation.objects.create(
-                room=room,
-                inviter=request.user,
-                invitee_game_id=game_id,
-                invitee=invitee_user
-            )
-            invitations.append({
-                'id': str(invitation.id),
-                'game_id': game_id,
-                'status': invitation.status
-            })
+        invitations = [{
+            'id': str(invitation.id),
+            'game_id': invitation.invitee_game_id,
+            'status': invitation.status
+        } for invitation in create_invitations(room, request.user, game_ids, resolved)]
     
     return Response({
         "message": f"Team created! You paid ₹{full_team_fee} for the entire team",
@@ -193,28 +176,14 @@ def create_team_and_invite(request, room_id):
 @permission_classes([IsAuthenticated])
 def my_invitations(request):
     """Get all pending invitations for current user"""
-    user_game_id = request.user.profile.game_id
+    user_game_ids = [gid for _, gid in request.user.profile.game_identity_pairs()]
     
     invitations = TeamInvitation.objects.filter(
-        invitee_game_id=user_game_id,
+        Q(invitee=request.user) | Q(invitee__isnull=True, invitee_game_id__in=user_game_ids),
         status='pending'
     ).select_related('room', 'room__tournament', 'inviter')
     
-    data = []
-    for inv in invitations:
-        tournament = inv.room.tournament
-        payment_share = tournament.entry_fee / tournament.get_team_size()
-        
-        data.append({
-            'id': str(inv.id),
-            'tournament_name': tournament.name,
-            'tournament_game': tournament.game,
-            'team_mode': tournament.team_mode,
-            'inviter_username': inv.inviter.username,
-            'payment_share': str(payment_share),
-            'created_at': inv.created_at,
-            'room_id': str(inv.room.id)
-        })
+    data = [invitation_payload(inv) for inv in invitations]
     
     return Response({'invitations': data})
 
@@ -231,13 +200,12 @@ def accept_invitation(request, invitation_id):
         
         # Check if invitation is for the current user by matching game IDs
         profile = request.user.profile
-        user_game_ids = [profile.bgmi_id, profile.freefire_id, profile.fifa_id, profile.game_id]
         
-        if invitation.invitee_game_id not in user_game_ids:
+        if not invitation.is_for(request.user):
             return Response({
                 "error": "This invitation is not for you",
                 "invited_game_id": invitation.invitee_game_id,
-                "your_game_ids": [gid for gid in user_game_ids if gid]
+                "your_game_ids": [gid for _, gid in profile.game_identity_pairs()]
             }, status=403)
         
         room = invitation.room
@@ -260,6 +228,7 @@ def accept_invitation(request, invitation_id):
                 invitation.status = 'accepted'
                 invitation.invitee = request.user
                 invitation.save()
+                transaction.on_commit(lambda: push_invitation_status(invitation))
                 
                 return Response({
                     "message": "You are already part of this team",
@@ -277,20 +246,24 @@ def accept_invitation(request, invitation_id):
                 team_leader=team_leader,
                 payment_share=0  # Teammate didn't pay
             )
+            # Use the seat the leader reserved; invitations from before seats
+            # were reserved still have to claim one
+            if not take_reserved_seat(room, team_leader) and not room.claim_slots(seats=1, paid=1):
+                transaction.set_rollback(True)
+                return Response({"error": "Tournament is full (Max participants reached)"}, status=400)
             
             # Update invitation
             invitation.status = 'accepted'
             invitation.invitee = request.user
             invitation.save()
+            transaction.on_commit(lambda: push_invitation_status(invitation))
             
             # Check if team is complete
             current_count = room.current_count()
             team_complete = current_count == team_size
             
-            # If team is full, mark room as full
-            if room.current_count() >= tournament.max_participants:
-                room.status = "full"
-                room.save()
+            # If tournament is full, mark room as full
+            room.mark_full_if_needed()
         
         
         # Get leader's game ID for display
@@ -324,11 +297,13 @@ def reject_invitation(request, invitation_id):
     if invitation.status != 'pending':
         return Response({"error": "Invitation already processed"}, status=400)
     
-    if invitation.invitee_game_id != request.user.profile.game_id:
+    if not invitation.is_for(request.user):
         return Response({"error": "This invitation is not for you"}, status=403)
     
     invitation.status = 'rejected'
+    invitation.invitee = request.user
     invitation.save()
+    transaction.on_commit(lambda: push_invitation_status(invitation))
     
     return Response({"message": "Invitation rejected"})
 
@@ -353,13 +328,16 @@ def verify_payment(request, room_id):
         return Response({"error": "Invalid signature"}, status=400)
     
     rp = get_object_or_404(RoomParticipant, razorpay_order_id=razorpay_order_id)
+    was_paid = rp.paid
     rp.razorpay_payment_id = razorpay_payment_id
     rp.paid = True
     rp.save()
+    if not was_paid:
+        rp.room.adjust_counts(paid=1)
     
     if rp.room.current_count() >= rp.room.tournament.get_team_size():
         rp.room.status = "full"
-        rp.room.save()
+        rp.room.save(update_fields=["status"])
     
     return Response({"message": "Payment verified & accepted"})
 
@@ -394,6 +372,16 @@ class TournamentViewSet(viewsets.ModelViewSet):
     serializer_class = TournamentSerializer
     permission_classes = []  # Allow anyone to view tournaments
 
+    def get_queryset(self):
+        # Build the whole listing payload in a constant number of queries:
+        # creator/room/owner are joined (room carries its own counters)
+        # and prizes are prefetched.
+        return Tournament.objects.select_related(
+            "created_by", "room", "room__owner"
+        ).prefetch_related(
+            "prize_distributions"
+        ).order_by("pk")
+
 
 @api_view(["POST"])
 @permission_classes([IsAdminUser])  
@@ -418,16 +406,17 @@ def set_prize_distribution(request, tournament_id):
     tournament = get_object_or_404(Tournament, pk=tournament_id)
     distributions = request.data.get('distributions', [])
     
-    # Delete existing distributions
-    PrizeDistribution.objects.filter(tournament=tournament).delete()
+    try:
+        rules = build_prize_rules(tournament, distributions, max_rank=tournament.max_participants)
+    except PrizeRulesRejected as e:
+        return Response(e.payload, status=400)
+    except (KeyError, TypeError, ValueError, ArithmeticError):
+        return Response({"error": "Each distribution needs a rank and a prize_amount or percentage"}, status=400)
     
-    # Create new distributions
-    for dist in distributions:
-        PrizeDistribution.objects.create(
-            tournament=tournament,
-            rank=dist['rank'],
-            prize_amount=dist['prize_amount']
-        )
+    # Replace existing distributions
+    with transaction.atomic():
+        PrizeDistribution.objects.filter(tournament=tournament).delete()
+        PrizeDistribution.objects.bulk_create(rules)
     
     return Response({"message": "Prize distribution set successfully"})
 
@@ -458,37 +447,19 @@ def get_tournament_participants(request, tournament_id):
 @permission_classes([IsAdminUser])
 def declare_results(request, room_id):
     """Declare results for a room"""
-    room = get_object_or_404(Room, pk=room_id)
+    room = get_object_or_404(Room.objects.select_related("tournament"), pk=room_id)
     results_data = request.data.get('results', [])
     
-    for result in results_data:
-        participant = get_object_or_404(RoomParticipant, pk=result['participant_id'])
-        rank = result['rank']
-        
-        # Calculate prize amount
-        prize_dist = PrizeDistribution.objects.filter(
-            tournament=room.tournament,
-            rank=rank
-        ).first()
-        
-        if prize_dist:
-            prize_amount = prize_dist.calculate_prize_amount(room.total_prize_pool())
-        else:
-            prize_amount = 0
-        
-        RoomResult.objects.update_or_create(
-            room=room,
-            participant=participant,
-            defaults={
-                'rank': rank,
-                'prize_amount': prize_amount
-            }
-        )
-    
-    room.status = "completed"
-    room.save()
+    try:
+        declared, timings = declare_room_results(room, results_data)
+    except ResultsRejected as e:
+        return Response(e.payload, status=400)
     
-    return Response({"message": "Results declared successfully"})
+    return Response({
+        "message": "Results declared successfully",
+        "declared": declared,
+        "timings_ms": timings
+    })
 
 
 @api_view(["GET"])
@@ -507,34 +478,10 @@ def get_results(request, room_id):
 @permission_classes([IsAdminUser])
 def approve_payouts(request, room_id):
     """Approve all pending payouts for a room"""
-    from django.db import transaction
-    from django.utils import timezone
-    
     room = get_object_or_404(Room, pk=room_id)
-    pending_results = RoomResult.objects.filter(room=room, payout_status='pending')
-    
-    with transaction.atomic():
-        for result in pending_results:
-            # Credit winner's wallet
-            profile = result.participant.user.profile
-            profile.balance += result.prize_amount
-            profile.save()
-            
-            # Create transaction record
-            Transaction.objects.create(
-                profile=profile,
-                tx_type='credit',
-                amount=result.prize_amount,
-                note=f'Prize for Rank {result.rank} in {room.tournament.name}'
-            )
-            
-            # Update payout status
-            result.payout_status = 'paid'
-            result.approved_by = request.user
-            result.approved_at = timezone.now()
-            result.save()
+    paid, total = pay_out_results(RoomResult.objects.filter(room=room), request.user)
     
-    return Response({"message": f"Approved {pending_results.count()} payouts"})
+    return Response({"message": f"Approved {paid} payouts", "total_credited": str(total)})
 
 
 @api_view(["GET"])
@@ -629,18 +576,8 @@ def add_single_winner(request, room_id):
             }
         )
         
-        # 2. Credit wallet
-        profile = participant.user.profile
-        profile.balance += prize_amount
-        profile.save()
-        
-        # 3. Create transaction
-        Transaction.objects.create(
-            profile=profile,
-            tx_type='credit',
-            amount=prize_amount,
-            note=f'Winner Rank {rank} in {room.tournament.name}'
-        )
+        # 2. Credit wallet and record the transaction
+        ledger.credit(participant.user.profile.pk, prize_amount, f'Winner Rank {rank} in {room.tournament.name}')
     
     return Response({"message": f"Winner added! ₹{prize_amount} added to {participant.user.username}'s wallet."})
 
@@ -667,10 +604,15 @@ def create_user_tournament(request):
     # Calculate total costs
     creation_fee = Decimal("10.00")
     
-    # Calculate total prize money
-    total_prize_money = Decimal("0.00")
-    for dist in prize_distributions:
-        total_prize_money += Decimal(str(dist.get('prize', 0)))
+    # Calculate total prize money (creator funds the fixed prizes,
+    # percentage prizes come out of the entry-fee pool)
+    try:
+        prize_rules = build_prize_rules(None, prize_distributions, max_rank=max_participants)
+    except PrizeRulesRejected as e:
+        return Response(e.payload, status=400)
+    except (KeyError, TypeError, ValueError, ArithmeticError):
+        return Response({"error": "Each prize needs a rank and a prize or percentage"}, status=400)
+    total_prize_money = PrizeTable(prize_rules).fixed_total()
     
     # Total amount to deduct = creation fee + prize pool
     total_deduction = creation_fee + total_prize_money
@@ -681,27 +623,18 @@ def create_user_tournament(request):
             "error": f"Insufficient balance. Required: ₹{total_deduction} (₹{creation_fee} creation fee + ₹{total_prize_money} prize pool). Your balance: ₹{profile.balance}"
         }, status=400)
 
-    with transaction.atomic():
-        # 1. Deduct creation fee + prize money
-        profile.balance -= total_deduction
-        profile.save()
-
-        # 2. Record transaction for creation fee
-        Transaction.objects.create(
-            profile=profile,
-            tx_type="debit",
-            amount=creation_fee,
-            note=f"Tournament Creation Fee: {name}"
-        )
+    teammate_ids = data.get('teammate_ids', [])
+    resolved = resolve_game_ids(game, teammate_ids)
 
-        # 3. Record transaction for prize pool
-        if total_prize_money > 0:
-            Transaction.objects.create(
-                profile=profile,
-                tx_type="debit",
-                amount=total_prize_money,
-                note=f"Tournament Prize Pool: {name}"
-            )
+    with transaction.atomic():
+        # 1-2. Deduct creation fee + prize money, one ledger row each
+        try:
+            with transaction.atomic():
+                ledger.debit(profile.pk, creation_fee, f"Tournament Creation Fee: {name}")
+                if total_prize_money > 0:
+                    ledger.debit(profile.pk, total_prize_money, f"Tournament Prize Pool: {name}")
+        except ledger.InsufficientBalance:
+            return Response({"error": f"Insufficient balance. Required: ₹{total_deduction}"}, status=400)
 
         # 3. Create Tournament
         tournament = Tournament.objects.create(
@@ -716,12 +649,9 @@ def create_user_tournament(request):
         )
 
         # 4. Create Prize Distributions
-        for dist in prize_distributions:
-            PrizeDistribution.objects.create(
-                tournament=tournament,
-                rank=dist['rank'],
-                prize_amount=Decimal(str(dist['prize']))
-            )
+        for rule in prize_rules:
+            rule.tournament = tournament
+        PrizeDistribution.objects.bulk_create(prize_rules)
 
         # 5. Create associated Room
         room = Room.objects.create(tournament=tournament, owner=request.user)
@@ -734,24 +664,10 @@ def create_user_tournament(request):
             is_team_leader=True,
             payment_share=0 # Fee was already paid as creation fee
         )
+        room.adjust_counts(participants=1, paid=1)
 
         # 7. Create Invitations if teammate_ids provided
-        teammate_ids = data.get('teammate_ids', [])
-        for tid in teammate_ids:
-            if tid:
-                # Find invitee if they exist
-                try:
-                    invitee_profile = Profile.objects.get(game_id=tid)
-                    invitee_user = invitee_profile.user
-                except Profile.DoesNotExist:
-                    invitee_user = None
-                
-                TeamInvitation.objects.create(
-                    room=room,
-                    inviter=request.user,
-                    invitee_game_id=tid,
-                    invitee=invitee_user
-                )
+        create_invitations(room, request.user, teammate_ids, resolved)
 
     return Response({
         "message": "Tournament created successfully!",
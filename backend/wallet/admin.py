@@ -1,9 +1,13 @@
 from django.contrib import admin
-from .models import Profile, Transaction, Withdrawal, SiteConfiguration
+from .models import Profile, GameIdentity, VerificationRequest, Transaction, WalletCheckpoint, Withdrawal, WithdrawalBatch, SiteConfiguration
 
 # Register your models here.
 
 admin.site.register(Profile)
+admin.site.register(GameIdentity)
+admin.site.register(VerificationRequest)
 admin.site.register(Transaction)
+admin.site.register(WalletCheckpoint)
 admin.site.register(Withdrawal)
+admin.site.register(WithdrawalBatch)
 admin.site.register(SiteConfiguration)
@@ -0,0 +1,229 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import Profile, Transaction, WalletCheckpoint
+
+
+CENTS = Decimal("0.01")
+
+
+class InsufficientBalance(Exception):
+    """Raised by debit() when the wallet cannot cover the amount"""
+
+
+def signed_amount(prefix=""):
+    """Credits count positive, debits negative"""
+    return Case(
+        When(**{f"{prefix}tx_type": "credit"}, then=F(f"{prefix}amount")),
+        default=-F(f"{prefix}amount"),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+
+
+def current_balance(profile_id):
+    return Profile.objects.filter(pk=profile_id).values_list("balance", flat=True).get()
+
+
+def debit(profile_id, amount, note=""):
+    """Take ``amount`` out of a wallet with one conditional UPDATE.
+
+    Only the balance column is written and the ledger row records the
+    running balance. Raises InsufficientBalance (nothing written) when the
+    wallet holds less than ``amount``.
+    """
+    with transaction.atomic():
+        debited = Profile.objects.filter(pk=profile_id, balance__gte=amount).update(balance=F("balance") - amount)
+        if not debited:
+            raise InsufficientBalance(f"Insufficient balance for {amount}")
+        return Transaction.objects.create(
+            profile_id=profile_id, tx_type="debit", amount=amount, note=note,
+            balance_after=current_balance(profile_id)
+        )
+
+
+def credit(profile_id, amount, note=""):
+    """Add ``amount`` to a wallet with an F() UPDATE and append the ledger row"""
+    with transaction.atomic():
+        Profile.objects.filter(pk=profile_id).update(balance=F("balance") + amount)
+        return Transaction.objects.create(
+            profile_id=profile_id, tx_type="credit", amount=amount, note=note,
+            balance_after=current_balance(profile_id)
+        )
+
+
+def credit_many(entries):
+    """Credit many wallets at once from ``(profile_id, amount, note)`` entries.
+
+    Wallets owed the same total share one UPDATE, running balances are read
+    back with one query and the ledger rows go in with one bulk INSERT.
+    Must run inside a transaction so the read-back sees only our updates.
+    """
+    totals = {}
+    for profile_id, amount, _ in entries:
+        totals[profile_id] = totals.get(profile_id, Decimal("0")) + amount
+
+    by_total = {}
+    for profile_id, total in totals.items():
+        by_total.setdefault(total, []).append(profile_id)
+    for total, profile_ids in by_total.items():
+        Profile.objects.filter(pk__in=profile_ids).update(balance=F("balance") + total)
+
+    # Replay the credits on top of the pre-update balance to fill in running balances
+    running = {
+        pk: balance - totals[pk]
+        for pk, balance in Profile.objects.filter(pk__in=list(totals)).values_list("pk", "balance")
+    }
+    ledger = []
+    for profile_id, amount, note in entries:
+        running[profile_id] += amount
+        ledger.append(Transaction(
+            profile_id=profile_id, tx_type="credit", amount=amount, note=note,
+            balance_after=running[profile_id]
+        ))
+    return Transaction.objects.bulk_create(ledger)
+
+
+def debit_many(entries):
+    """Debit many wallets at once from ``(profile_id, amount, note)`` entries.
+
+    The counterpart of credit_many. Callers lock the wallets and check the
+    balances first; the guarded UPDATE still raises InsufficientBalance
+    (rolling back the caller's transaction) if a wallet can't cover its total.
+    """
+    totals = {}
+    for profile_id, amount, _ in entries:
+        totals[profile_id] = totals.get(profile_id, Decimal("0")) + amount
+
+    by_total = {}
+    for profile_id, total in totals.items():
+        by_total.setdefault(total, []).append(profile_id)
+    for total, profile_ids in by_total.items():
+        debited = Profile.objects.filter(pk__in=profile_ids, balance__gte=total).update(balance=F("balance") - total)
+        if debited != len(profile_ids):
+            raise InsufficientBalance(f"{len(profile_ids) - debited} wallets cannot cover {total}")
+
+    running = {
+        pk: balance + totals[pk]
+        for pk, balance in Profile.objects.filter(pk__in=list(totals)).values_list("pk", "balance")
+    }
+    ledger = []
+    for profile_id, amount, note in entries:
+        running[profile_id] -= amount
+        ledger.append(Transaction(
+            profile_id=profile_id, tx_type="debit", amount=amount, note=note,
+            balance_after=running[profile_id]
+        ))
+    return Transaction.objects.bulk_create(ledger)
+
+
+# ============= CHECKPOINTS =============
+
+def after_checkpoint(as_of, last_transaction_id, prefix=""):
+    """Ledger rows ordered after ``(as_of, last_transaction_id)`` in (created_at, id) order"""
+    return Q(**{f"{prefix}created_at__gt": as_of}) | Q(
+        **{f"{prefix}created_at": as_of, f"{prefix}id__gt": last_transaction_id}
+    )
+
+
+def latest_checkpoint(profile_id):
+    return WalletCheckpoint.objects.filter(profile_id=profile_id).order_by("-as_of", "-created_at").first()
+
+
+def checkpoint_wallet(profile_id):
+    """Snapshot the wallet at its latest ledger row; returns None if nothing changed.
+
+    The wallet row is locked while the latest row is read, so no ledger write
+    can land in between and the balance covers exactly the rows up to the
+    checkpoint's ``(as_of, last_transaction_id)``.
+    """
+    with transaction.atomic():
+        balance = Profile.objects.select_for_update().filter(pk=profile_id).values_list("balance", flat=True).get()
+        latest = Transaction.objects.filter(profile_id=profile_id).order_by("-created_at", "-id").values(
+            "id", "created_at"
+        ).first()
+        if not latest:
+            return None
+
+        last = latest_checkpoint(profile_id)
+        if last and (last.as_of, last.last_transaction_id) == (latest["created_at"], latest["id"]):
+            return None
+        return WalletCheckpoint.objects.create(
+            profile_id=profile_id, balance=balance, as_of=latest["created_at"], last_transaction_id=latest["id"]
+        )
+
+
+def expected_balance(profile_id):
+    """Rebuild a wallet balance from its last checkpoint plus the ledger after it"""
+    checkpoint = latest_checkpoint(profile_id)
+    ledger = Transaction.objects.filter(profile_id=profile_id)
+    start = Decimal("0")
+    if checkpoint:
+        ledger = ledger.filter(after_checkpoint(checkpoint.as_of, checkpoint.last_transaction_id))
+        start = checkpoint.balance
+    return start + (ledger.aggregate(total=Sum(signed_amount()))["total"] or 0)
+
+
+def verify_wallet(profile_id):
+    """Returns ``(expected, actual)`` for a wallet"""
+    return expected_balance(profile_id), current_balance(profile_id)
+
+
+# ============= RECONCILIATION =============
+
+def reconcile_range(first_pk, last_pk):
+    """``(profile_id, balance, expected)`` for every drifted wallet in a pk range.
+
+    One grouped query: each profile's latest checkpoint comes in as a
+    correlated subquery and the ledger after it is summed with a LEFT JOIN
+    + GROUP BY, so a range costs a single index-driven pass.
+    """
+    latest = WalletCheckpoint.objects.filter(profile=OuterRef("pk")).order_by("-as_of", "-created_at")
+    money = DecimalField(max_digits=14, decimal_places=2)
+    rows = (
+        Profile.objects.filter(pk__gte=first_pk, pk__lte=last_pk)
+        .annotate(
+            checkpoint_balance=Coalesce(Subquery(latest.values("balance")[:1]), Value(0), output_field=money),
+            checkpoint_as_of=Subquery(latest.values("as_of")[:1]),
+            checkpoint_tx=Subquery(latest.values("last_transaction_id")[:1]),
+        )
+        .annotate(ledger_total=Coalesce(
+            Sum(
+                signed_amount("transactions__"),
+                filter=Q(checkpoint_as_of__isnull=True) | after_checkpoint(
+                    F("checkpoint_as_of"), F("checkpoint_tx"), prefix="transactions__"
+                ),
+            ),
+            Value(0),
+            output_field=money,
+        ))
+        .values_list("pk", "balance", "checkpoint_balance", "ledger_total")
+    )
+    drifted = []
+    for pk, balance, checkpoint_balance, ledger_total in rows:
+        expected = (checkpoint_balance + ledger_total).quantize(CENTS)
+        if balance != expected:
+            drifted.append((pk, balance, expected))
+    return drifted
+
+
+def record_adjustment(profile_id, note="Reconciliation adjustment"):
+    """Append the ledger row that makes a drifted wallet's history add up.
+
+    The wallet balance is left alone; the row documents the difference.
+    Returns the Transaction, or None if the wallet no longer drifts.
+    """
+    with transaction.atomic():
+        Profile.objects.select_for_update().filter(pk=profile_id).values_list("pk").get()
+        expected, actual = verify_wallet(profile_id)
+        if expected == actual:
+            return None
+        return Transaction.objects.create(
+            profile_id=profile_id,
+            tx_type="credit" if actual > expected else "debit",
+            amount=abs(actual - expected),
+            note=note,
+            balance_after=actual,
+        )
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from wallet import ledger
+from wallet.models import Profile
+
+
+class Command(BaseCommand):
+    help = "Verify wallet balances against the ledger and checkpoint the ones that match"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--profile", type=int, help="Only process a single profile (id)")
+
+    def handle(self, *args, **options):
+        profiles = Profile.objects.filter(transactions__balance_after__isnull=False).distinct()
+        if options["profile"]:
+            profiles = profiles.filter(pk=options["profile"])
+
+        checkpointed = mismatched = 0
+        for profile_id in profiles.values_list("pk", flat=True).iterator():
+            expected, actual = ledger.verify_wallet(profile_id)
+            if expected != actual:
+                mismatched += 1
+                self.stdout.write(self.style.WARNING(
+                    f"Profile {profile_id}: ledger says {expected}, wallet holds {actual}"
+                ))
+                continue
+            if ledger.checkpoint_wallet(profile_id):
+                checkpointed += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Checkpointed {checkpointed} wallets, {mismatched} mismatched"))
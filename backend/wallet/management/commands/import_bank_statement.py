@@ -0,0 +1,33 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from wallet.utils import StatementError, import_bank_statement
+
+
+class Command(BaseCommand):
+    help = "Approve pending deposits that match a bank/UPI statement CSV by UTR and amount"
+
+    def add_arguments(self, parser):
+        parser.add_argument("statement", help="Path to the statement CSV")
+        parser.add_argument("--report", help="Write lines needing manual review to this CSV")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            with open(options["statement"], newline="", encoding="utf-8-sig") as statement:
+                result = import_bank_statement(statement)
+        except StatementError as exc:
+            raise CommandError(str(exc))
+
+        if options["report"]:
+            with open(options["report"], "w", newline="") as report:
+                writer = csv.DictWriter(report, fieldnames=["line", "utr", "amount", "deposit_id", "reason"])
+                writer.writeheader()
+                writer.writerows(result["review"])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Approved {result['approved']} deposits (₹{result['credited']}), "
+            f"{len(result['review'])} lines need review, {time.monotonic() - started:.2f}s"
+        ))
@@ -0,0 +1,68 @@
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Max, Min
+
+from wallet import ledger
+from wallet.models import Profile
+
+
+def _reconcile(bounds):
+    # Runs in a worker process: each worker opens its own connection
+    return ledger.reconcile_range(*bounds)
+
+
+def _close_connections():
+    # Forked workers must not reuse the parent's socket
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Check every wallet balance against checkpoint + ledger, optionally writing fix-up entries"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--range-size", type=int, default=10000, help="Profiles per grouped query")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--report", help="Write the mismatch report as CSV to this path (default: stdout)")
+        parser.add_argument("--fix", action="store_true", help="Append an adjustment ledger entry for each mismatch")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        bounds = Profile.objects.aggregate(first=Min("pk"), last=Max("pk"))
+        if bounds["first"] is None:
+            self.stdout.write("No profiles to reconcile")
+            return
+
+        size = options["range_size"]
+        ranges = [(lo, lo + size - 1) for lo in range(bounds["first"], bounds["last"] + 1, size)]
+
+        if options["workers"] > 1:
+            _close_connections()
+            with ProcessPoolExecutor(max_workers=options["workers"], initializer=_close_connections) as pool:
+                results = list(pool.map(_reconcile, ranges))
+        else:
+            results = [_reconcile(r) for r in ranges]
+        mismatches = [row for chunk in results for row in chunk]
+
+        out = open(options["report"], "w", newline="") if options["report"] else self.stdout
+        try:
+            writer = csv.writer(out)
+            writer.writerow(["profile_id", "balance", "expected", "difference"])
+            for profile_id, balance, expected in mismatches:
+                writer.writerow([profile_id, balance, expected, balance - expected])
+        finally:
+            if out is not self.stdout:
+                out.close()
+
+        fixed = 0
+        if options["fix"]:
+            fixed = sum(1 for profile_id, _, _ in mismatches if ledger.record_adjustment(profile_id))
+
+        self.stderr.write(self.style.SUCCESS(
+            f"Reconciled {len(ranges)} ranges in {time.monotonic() - started:.2f}s: "
+            f"{len(mismatches)} mismatched, {fixed} adjusted"
+        ))
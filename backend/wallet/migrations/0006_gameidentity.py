@@ -0,0 +1,47 @@
+# Generated by Django 5.1.6 on 2026-10-17 22:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+GAME_ID_FIELDS = {'bgmi': 'bgmi_id', 'freefire': 'freefire_id', 'fifa': 'fifa_id', 'legacy': 'game_id'}
+
+
+def backfill_game_identities(apps, schema_editor):
+    Profile = apps.get_model('wallet', 'Profile')
+    GameIdentity = apps.get_model('wallet', 'GameIdentity')
+
+    batch = []
+    rows = Profile.objects.values_list('id', *GAME_ID_FIELDS.values()).order_by('id')
+    for profile_id, *values in rows.iterator(chunk_size=2000):
+        for game, value in zip(GAME_ID_FIELDS, values):
+            if value and value.strip():
+                batch.append(GameIdentity(profile_id=profile_id, game=game, external_id=value.strip()))
+        if len(batch) >= 2000:
+            # First profile to claim an ID keeps it, duplicates are skipped
+            GameIdentity.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    GameIdentity.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0005_profile_mobile_number'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameIdentity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('game', models.CharField(choices=[('bgmi', 'BGMI'), ('freefire', 'FreeFire'), ('fifa', 'FIFA'), ('legacy', 'Legacy game ID')], max_length=20)),
+                ('external_id', models.CharField(max_length=50)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='game_identities', to='wallet.profile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['external_id'], name='wallet_game_externa_313c3d_idx')],
+                'unique_together': {('game', 'external_id')},
+            },
+        ),
+        migrations.RunPython(backfill_game_identities, migrations.RunPython.noop),
+    ]
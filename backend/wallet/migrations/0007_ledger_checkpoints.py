@@ -0,0 +1,32 @@
+# Generated by Django 5.1.6 on 2026-10-17 22:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0006_gameidentity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='balance_after',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True),
+        ),
+        migrations.CreateModel(
+            name='WalletCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('as_of', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkpoints', to='wallet.profile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['profile', 'as_of'], name='wallet_wall_profile_7db49e_idx')],
+            },
+        ),
+    ]
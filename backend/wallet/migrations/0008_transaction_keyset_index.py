@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-17 22:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0007_ledger_checkpoints'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['profile', '-created_at', '-id'], name='wallet_tran_profile_8a3564_idx'),
+        ),
+    ]
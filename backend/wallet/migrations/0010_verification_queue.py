@@ -0,0 +1,67 @@
+# Generated by Django 5.1.6 on 2026-10-17 22:22
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Q
+
+
+def filled(*fields):
+    """Profiles where at least one of ``fields`` holds a value"""
+    q = Q()
+    for field in fields:
+        q |= ~Q(**{f'{field}__isnull': True}) & ~Q(**{field: ''})
+    return q
+
+
+# section -> (status column, "something was submitted" filter)
+SUBMITTED = {
+    'kyc': ('kyc_status', filled('kyc_full_name', 'kyc_id_number')),
+    'game_id': ('game_id_status', filled('bgmi_id', 'freefire_id', 'fifa_id')),
+    'payment': ('payment_details_status', filled('upi_id', 'account_number')),
+}
+
+
+def backfill_queue(apps, schema_editor):
+    Profile = apps.get_model('wallet', 'Profile')
+    VerificationRequest = apps.get_model('wallet', 'VerificationRequest')
+
+    for section, (status_field, submitted) in SUBMITTED.items():
+        pending = Profile.objects.filter(submitted, **{status_field: 'pending'}).order_by('id')
+        batch = []
+        for profile_id in pending.values_list('id', flat=True).iterator(chunk_size=2000):
+            batch.append(VerificationRequest(profile_id=profile_id, section=section))
+            if len(batch) >= 2000:
+                VerificationRequest.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        VerificationRequest.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0009_withdrawal_batches'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VerificationRequest',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('section', models.CharField(choices=[('kyc', 'KYC'), ('game_id', 'Game ID'), ('payment', 'Payment details')], max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected')], default='pending', max_length=20)),
+                ('reason', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('reviewed_at', models.DateTimeField(blank=True, null=True)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='verification_requests', to='wallet.profile')),
+                ('reviewed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['section', 'status', 'created_at'], name='wallet_veri_section_dd068a_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('profile', 'section'), name='one_pending_verification_per_section')],
+            },
+        ),
+        migrations.RunPython(backfill_queue, migrations.RunPython.noop),
+    ]
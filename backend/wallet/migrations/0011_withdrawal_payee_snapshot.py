@@ -0,0 +1,28 @@
+# Generated by Django 5.1.6 on 2026-10-17 22:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0010_verification_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='withdrawal',
+            name='payee_account_number',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='withdrawal',
+            name='payee_ifsc_code',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='withdrawal',
+            name='payee_name',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-17 22:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0011_withdrawal_payee_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='walletcheckpoint',
+            name='last_transaction_id',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations
+from django.db.models import F, Q
+
+
+def drop_mirrored_legacy_identities(apps, schema_editor):
+    # A legacy row that repeats one of the profile's own per-game IDs blocks
+    # other players from using that number on a different game
+    GameIdentity = apps.get_model('wallet', 'GameIdentity')
+    GameIdentity.objects.filter(game='legacy').filter(
+        Q(profile__bgmi_id=F('external_id'))
+        | Q(profile__freefire_id=F('external_id'))
+        | Q(profile__fifa_id=F('external_id'))
+    ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0012_checkpoint_last_transaction'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_mirrored_legacy_identities, migrations.RunPython.noop),
+    ]
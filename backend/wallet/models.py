@@ -1,10 +1,8 @@
 # Create your models here.
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.utils import timezone
 import uuid
-from django.db.models.signals import post_save
-from django.dispatch import receiver
 
 
 class Profile(models.Model):
@@ -55,9 +53,103 @@ class Profile(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Tournament.game -> the Profile column holding that game's player ID
+    GAME_ID_FIELDS = {"bgmi": "bgmi_id", "freefire": "freefire_id", "fifa": "fifa_id"}
+
     def __str__(self):
         return f"{self.user.username} profile"
 
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        # A partially loaded profile (e.g. rebuilt from the auth cache) fetches
+        # all of its deferred columns on the first miss, not one query per column
+        deferred = self.get_deferred_fields()
+        if fields and deferred and set(fields) <= deferred:
+            fields = list(deferred)
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+
+    def game_identity_pairs(self):
+        """(game, external_id) pairs for every filled game ID column.
+
+        game_id usually just repeats one of the per-game IDs; that copy is not
+        claimed again as a legacy ID, or nobody else could use the same
+        number on a different game.
+        """
+        pairs = [(game, getattr(self, field)) for game, field in self.GAME_ID_FIELDS.items()]
+        pairs = [(game, value.strip()) for game, value in pairs if value and value.strip()]
+        legacy = (self.game_id or "").strip()
+        if legacy and legacy not in {value for _, value in pairs}:
+            pairs.append((GameIdentity.LEGACY, legacy))
+        return pairs
+
+    def sync_game_identities(self):
+        """Mirror the game ID columns into GameIdentity.
+
+        Only changed rows are touched, in one transaction, so lookups never
+        see the profile without its IDs. An ID owned by another profile
+        raises IntegrityError instead of being dropped.
+        """
+        wanted = set(self.game_identity_pairs())
+        with transaction.atomic():
+            existing = {
+                (game, external_id): pk
+                for pk, game, external_id in self.game_identities.values_list("pk", "game", "external_id")
+            }
+            stale = [pk for pair, pk in existing.items() if pair not in wanted]
+            if stale:
+                GameIdentity.objects.filter(pk__in=stale).delete()
+            GameIdentity.objects.bulk_create([
+                GameIdentity(profile=self, game=game, external_id=external_id)
+                for game, external_id in wanted - existing.keys()
+            ])
+
+
+class GameIdentity(models.Model):
+    """Indexed (game, external_id) -> profile lookup for in-game player IDs"""
+    LEGACY = "legacy"
+    GAMES = (("bgmi","BGMI"),("freefire","FreeFire"),("fifa","FIFA"),(LEGACY,"Legacy game ID"))
+
+    profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name="game_identities")
+    game = models.CharField(max_length=20, choices=GAMES)
+    external_id = models.CharField(max_length=50)
+
+    class Meta:
+        unique_together = ("game", "external_id")
+        indexes = [models.Index(fields=["external_id"])]
+
+    def __str__(self):
+        return f"{self.game}:{self.external_id} ({self.profile_id})"
+
+class VerificationRequest(models.Model):
+    """Moderation queue entry: one row per profile section waiting for review"""
+    SECTIONS = (("kyc","KYC"),("game_id","Game ID"),("payment","Payment details"))
+    STATUS = (("pending","Pending"),("approved","Approved"),("rejected","Rejected"))
+    # section -> (Profile status column, Profile rejection reason column)
+    SECTION_FIELDS = {
+        "kyc": ("kyc_status", "kyc_rejection_reason"),
+        "game_id": ("game_id_status", "game_id_rejection_reason"),
+        "payment": ("payment_details_status", "payment_details_rejection_reason"),
+    }
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name="verification_requests")
+    section = models.CharField(max_length=20, choices=SECTIONS)
+    status = models.CharField(max_length=20, choices=STATUS, default="pending")
+    reason = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    reviewed_at = models.DateTimeField(null=True, blank=True)
+    reviewed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+
+    class Meta:
+        indexes = [models.Index(fields=["section", "status", "created_at"])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["profile", "section"], condition=models.Q(status="pending"), name="one_pending_verification_per_section"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.section} for {self.profile_id} ({self.status})"
+
 class Transaction(models.Model):
     TX_TYPES = (("credit","Credit"),("debit","Debit"))
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -65,11 +157,48 @@ class Transaction(models.Model):
     tx_type = models.CharField(max_length=10, choices=TX_TYPES)
     amount = models.DecimalField(max_digits=12, decimal_places=2)
     note = models.CharField(max_length=255, blank=True)
+    # Wallet balance right after this entry; null for rows written before the ledger
+    balance_after = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # Keyset pagination of a profile's history (newest first)
+        indexes = [models.Index(fields=["profile", "-created_at", "-id"])]
+
     def __str__(self):
         return f"{self.tx_type} {self.amount} ({self.profile.user.username})"
 
+class WalletCheckpoint(models.Model):
+    """Known-good wallet balance as of a point in the ledger"""
+    profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name="checkpoints")
+    balance = models.DecimalField(max_digits=12, decimal_places=2)
+    # The checkpoint covers every ledger row up to (as_of, last_transaction_id);
+    # bulk inserts share timestamps, so the id breaks ties
+    as_of = models.DateTimeField()
+    last_transaction_id = models.UUIDField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["profile", "as_of"])]
+
+    def __str__(self):
+        return f"{self.profile_id} @ {self.as_of}: {self.balance}"
+
+class WithdrawalBatch(models.Model):
+    """A set of withdrawals debited together and paid through one bank bulk-payout file"""
+    STATUS = (("approved","Approved"),("paid","Paid"))
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name="withdrawal_batches")
+    created_at = models.DateTimeField(auto_now_add=True)
+    status = models.CharField(max_length=20, choices=STATUS, default="approved")
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    withdrawal_count = models.PositiveIntegerField(default=0)
+    payout_reference = models.CharField(max_length=255, blank=True, null=True)
+    paid_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Batch {self.id} ({self.withdrawal_count} withdrawals, {self.status})"
+
 class Withdrawal(models.Model):
     STATUS = (("pending","Pending"),("approved","Approved"),("rejected","Rejected"),("paid","Paid"))
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -80,10 +209,19 @@ class Withdrawal(models.Model):
     # Payment destination
     upi_id = models.CharField(max_length=100, blank=True, null=True)
     bank_details = models.TextField(blank=True, null=True)
+    # Verified payee snapshotted when the withdrawal is approved into a batch;
+    # the payout file reads these, never the live (editable) profile
+    payee_name = models.CharField(max_length=255, blank=True, default="")
+    payee_account_number = models.CharField(max_length=50, blank=True, default="")
+    payee_ifsc_code = models.CharField(max_length=20, blank=True, default="")
 
     # Razorpay payout fields (if using payout API), or admin will mark paid and provide tx id:
     payout_id = models.CharField(max_length=255, blank=True, null=True)
     admin_note = models.TextField(blank=True, null=True)
+    batch = models.ForeignKey(WithdrawalBatch, on_delete=models.SET_NULL, null=True, blank=True, related_name="withdrawals")
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "requested_at"])]
 
     def __str__(self):
         return f"WDR {self.amount} ({self.profile.user.username})"
@@ -112,15 +250,3 @@ class SiteConfiguration(models.Model):
 
     def __str__(self):
         return "Site Global Settings"
-
-@receiver(post_save, sender=User)
-def create_user_profile(sender, instance, created, **kwargs):
-    if created:
-        Profile.objects.create(user=instance, player_uuid=uuid.uuid4())
-
-@receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    try:
-        instance.profile.save()
-    except Profile.DoesNotExist:
-        Profile.objects.create(user=instance, player_uuid=uuid.uuid4())
@@ -40,7 +40,7 @@ class WithdrawalSerializer(serializers.ModelSerializer):
 class TransactionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Transaction
-        fields = ["id", "tx_type", "amount", "note", "created_at"]
+        fields = ["id", "tx_type", "amount", "note", "balance_after", "created_at"]
         read_only_fields = ["id", "created_at"]
 
 class DepositSerializer(serializers.ModelSerializer):
@@ -5,16 +5,10 @@ from django.contrib.auth.models import User
 from .models import Profile
 import uuid
 
-# @receiver(post_save, sender=User)
-# def create_profile(sender, instance, created, **kwargs):
-#     if created:
-#         profile = Profile.objects.create(user=instance)
-#         profile.player_uuid = uuid.uuid4()   # IMPORTANT
-#         profile.save()
 
 @receiver(post_save, sender=User)
 def create_profile(sender, instance, created, **kwargs):
+    # The one place profiles are provisioned: a single INSERT when the user is
+    # created. Later User saves (last_login, password, admin edits) don't touch it.
     if created:
-        profile, created = Profile.objects.get_or_create(user=instance)
-        profile.player_uuid = uuid.uuid4()   # IMPORTANT
-        profile.save()
+        Profile.objects.create(user=instance, player_uuid=uuid.uuid4())
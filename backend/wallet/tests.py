@@ -1,3 +1,441 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from rest_framework.test import APIClient
+
+from . import ledger
+from .models import Profile, GameIdentity, Transaction, VerificationRequest, Withdrawal, WithdrawalBatch, Deposit
+from .serializers import ProfileUpdateSerializer
+
+
+class GameIdentityTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="player")
+
+    def test_update_profile_syncs_identities(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post("/wallet/profile/update/", {"bgmi_id": "B-100", "fifa_id": "F-9"}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        identities = set(GameIdentity.objects.filter(profile__user=self.user).values_list("game", "external_id"))
+        # game_id mirrors bgmi_id and is not claimed a second time as a legacy ID
+        self.assertEqual(identities, {("bgmi", "B-100"), ("fifa", "F-9")})
+
+    def test_same_number_on_different_games(self):
+        other = User.objects.create_user(username="other")
+        self.client.force_authenticate(self.user)
+        response = self.client.post("/wallet/profile/update/", {"bgmi_id": "5551234"}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        self.client.force_authenticate(other)
+        response = self.client.post("/wallet/profile/update/", {"freefire_id": "5551234"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(GameIdentity.objects.values_list("profile__user__username", "game")),
+            {("player", "bgmi"), ("other", "freefire")},
+        )
+
+    def test_duplicate_game_id_rejected_with_single_lookup(self):
+        other = User.objects.create_user(username="other")
+        Profile.objects.filter(user=other).update(freefire_id="FF-1")
+        Profile.objects.get(user=other).sync_game_identities()
+
+        self.client.force_authenticate(User.objects.get(pk=self.user.pk))
+        response = self.client.post("/wallet/profile/update/", {"freefire_id": "FF-1"}, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Free Fire ID already exists", response.data["error"])
+
+    def test_sync_diffs_rows_and_raises_on_conflict(self):
+        self.client.force_authenticate(self.user)
+        self.client.post("/wallet/profile/update/", {"bgmi_id": "B-1", "fifa_id": "F-1"}, format="json")
+        kept = GameIdentity.objects.get(game="fifa", external_id="F-1")
+
+        self.client.post("/wallet/profile/update/", {"bgmi_id": "B-2"}, format="json")
+        identities = set(GameIdentity.objects.filter(profile__user=self.user).values_list("game", "external_id"))
+        self.assertEqual(identities, {("bgmi", "B-2"), ("fifa", "F-1")})
+        self.assertTrue(GameIdentity.objects.filter(pk=kept.pk).exists())
+
+        # An ID claimed between the pre-check and the sync rolls the whole
+        # update back instead of being dropped
+        other = User.objects.create_user(username="other")
+        save = ProfileUpdateSerializer.save
+
+        def racing_save(serializer, **kwargs):
+            GameIdentity.objects.create(profile=other.profile, game="freefire", external_id="FF-9")
+            return save(serializer, **kwargs)
+
+        with mock.patch.object(ProfileUpdateSerializer, "save", racing_save):
+            response = self.client.post("/wallet/profile/update/", {"freefire_id": "FF-9", "bgmi_id": ""}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Profile.objects.get(user=self.user).bgmi_id, "B-2")
+
+
+class LedgerTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username="admin", is_staff=True)
+        self.user = User.objects.create_user(username="player")
+        self.profile = self.user.profile
+        Profile.objects.filter(pk=self.profile.pk).update(balance=Decimal("100"))
+
+    def balance(self):
+        return Profile.objects.values_list("balance", flat=True).get(pk=self.profile.pk)
+
+    def test_debit_records_running_balance(self):
+        tx = ledger.debit(self.profile.pk, Decimal("30"), "fee")
+        self.assertEqual(tx.balance_after, Decimal("70"))
+        self.assertEqual(self.balance(), Decimal("70"))
+
+    def test_debit_refuses_overdraft(self):
+        with self.assertRaises(ledger.InsufficientBalance):
+            ledger.debit(self.profile.pk, Decimal("150"), "fee")
+        self.assertEqual(self.balance(), Decimal("100"))
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_credit_many_assigns_running_balances(self):
+        other = User.objects.create_user(username="other").profile
+        with transaction.atomic():
+            rows = ledger.credit_many([
+                (self.profile.pk, Decimal("10"), "a"),
+                (other.pk, Decimal("10"), "b"),
+                (self.profile.pk, Decimal("5"), "c"),
+            ])
+        self.assertEqual([tx.balance_after for tx in rows], [Decimal("110"), Decimal("10"), Decimal("115")])
+        self.assertEqual(self.balance(), Decimal("115"))
+
+    def test_verify_and_checkpoint(self):
+        # Seed the opening balance as a ledger entry so the history adds up
+        Profile.objects.filter(pk=self.profile.pk).update(balance=0)
+        ledger.credit(self.profile.pk, Decimal("100"), "opening")
+        ledger.debit(self.profile.pk, Decimal("40"), "fee")
+
+        self.assertEqual(ledger.verify_wallet(self.profile.pk), (Decimal("60"), Decimal("60")))
+        checkpoint = ledger.checkpoint_wallet(self.profile.pk)
+        self.assertEqual(checkpoint.balance, Decimal("60"))
+        self.assertIsNone(ledger.checkpoint_wallet(self.profile.pk))
+
+        ledger.credit(self.profile.pk, Decimal("5"), "refund")
+        self.assertEqual(ledger.expected_balance(self.profile.pk), Decimal("65"))
+
+        # An out-of-band edit shows up as drift
+        Profile.objects.filter(pk=self.profile.pk).update(balance=Decimal("999"))
+        self.assertEqual(ledger.verify_wallet(self.profile.pk), (Decimal("65"), Decimal("999")))
+
+    def test_checkpoint_with_shared_timestamps(self):
+        Profile.objects.filter(pk=self.profile.pk).update(balance=0)
+        ledger.credit_many([(self.profile.pk, Decimal(amount), "prize") for amount in ("10", "20", "30")])
+        # Bulk inserts can share a timestamp; the checkpoint must cover all of them
+        Transaction.objects.filter(profile=self.profile).update(created_at=timezone.now() - timedelta(seconds=1))
+
+        checkpoint = ledger.checkpoint_wallet(self.profile.pk)
+        self.assertEqual(checkpoint.balance, Decimal("60"))
+        ledger.credit(self.profile.pk, Decimal("5"), "refund")
+        self.assertEqual(ledger.verify_wallet(self.profile.pk), (Decimal("65"), Decimal("65")))
+        self.assertEqual(ledger.reconcile_range(self.profile.pk, self.profile.pk), [])
+
+    def test_withdrawal_approval_debits_once(self):
+        wd = Withdrawal.objects.create(profile=self.profile, amount=Decimal("60"))
+        self.client.force_authenticate(self.admin)
+
+        first = self.client.post(f"/wallet/withdraw/approve/{wd.id}/")
+        second = self.client.post(f"/wallet/withdraw/approve/{wd.id}/")
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 400)
+        self.assertEqual(self.balance(), Decimal("40"))
+        self.assertEqual(Transaction.objects.get().balance_after, Decimal("40"))
+
+    def test_withdrawal_overdraft_leaves_it_pending(self):
+        wd = Withdrawal.objects.create(profile=self.profile, amount=Decimal("500"))
+        self.client.force_authenticate(self.admin)
+
+        response = self.client.post(f"/wallet/withdraw/approve/{wd.id}/")
+
+        self.assertEqual(response.status_code, 400)
+        wd.refresh_from_db()
+        self.assertEqual(wd.status, "pending")
+        self.assertEqual(self.balance(), Decimal("100"))
+
+
+class TransactionHistoryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="player")
+        self.profile = self.user.profile
+        Transaction.objects.bulk_create([
+            Transaction(profile=self.profile, tx_type="credit" if i % 2 else "debit", amount=i + 1, note=f"tx {i}")
+            for i in range(7)
+        ])
+        self.client.force_authenticate(self.user)
+
+    def walk(self, **params):
+        seen, cursor = [], None
+        while True:
+            query = dict(params, limit=3)
+            if cursor:
+                query["cursor"] = cursor
+            response = self.client.get("/wallet/transactions/", query)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(tx["id"] for tx in response.data["transactions"])
+            cursor = response.data["next_cursor"]
+            if not cursor:
+                return seen
+
+    def test_pages_cover_history_once_newest_first(self):
+        expected = [str(pk) for pk in Transaction.objects.order_by("-created_at", "-pk").values_list("pk", flat=True)]
+        self.assertEqual(self.walk(), expected)
+
+    def test_type_filter(self):
+        self.assertEqual(len(self.walk(type="credit")), 3)
+
+    def test_page_query_count_is_constant(self):
+        first = self.client.get("/wallet/transactions/", {"limit": 2})
+        with self.assertNumQueries(1):
+            self.client.get("/wallet/transactions/", {"limit": 2, "cursor": first.data["next_cursor"]})
+
+    def test_bad_cursor_rejected(self):
+        response = self.client.get("/wallet/transactions/", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+
+
+class StatementExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="player")
+        self.other = User.objects.create_user(username="other")
+        for profile in (self.user.profile, self.other.profile):
+            Transaction.objects.create(profile=profile, tx_type="credit", amount=Decimal("10"), note="bonus")
+
+    def export(self, path, **params):
+        response = self.client.get(path, params)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    def test_user_csv_contains_only_own_rows(self):
+        self.client.force_authenticate(self.user)
+        body = self.export("/wallet/export/transactions/")
+        lines = body.strip().splitlines()
+        self.assertEqual(lines[0], "id,tx_type,amount,balance_after,note,created_at")
+        self.assertEqual(len(lines), 2)
+
+    def test_admin_ndjson_covers_all_users(self):
+        self.client.force_authenticate(User.objects.create_user(username="admin", is_staff=True))
+        body = self.export("/wallet/export/transactions/", all="1", output="ndjson")
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual({row["username"] for row in rows}, {"player", "other"})
+
+    def test_all_users_requires_staff(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get("/wallet/export/deposits/", {"all": "1"})
+        self.assertEqual(response.status_code, 403)
+
+
+class ReconciliationTests(TestCase):
+    def setUp(self):
+        self.clean = User.objects.create_user(username="clean").profile
+        self.drifted = User.objects.create_user(username="drifted").profile
+        ledger.credit(self.clean.pk, Decimal("50"), "deposit")
+        ledger.credit(self.drifted.pk, Decimal("50"), "deposit")
+        ledger.checkpoint_wallet(self.drifted.pk)
+        ledger.debit(self.drifted.pk, Decimal("20"), "fee")
+        # Lost update: the wallet was overwritten without a ledger row
+        Profile.objects.filter(pk=self.drifted.pk).update(balance=Decimal("45"))
+
+    def test_reports_only_drifted_wallets(self):
+        self.assertEqual(
+            ledger.reconcile_range(self.clean.pk, self.drifted.pk),
+            [(self.drifted.pk, Decimal("45"), Decimal("30"))],
+        )
+
+    def test_command_fixes_mismatches(self):
+        out, err = StringIO(), StringIO()
+        call_command("reconcile_wallets", "--workers", "1", "--range-size", "1", "--fix", stdout=out, stderr=err)
+
+        self.assertIn(f"{self.drifted.pk},45.00,30.00,15.00", out.getvalue())
+        adjustment = Transaction.objects.get(note="Reconciliation adjustment")
+        self.assertEqual((adjustment.tx_type, adjustment.amount), ("credit", Decimal("15")))
+        self.assertEqual(ledger.reconcile_range(self.clean.pk, self.drifted.pk), [])
+
+
+class StatementImportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="admin", is_staff=True))
+        self.players = [User.objects.create_user(username=f"p{i}").profile for i in range(3)]
+        self.deposits = [
+            Deposit.objects.create(profile=profile, amount=Decimal("100"), utr_number=f"UTR{i}")
+            for i, profile in enumerate(self.players)
+        ]
+
+    def upload(self, text):
+        statement = SimpleUploadedFile("statement.csv", text.encode(), content_type="text/csv")
+        return self.client.post("/wallet/deposit/import-statement/", {"statement": statement}, format="multipart")
+
+    def test_matches_by_utr_and_amount(self):
+        response = self.upload("Date,UTR,Amount\n2026-01-01,UTR0,100.00\n2026-01-01,UTR1,99\n2026-01-01,UTR9,5\n")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["approved"], 1)
+        self.assertEqual({row["utr"]: row["reason"] for row in response.data["review"]}, {
+            "UTR1": "Amount differs from deposit (100.00)",
+            "UTR9": "No pending deposit",
+        })
+        statuses = dict(Deposit.objects.values_list("utr_number", "status"))
+        self.assertEqual(statuses, {"UTR0": "approved", "UTR1": "pending", "UTR2": "pending"})
+        tx = Transaction.objects.get()
+        self.assertEqual((tx.profile_id, tx.amount, tx.balance_after), (self.players[0].pk, Decimal("100"), Decimal("100")))
+
+    def test_reimport_does_not_credit_twice(self):
+        self.upload("utr,amount\nUTR2,100\n")
+        response = self.upload("utr,amount\nUTR2,100\n")
+
+        self.assertEqual(response.data["approved"], 0)
+        self.assertEqual(Profile.objects.get(pk=self.players[2].pk).balance, Decimal("100"))
+
+    def test_missing_columns_rejected(self):
+        response = self.upload("date,narration\n2026-01-01,hello\n")
+        self.assertEqual(response.status_code, 400)
+
+
+class WithdrawalBatchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="admin", is_staff=True))
+        self.rich = User.objects.create_user(username="rich").profile
+        self.poor = User.objects.create_user(username="poor").profile
+        Profile.objects.filter(pk=self.rich.pk).update(
+            balance=Decimal("500"), upi_id="rich@upi", payment_details_status="approved"
+        )
+        Profile.objects.filter(pk=self.poor.pk).update(
+            balance=Decimal("50"), account_number="1234", ifsc_code="SBIN0001", payment_details_status="approved"
+        )
+        self.upi = Withdrawal.objects.create(profile=self.rich, amount=Decimal("200"), upi_id="rich@upi")
+        self.second = Withdrawal.objects.create(profile=self.rich, amount=Decimal("200"))
+        self.bank = Withdrawal.objects.create(profile=self.poor, amount=Decimal("40"))
+        self.too_much = Withdrawal.objects.create(profile=self.poor, amount=Decimal("40"))
+
+    def test_batch_debits_covered_withdrawals(self):
+        response = self.client.post("/wallet/withdraw/batches/", {}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["batch"]["withdrawal_count"], 3)
+        self.assertEqual(response.data["skipped"], [str(self.too_much.pk)])
+        balances = dict(Profile.objects.values_list("pk", "balance"))
+        self.assertEqual((balances[self.rich.pk], balances[self.poor.pk]), (Decimal("100"), Decimal("10")))
+        self.assertEqual(
+            sorted(Transaction.objects.filter(profile=self.rich).values_list("balance_after", flat=True)),
+            [Decimal("100"), Decimal("300")],
+        )
+        self.too_much.refresh_from_db()
+        self.assertEqual(self.too_much.status, "pending")
+
+    def test_payout_file_and_mark_paid(self):
+        batch_id = self.client.post("/wallet/withdraw/batches/", {"mode": "upi"}, format="json").data["batch"]["id"]
+
+        response = self.client.get(f"/wallet/withdraw/batches/{batch_id}/payout-file/")
+        lines = b"".join(response.streaming_content).decode().strip().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].startswith("UPI,rich,rich@upi,,,200.00,"))
+
+        # Batch lookup + two UPDATEs, wrapped in a savepoint
+        with self.assertNumQueries(5):
+            response = self.client.post(f"/wallet/withdraw/batches/{batch_id}/mark_paid/", {"payout_reference": "NEFT-1"})
+        self.assertEqual(response.status_code, 200)
+        self.upi.refresh_from_db()
+        self.assertEqual((self.upi.status, self.upi.payout_id), ("paid", "NEFT-1"))
+
+    def test_unverified_or_changed_payees_are_not_batched(self):
+        Profile.objects.filter(pk=self.poor.pk).update(payment_details_status="pending")
+        Withdrawal.objects.filter(pk=self.upi.pk).update(upi_id="someone-else@upi")
+
+        response = self.client.post("/wallet/withdraw/batches/", {}, format="json")
+
+        self.assertEqual(response.data["batch"]["withdrawal_count"], 1)
+        self.assertEqual(
+            set(response.data["skipped"]), {str(self.upi.pk), str(self.bank.pk), str(self.too_much.pk)}
+        )
+
+    def test_payout_file_uses_snapshot_and_escapes_cells(self):
+        Profile.objects.filter(pk=self.poor.pk).update(kyc_full_name="=HYPERLINK(1)")
+        batch_id = self.client.post("/wallet/withdraw/batches/", {"mode": "bank"}, format="json").data["batch"]["id"]
+        # Editing the profile after approval doesn't redirect the payout
+        Profile.objects.filter(pk=self.poor.pk).update(account_number="9999")
+
+        response = self.client.get(f"/wallet/withdraw/batches/{batch_id}/payout-file/")
+        lines = b"".join(response.streaming_content).decode().strip().splitlines()
+        imps = [line for line in lines if line.startswith("IMPS,")]
+        self.assertEqual(len(imps), 1)
+        self.assertTrue(imps[0].startswith("IMPS,'=HYPERLINK(1),,1234,SBIN0001,40.00,"))
+
+    def test_nothing_approved_leaves_no_batch(self):
+        Profile.objects.update(payment_details_status="pending")
+        response = self.client.post("/wallet/withdraw/batches/", {}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(WithdrawalBatch.objects.exists())
+
+    def test_list_withdrawals_is_paginated(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/wallet/withdraw/all/", {"limit": 3})
+        self.assertEqual(len(response.data["withdrawals"]), 3)
+        self.assertEqual(response.data["withdrawals"][0]["username"], "poor")
+        self.assertIsNotNone(response.data["next_cursor"])
+
+
+class VerificationQueueTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username="admin", is_staff=True)
+        self.players = [User.objects.create_user(username=f"p{i}") for i in range(3)]
+        for i, player in enumerate(self.players):
+            self.client.force_authenticate(player)
+            self.client.post("/wallet/profile/update/", {"bgmi_id": f"B-{i}", "upi_id": f"p{i}@upi"}, format="json")
+        self.client.force_authenticate(self.admin)
+
+    def test_update_profile_feeds_queue_once_per_section(self):
+        self.client.force_authenticate(self.players[0])
+        self.client.post("/wallet/profile/update/", {"bgmi_id": "B-0b"}, format="json")
+
+        sections = VerificationRequest.objects.filter(profile__user=self.players[0]).values_list("section", flat=True)
+        self.assertEqual(sorted(sections), ["game_id", "payment"])
+
+    def test_queue_is_paginated_oldest_first(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/wallet/verifications/pending/", {"section": "game_id", "limit": 2})
+        rows = response.data["verifications"]
+        self.assertEqual([row["username"] for row in rows], ["p0", "p1"])
+        self.assertNotIn("kyc_document", rows[0])
+
+        response = self.client.get(
+            "/wallet/verifications/pending/", {"section": "game_id", "cursor": response.data["next_cursor"]}
+        )
+        self.assertEqual([row["username"] for row in response.data["verifications"]], ["p2"])
+
+    def test_bulk_approve(self):
+        ids = [str(pk) for pk in VerificationRequest.objects.filter(section="game_id").values_list("pk", flat=True)]
+        response = self.client.post("/wallet/verifications/bulk/", {"ids": ids, "action": "approve"}, format="json")
+
+        self.assertEqual(response.data["reviewed"], 3)
+        self.assertEqual(Profile.objects.filter(game_id_verified=True, game_id_status="approved").count(), 3)
+        self.assertEqual(VerificationRequest.objects.filter(status="pending").count(), 3)
 
-# Create your tests here.
+    def test_single_review_closes_queue_row(self):
+        profile = self.players[1].profile
+        self.client.post(
+            f"/wallet/verifications/verify/{profile.player_uuid}/",
+            {"section": "payment", "action": "reject", "reason": "Bad UPI"},
+        )
+        row = VerificationRequest.objects.get(profile=profile, section="payment")
+        self.assertEqual((row.status, row.reason), ("rejected", "Bad UPI"))
+        self.assertEqual(Profile.objects.get(pk=profile.pk).payment_details_rejection_reason, "Bad UPI")
@@ -6,6 +6,7 @@ urlpatterns = [
     path("profile/", views.profile_view),
     path("balance/", views.get_balance),
     path("transactions/", views.get_transactions),
+    path("export/<str:kind>/", views.export_statement),
     
     # Combined Profile and KYC
     path("profile/update/", views.update_profile),
@@ -13,6 +14,7 @@ urlpatterns = [
     # Unified Admin Verification (for KYC, Game IDs, Payment Details)
     path("verifications/pending/", views.list_pending_verifications),
     path("verifications/verify/<uuid:player_uuid>/", views.verify_profile_section),
+    path("verifications/bulk/", views.bulk_verify_sections),
     
     # Withdrawals
     path("withdraw/my/", views.get_my_withdrawals),
@@ -21,9 +23,13 @@ urlpatterns = [
     path("withdraw/approve/<uuid:withdrawal_id>/", views.approve_withdrawal),
     path("withdraw/reject/<uuid:withdrawal_id>/", views.reject_withdrawal),
     path("withdraw/mark_paid/<uuid:withdrawal_id>/", views.mark_withdrawal_paid),
+    path("withdraw/batches/", views.create_withdrawal_batch_view),
+    path("withdraw/batches/<uuid:batch_id>/payout-file/", views.withdrawal_batch_payout_file),
+    path("withdraw/batches/<uuid:batch_id>/mark_paid/", views.mark_withdrawal_batch_paid),
     # Deposits & Site Config
     path("site-config/", views.get_site_config),
     path("deposit/request/", views.request_deposit),
     path("deposit/pending/", views.list_pending_deposits),
     path("deposit/verify/<uuid:deposit_id>/", views.verify_deposit),
+    path("deposit/import-statement/", views.import_deposit_statement),
 ]
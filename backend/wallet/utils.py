@@ -0,0 +1,440 @@
+import base64
+import csv
+import json
+import uuid
+from decimal import Decimal, InvalidOperation
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from api.authentication import invalidate_cached_users
+
+from . import ledger
+from .models import Deposit, Profile, Transaction, VerificationRequest, Withdrawal, WithdrawalBatch
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at, pk):
+    raw = f"{created_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        created_at = parse_datetime(created_at)
+        if created_at is None:
+            raise ValueError(cursor)
+        return created_at, uuid.UUID(pk)
+    except (ValueError, UnicodeError) as exc:
+        raise InvalidCursor("Invalid cursor") from exc
+
+
+def page_size(value, default=DEFAULT_PAGE_SIZE):
+    try:
+        return max(1, min(int(value), MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return default
+
+
+def keyset_page(queryset, cursor=None, limit=DEFAULT_PAGE_SIZE, date_field="created_at", oldest_first=False):
+    """One newest-first (or oldest-first) page of ``queryset`` after ``cursor``.
+
+    Seeks on ``(date_field, id)`` instead of using OFFSET, so every page is
+    a bounded index range scan no matter how deep the history goes.
+    Returns ``(rows, next_cursor)``; next_cursor is None on the last page.
+    """
+    op, sign = ("gt", "") if oldest_first else ("lt", "-")
+    if cursor:
+        stamp, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(**{f"{date_field}__{op}": stamp}) | Q(**{date_field: stamp, f"pk__{op}": pk}))
+
+    rows = list(queryset.order_by(f"{sign}{date_field}", f"{sign}pk")[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(getattr(rows[-1], date_field), rows[-1].pk)
+
+
+# ============= STATEMENT EXPORT =============
+
+EXPORT_CHUNK_SIZE = 2000
+
+# kind -> (model, date column, exported columns)
+EXPORT_KINDS = {
+    "transactions": (Transaction, "created_at", ["id", "tx_type", "amount", "balance_after", "note", "created_at"]),
+    "deposits": (Deposit, "created_at", ["id", "amount", "utr_number", "status", "admin_note", "created_at"]),
+    "withdrawals": (Withdrawal, "requested_at", ["id", "amount", "status", "upi_id", "payout_id", "admin_note", "requested_at"]),
+}
+
+
+class _Echo:
+    """File-like object whose write() just hands the line back to csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(kind, profile=None, date_from=None, date_to=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """``(columns, row iterator)`` for a statement export.
+
+    Rows come from ``QuerySet.iterator(chunk_size)`` over ``values_list`` so
+    only one chunk of plain tuples is held in memory at a time. Exports for
+    every user (profile=None) get a leading username column.
+    """
+    model, date_field, columns = EXPORT_KINDS[kind]
+    queryset = model.objects.all()
+    if profile is None:
+        columns = ["username"] + columns
+    else:
+        queryset = queryset.filter(profile=profile)
+    if date_from:
+        queryset = queryset.filter(**{f"{date_field}__date__gte": date_from})
+    if date_to:
+        queryset = queryset.filter(**{f"{date_field}__date__lte": date_to})
+
+    fields = ["profile__user__username" if col == "username" else col for col in columns]
+    rows = queryset.order_by(date_field, "pk").values_list(*fields).iterator(chunk_size=chunk_size)
+    return columns, rows
+
+
+def stream_csv(columns, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_ndjson(columns, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+# ============= BANK STATEMENT IMPORT =============
+
+STATEMENT_UTR_COLUMNS = ("utr", "utr_number", "reference", "ref no", "transaction id")
+STATEMENT_AMOUNT_COLUMNS = ("amount", "credit", "credit amount")
+IMPORT_LOOKUP_CHUNK = 5000
+
+
+class StatementError(ValueError):
+    pass
+
+
+def _pick_column(header, candidates):
+    normalized = {name.strip().lower(): name for name in header}
+    for candidate in candidates:
+        if candidate in normalized:
+            return normalized[candidate]
+    raise StatementError(f"Statement needs one of these columns: {', '.join(candidates)}")
+
+
+def parse_statement(lines):
+    """``({utr: amount}, review)`` from the lines of a bank/UPI statement CSV"""
+    reader = csv.DictReader(lines)
+    if not reader.fieldnames:
+        raise StatementError("Statement is empty")
+    utr_col = _pick_column(reader.fieldnames, STATEMENT_UTR_COLUMNS)
+    amount_col = _pick_column(reader.fieldnames, STATEMENT_AMOUNT_COLUMNS)
+
+    entries, review = {}, []
+    for line_no, row in enumerate(reader, start=2):
+        utr = (row.get(utr_col) or "").strip()
+        raw_amount = (row.get(amount_col) or "").replace(",", "").strip()
+        try:
+            amount = Decimal(raw_amount)
+        except InvalidOperation:
+            review.append({"line": line_no, "utr": utr, "amount": raw_amount, "reason": "Unreadable amount"})
+            continue
+        if not utr:
+            review.append({"line": line_no, "utr": "", "amount": str(amount), "reason": "Missing UTR"})
+        elif utr in entries:
+            review.append({"line": line_no, "utr": utr, "amount": str(amount), "reason": "UTR repeated in statement"})
+        else:
+            entries[utr] = amount
+    return entries, review
+
+
+def import_bank_statement(lines):
+    """Approve every pending deposit whose UTR and amount match the statement.
+
+    Pending deposits are loaded for the statement's UTRs in a few chunked
+    IN queries and joined against the statement in a dict. All matches are
+    approved in one transaction: chunked status UPDATEs, one F() wallet
+    UPDATE per distinct credited total and one bulk ledger INSERT.
+    Returns ``{"approved", "credited", "review"}``.
+    """
+    entries, review = parse_statement(lines)
+    utrs = list(entries)
+
+    with transaction.atomic():
+        pending = {}
+        for start in range(0, len(utrs), IMPORT_LOOKUP_CHUNK):
+            rows = Deposit.objects.select_for_update().filter(
+                status="pending", utr_number__in=utrs[start:start + IMPORT_LOOKUP_CHUNK]
+            ).values_list("pk", "utr_number", "amount", "profile_id")
+            for pk, utr, amount, profile_id in rows:
+                pending.setdefault(utr, []).append((pk, amount, profile_id))
+
+        matched, credits = [], []
+        for utr, amount in entries.items():
+            deposits = pending.get(utr)
+            if not deposits:
+                review.append({"utr": utr, "amount": str(amount), "reason": "No pending deposit"})
+            elif len(deposits) > 1:
+                review.append({"utr": utr, "amount": str(amount), "reason": "Several pending deposits share this UTR"})
+            elif deposits[0][1] != amount:
+                review.append({
+                    "utr": utr, "amount": str(amount), "deposit_id": str(deposits[0][0]),
+                    "reason": f"Amount differs from deposit ({deposits[0][1]})",
+                })
+            else:
+                pk, _, profile_id = deposits[0]
+                matched.append(pk)
+                credits.append((profile_id, amount, f"Deposit Approved | UTR: {utr}"))
+
+        for start in range(0, len(matched), IMPORT_LOOKUP_CHUNK):
+            Deposit.objects.filter(pk__in=matched[start:start + IMPORT_LOOKUP_CHUNK]).update(
+                status="approved", admin_note="Matched bank statement"
+            )
+        ledger.credit_many(credits)
+
+    return {
+        "approved": len(matched),
+        "credited": sum((amount for _, amount, _ in credits), Decimal("0")),
+        "review": review,
+    }
+
+
+# ============= WITHDRAWAL BATCHES =============
+
+WITHDRAWAL_CHUNK_SIZE = 500
+PAYOUT_FILE_COLUMNS = [
+    "Payment Mode", "Beneficiary Name", "UPI ID", "Account Number", "IFSC", "Amount", "Reference", "Narration",
+]
+
+
+def payout_destination(withdrawal, profile):
+    """Verified ``(upi_id, account_number, ifsc_code)`` to pay a withdrawal to, or None.
+
+    Only approved payment details count. A VPA given at request time must
+    still be the verified one; otherwise the verified bank account (or UPI)
+    on the profile is used.
+    """
+    if profile["payment_details_status"] != "approved":
+        return None
+    if withdrawal.upi_id:
+        return (withdrawal.upi_id, "", "") if withdrawal.upi_id == profile["upi_id"] else None
+    if profile["account_number"] and profile["ifsc_code"]:
+        return ("", profile["account_number"], profile["ifsc_code"])
+    if profile["upi_id"]:
+        return (profile["upi_id"], "", "")
+    return None
+
+
+def create_withdrawal_batch(admin, withdrawals, chunk_size=WITHDRAWAL_CHUNK_SIZE):
+    """Approve and debit the pending ``withdrawals`` chunk by chunk into a new batch.
+
+    Each chunk is one short transaction: the withdrawals and their wallets
+    are locked, requests without verified payee details or whose wallet
+    can't cover them are skipped (they stay pending), and the rest are
+    debited with ``ledger.debit_many`` and moved into the batch with their
+    payee snapshot in one bulk UPDATE.  The batch itself is created by the
+    first chunk that approves something.
+    Returns ``(batch, skipped_ids)``; batch is None if nothing was approved.
+    """
+    batch = None
+    candidates = list(
+        withdrawals.filter(status="pending", batch__isnull=True)
+        .order_by("requested_at", "pk")
+        .values_list("pk", flat=True)
+    )
+    skipped = []
+
+    for start in range(0, len(candidates), chunk_size):
+        with transaction.atomic():
+            rows = list(
+                Withdrawal.objects.select_for_update()
+                .filter(pk__in=candidates[start:start + chunk_size], status="pending")
+                .order_by("requested_at", "pk")
+                .only("pk", "profile_id", "amount", "upi_id")
+            )
+            profiles = {
+                profile["pk"]: profile for profile in
+                Profile.objects.select_for_update(of=("self",))
+                .filter(pk__in={withdrawal.profile_id for withdrawal in rows})
+                .values("pk", "balance", "payment_details_status", "upi_id", "account_number", "ifsc_code",
+                        "kyc_full_name", "user__username")
+            }
+            approved, entries = [], []
+            for withdrawal in rows:
+                profile = profiles[withdrawal.profile_id]
+                destination = payout_destination(withdrawal, profile)
+                if destination is None or profile["balance"] < withdrawal.amount:
+                    skipped.append(withdrawal.pk)
+                    continue
+                profile["balance"] -= withdrawal.amount
+                withdrawal.upi_id, withdrawal.payee_account_number, withdrawal.payee_ifsc_code = destination
+                withdrawal.payee_name = profile["kyc_full_name"] or profile["user__username"]
+                withdrawal.status = "approved"
+                approved.append(withdrawal)
+                entries.append((withdrawal.profile_id, withdrawal.amount, f"Withdrawal Approved: ID {withdrawal.pk}"))
+            if not approved:
+                continue
+
+            if batch is None:
+                batch = WithdrawalBatch.objects.create(created_by=admin)
+            ledger.debit_many(entries)
+            for withdrawal in approved:
+                withdrawal.batch = batch
+            Withdrawal.objects.bulk_update(
+                approved, ["status", "batch", "upi_id", "payee_name", "payee_account_number", "payee_ifsc_code"]
+            )
+            WithdrawalBatch.objects.filter(pk=batch.pk).update(
+                total_amount=F("total_amount") + sum((amount for _, amount, _ in entries), Decimal("0")),
+                withdrawal_count=F("withdrawal_count") + len(approved),
+            )
+
+    if batch is not None:
+        batch.refresh_from_db()
+    return batch, skipped
+
+
+def csv_safe(value):
+    """Neutralise spreadsheet formulas in a user-supplied CSV cell"""
+    if isinstance(value, str) and value.startswith(("=", "+", "-", "@", "\t", "\r")):
+        return "'" + value
+    return value
+
+
+def stream_payout_file(batch, chunk_size=EXPORT_CHUNK_SIZE):
+    """Bank bulk-payout CSV lines from the payee snapshot (UPI for a VPA, IMPS for a bank account).
+
+    Rows without a usable snapshot (batched before payees were recorded)
+    are left out rather than paid to whatever the profile says now.
+    """
+    rows = (
+        Withdrawal.objects.filter(batch=batch, status="approved")
+        .order_by("requested_at", "pk")
+        .values_list(
+            "pk", "amount", "upi_id", "payee_name", "payee_account_number", "payee_ifsc_code",
+            "profile__user__username",
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+    writer = csv.writer(_Echo())
+    yield writer.writerow(PAYOUT_FILE_COLUMNS)
+    for pk, amount, vpa, payee_name, account_number, ifsc, username in rows:
+        if not payee_name or not (vpa or (account_number and ifsc)):
+            continue
+        yield writer.writerow([csv_safe(value) for value in (
+            "UPI" if vpa else "IMPS",
+            payee_name,
+            vpa or "",
+            "" if vpa else account_number,
+            "" if vpa else ifsc,
+            amount,
+            pk,
+            f"Withdrawal {username}",
+        )])
+
+
+def mark_batch_paid(batch, payout_reference):
+    """Flip a whole batch and its withdrawals to paid; returns the number of withdrawals marked"""
+    with transaction.atomic():
+        marked = Withdrawal.objects.filter(batch=batch, status="approved").update(
+            status="paid", payout_id=payout_reference
+        )
+        WithdrawalBatch.objects.filter(pk=batch.pk).update(
+            status="paid", payout_reference=payout_reference, paid_at=timezone.now()
+        )
+    return marked
+
+
+# ============= VERIFICATION QUEUE =============
+
+def section_review_fields(section, action, reason=""):
+    """Profile column values for approving/rejecting a section"""
+    status_field, reason_field = VerificationRequest.SECTION_FIELDS[section]
+    approved = action == "approve"
+    fields = {
+        status_field: "approved" if approved else "rejected",
+        reason_field: None if approved else reason,
+    }
+    if section == "game_id":
+        fields["game_id_verified"] = approved
+    return fields
+
+
+def enqueue_verifications(profile, sections):
+    """Queue ``sections`` of ``profile`` for review; an already-pending section keeps its place"""
+    VerificationRequest.objects.bulk_create(
+        [VerificationRequest(profile=profile, section=section) for section in sections],
+        ignore_conflicts=True,
+    )
+
+
+def close_verifications(requests, action, reviewer, reason=""):
+    return requests.filter(status="pending").update(
+        status="approved" if action == "approve" else "rejected",
+        reason=None if action == "approve" else reason,
+        reviewed_by=reviewer,
+        reviewed_at=timezone.now(),
+    )
+
+
+def review_verifications(requests, action, reviewer, reason=""):
+    """Approve or reject many queued sections at once.
+
+    One UPDATE of the profile columns per section, one UPDATE closing the
+    queue rows. Returns the number of queue rows reviewed.
+    """
+    with transaction.atomic():
+        rows = list(requests.filter(status="pending").select_for_update().values_list(
+            "pk", "profile_id", "section", "profile__user_id"
+        ))
+        by_section = {}
+        for _, profile_id, section, _ in rows:
+            by_section.setdefault(section, []).append(profile_id)
+        for section, profile_ids in by_section.items():
+            Profile.objects.filter(pk__in=profile_ids).update(**section_review_fields(section, action, reason))
+        close_verifications(VerificationRequest.objects.filter(pk__in=[row[0] for row in rows]), action, reviewer, reason)
+        # Queryset updates skip post_save, so drop the cached game_id_verified by hand
+        invalidate_cached_users({row[3] for row in rows})
+    return len(rows)
+
+
+def verification_payload(request):
+    """Queue row plus just the profile fields the moderator needs for that section"""
+    profile = request.profile
+    payload = {
+        "id": str(request.id),
+        "section": request.section,
+        "status": request.status,
+        "created_at": request.created_at,
+        "player_uuid": str(profile.player_uuid),
+        "username": profile.user.username,
+    }
+    if request.section == "kyc":
+        payload.update(
+            kyc_full_name=profile.kyc_full_name, kyc_id_type=profile.kyc_id_type,
+            kyc_id_number=profile.kyc_id_number, mobile_number=profile.mobile_number,
+            kyc_document=profile.kyc_document.url if profile.kyc_document else None,
+        )
+    elif request.section == "game_id":
+        payload.update(bgmi_id=profile.bgmi_id, freefire_id=profile.freefire_id, fifa_id=profile.fifa_id)
+    else:
+        payload.update(
+            upi_id=profile.upi_id, bank_name=profile.bank_name,
+            account_number=profile.account_number, ifsc_code=profile.ifsc_code,
+        )
+    return payload
@@ -3,11 +3,23 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Profile, Transaction, Withdrawal, Deposit, SiteConfiguration
+from . import ledger
+from .models import Profile, GameIdentity, VerificationRequest, Transaction, Withdrawal, WithdrawalBatch, Deposit, SiteConfiguration
 from .serializers import (
     ProfileSerializer, ProfileUpdateSerializer, WithdrawalSerializer, 
     DepositSerializer, SiteConfigurationSerializer
 )
+from .utils import (
+    EXPORT_KINDS, InvalidCursor, StatementError, close_verifications, create_withdrawal_batch, enqueue_verifications,
+    export_rows, import_bank_statement, keyset_page, mark_batch_paid, page_size, review_verifications,
+    section_review_fields, stream_csv, stream_ndjson, stream_payout_file, verification_payload
+)
+from django.core.exceptions import ValidationError
+from django.http import StreamingHttpResponse
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from datetime import date
+import io
 from decimal import Decimal
 
 @api_view(["GET"])
@@ -37,10 +49,44 @@ def get_balance(request):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_transactions(request):
-    profile = request.user.profile
-    transactions = profile.transactions.all().order_by('-created_at')
+    """Newest-first transaction history, one keyset page at a time.
+
+    Query params: cursor (from next_cursor), limit, type (credit/debit),
+    from / to (ISO dates, inclusive).
+    """
     from .serializers import TransactionSerializer
-    return Response({"transactions": TransactionSerializer(transactions, many=True).data})
+    transactions = Transaction.objects.filter(profile=request.user.profile)
+
+    tx_type = request.query_params.get("type")
+    if tx_type:
+        if tx_type not in dict(Transaction.TX_TYPES):
+            return Response({"error": "type must be credit or debit"}, status=400)
+        transactions = transactions.filter(tx_type=tx_type)
+
+    date_from = request.query_params.get("from")
+    date_to = request.query_params.get("to")
+    try:
+        if date_from:
+            transactions = transactions.filter(created_at__date__gte=date.fromisoformat(date_from))
+        if date_to:
+            transactions = transactions.filter(created_at__date__lte=date.fromisoformat(date_to))
+    except ValueError:
+        return Response({"error": "from/to must be YYYY-MM-DD dates"}, status=400)
+
+    try:
+        page, next_cursor = keyset_page(
+            transactions, request.query_params.get("cursor"), page_size(request.query_params.get("limit"))
+        )
+    except InvalidCursor as exc:
+        return Response({"error": str(exc)}, status=400)
+    return Response({"transactions": TransactionSerializer(page, many=True).data, "next_cursor": next_cursor})
+
+# Verification section -> update_profile fields that send it back for review
+SECTION_INPUTS = {
+    "game_id": ["bgmi_id", "freefire_id", "fifa_id"],
+    "kyc": ["kyc_full_name", "kyc_id_number", "kyc_document"],
+    "payment": ["bank_name", "account_number", "upi_id"],
+}
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
@@ -59,56 +105,130 @@ def update_profile(request):
                 "error": "Mobile number already exists. This number is already registered with another account."
             }, status=status.HTTP_400_BAD_REQUEST)
     
-    # Check for duplicate game IDs
-    game_id_fields = {
-        'bgmi_id': 'BGMI ID',
-        'freefire_id': 'Free Fire ID',
-        'fifa_id': 'FIFA ID'
+    # Check for duplicate game IDs (one indexed lookup for all submitted IDs)
+    display_names = {
+        'bgmi': 'BGMI ID',
+        'freefire': 'Free Fire ID',
+        'fifa': 'FIFA ID'
     }
     
-    for field_name, display_name in game_id_fields.items():
-        if field_name in data and data[field_name]:
-            field_value = data[field_name].strip()
-            if field_value:  # Only check if not empty
-                existing = Profile.objects.filter(**{field_name: field_value}).exclude(user=request.user).first()
-                if existing:
-                    return Response({
-                        "error": f"{display_name} already exists. This {display_name} is already registered with another account."
-                    }, status=status.HTTP_400_BAD_REQUEST)
+    wanted = Q()
+    for game, field_name in Profile.GAME_ID_FIELDS.items():
+        field_value = (data.get(field_name) or "").strip()
+        if field_value:  # Only check if not empty
+            wanted |= Q(game=game, external_id=field_value)
+    if wanted:
+        taken = GameIdentity.objects.filter(wanted).exclude(profile=profile).values_list("game", flat=True).first()
+        if taken:
+            display_name = display_names[taken]
+            return Response({
+                "error": f"{display_name} already exists. This {display_name} is already registered with another account."
+            }, status=status.HTTP_400_BAD_REQUEST)
     
     serializer = ProfileUpdateSerializer(profile, data=request.data, partial=True)
     if serializer.is_valid():
-        serializer.save()
+        # The GameIdentity sync is the authoritative uniqueness check (the
+        # lookup above can race); a conflict rolls the whole update back
+        try:
+            with transaction.atomic():
+                serializer.save()
         
-        # Reset statuses for updated sections
-        if any(k in data for k in ["bgmi_id", "freefire_id", "fifa_id"]):
-            profile.game_id_status = "pending"
-            for gid in [profile.bgmi_id, profile.freefire_id, profile.fifa_id]:
-                if gid:
-                    profile.game_id = gid
-                    break
+                # Reset statuses for updated sections
+                if any(k in data for k in ["bgmi_id", "freefire_id", "fifa_id"]):
+                    profile.game_id_status = "pending"
+                    for gid in [profile.bgmi_id, profile.freefire_id, profile.fifa_id]:
+                        if gid:
+                            profile.game_id = gid
+                            break
         
-        if any(k in data for k in ["kyc_full_name", "kyc_id_number", "kyc_document"]):
-            profile.kyc_status = "pending"
+                if any(k in data for k in ["kyc_full_name", "kyc_id_number", "kyc_document"]):
+                    profile.kyc_status = "pending"
             
-        if any(k in data for k in ["bank_name", "account_number", "upi_id"]):
-            profile.payment_details_status = "pending"
+                if any(k in data for k in ["bank_name", "account_number", "upi_id"]):
+                    profile.payment_details_status = "pending"
 
-        profile.save()
+                profile.save()
+                if any(k in data for k in ["bgmi_id", "freefire_id", "fifa_id"]):
+                    profile.sync_game_identities()
+        except IntegrityError:
+            return Response({
+                "error": "Game ID already exists. This Game ID is already registered with another account."
+            }, status=status.HTTP_400_BAD_REQUEST)
+        enqueue_verifications(profile, [
+            section for section, keys in SECTION_INPUTS.items() if any(k in data for k in keys)
+        ])
         return Response({"message": "Profile updated, awaiting admin verification"})
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def export_statement(request, kind):
+    """Stream a statement as CSV (default) or NDJSON (?output=ndjson).
+
+    Staff can pass ?all=1 to export every user. from / to (YYYY-MM-DD)
+    narrow the date range.
+    """
+    if kind not in EXPORT_KINDS:
+        return Response({"error": "Unknown statement"}, status=404)
+    output = request.query_params.get("output", "csv")
+    if output not in ("csv", "ndjson"):
+        return Response({"error": "output must be csv or ndjson"}, status=400)
+
+    everyone = request.query_params.get("all") == "1"
+    if everyone and not request.user.is_staff:
+        return Response({"error": "Only admins can export all users"}, status=403)
+
+    try:
+        date_from = request.query_params.get("from")
+        date_to = request.query_params.get("to")
+        date_from = date.fromisoformat(date_from) if date_from else None
+        date_to = date.fromisoformat(date_to) if date_to else None
+    except ValueError:
+        return Response({"error": "from/to must be YYYY-MM-DD dates"}, status=400)
+
+    columns, rows = export_rows(kind, None if everyone else request.user.profile, date_from, date_to)
+    if output == "csv":
+        response = StreamingHttpResponse(stream_csv(columns, rows), content_type="text/csv")
+    else:
+        response = StreamingHttpResponse(stream_ndjson(columns, rows), content_type="application/x-ndjson")
+    scope = "all" if everyone else request.user.username
+    response["Content-Disposition"] = f'attachment; filename="{kind}-{scope}.{output}"'
+    return response
+
 @api_view(["GET"])
 @permission_classes([IsAdminUser])
 def list_pending_verifications(request):
-    from django.db.models import Q
-    qs = Profile.objects.filter(
-        Q(kyc_status="pending") | 
-        Q(game_id_status="pending") | 
-        Q(payment_details_status="pending")
-    )
-    data = ProfileSerializer(qs, many=True).data
-    return Response(data)
+    """Oldest-first page of the verification queue (?section=, ?cursor=, ?limit=)"""
+    queue = VerificationRequest.objects.filter(status="pending").select_related("profile__user")
+    section = request.query_params.get("section")
+    if section:
+        if section not in VerificationRequest.SECTION_FIELDS:
+            return Response({"error": "Invalid section"}, status=400)
+        queue = queue.filter(section=section)
+    try:
+        page, next_cursor = keyset_page(
+            queue, request.query_params.get("cursor"), page_size(request.query_params.get("limit")), oldest_first=True
+        )
+    except InvalidCursor as exc:
+        return Response({"error": str(exc)}, status=400)
+    return Response({"verifications": [verification_payload(row) for row in page], "next_cursor": next_cursor})
+
+@api_view(["POST"])
+@permission_classes([IsAdminUser])
+def bulk_verify_sections(request):
+    """Approve or reject many queued sections: {"ids": [...], "action": "approve"|"reject", "reason": ""}"""
+    action = request.data.get("action")
+    ids = request.data.get("ids") or []
+    if action not in ("approve", "reject"):
+        return Response({"error": "Invalid action"}, status=400)
+    if not isinstance(ids, list) or not ids:
+        return Response({"error": "ids must be a non-empty list"}, status=400)
+    try:
+        requests = VerificationRequest.objects.filter(pk__in=ids)
+        reviewed = review_verifications(requests, action, request.user, request.data.get("reason", ""))
+    except ValidationError:
+        return Response({"error": "ids must be verification request ids"}, status=400)
+    return Response({"reviewed": reviewed})
 
 @api_view(["POST"])
 @permission_classes([IsAdminUser])
@@ -121,23 +241,17 @@ def verify_profile_section(request, player_uuid):
         prof = Profile.objects.get(player_uuid=player_uuid)
     except Profile.DoesNotExist:
         return Response({"error":"Profile not found"}, status=404)
-        
-    status_val = "approved" if action == "approve" else "rejected"
-    
-    if section == "kyc":
-        prof.kyc_status = status_val
-        prof.kyc_rejection_reason = reason if action == "reject" else None
-    elif section == "game_id":
-        prof.game_id_status = status_val
-        prof.game_id_verified = (action == "approve")
-        prof.game_id_rejection_reason = reason if action == "reject" else None
-    elif section == "payment":
-        prof.payment_details_status = status_val
-        prof.payment_details_rejection_reason = reason if action == "reject" else None
-    else:
+
+    if section not in VerificationRequest.SECTION_FIELDS:
         return Response({"error": "Invalid section"}, status=400)
-        
-    prof.save()
+
+    fields = section_review_fields(section, action, reason)
+    for field, value in fields.items():
+        setattr(prof, field, value)
+    prof.save(update_fields=list(fields))
+    close_verifications(VerificationRequest.objects.filter(profile=prof, section=section), action, request.user, reason)
+
+    status_val = "approved" if action == "approve" else "rejected"
     return Response({"message": f"{section.upper()} {status_val}"})
 
 @api_view(["POST"])
@@ -176,25 +290,15 @@ def approve_withdrawal(request, withdrawal_id):
     if wd.status != 'pending':
         return Response({"error": "Withdrawal is already " + wd.status}, status=400)
 
-    with transaction.atomic():
-        profile = wd.profile
-        if profile.balance < wd.amount:
-            return Response({"error": f"Insufficient balance. User only has ₹{profile.balance}"}, status=400)
-            
-        # Deduct money now
-        profile.balance -= wd.amount
-        profile.save()
-
-        # Create transaction record
-        Transaction.objects.create(
-            profile=profile,
-            tx_type="debit",
-            amount=wd.amount,
-            note=f"Withdrawal Approved: ID {wd.id}"
-        )
-
-        wd.status = "approved"
-        wd.save()
+    profile = wd.profile
+    try:
+        with transaction.atomic():
+            # Flip the status first so a double-approve can't debit twice
+            if not Withdrawal.objects.filter(pk=wd.pk, status="pending").update(status="approved"):
+                return Response({"error": "Withdrawal is already processed"}, status=400)
+            ledger.debit(profile.pk, wd.amount, f"Withdrawal Approved: ID {wd.id}")
+    except ledger.InsufficientBalance:
+        return Response({"error": f"Insufficient balance. User only has ₹{ledger.current_balance(profile.pk)}"}, status=400)
 
     return Response({"message": f"Withdrawal approved and ₹{wd.amount} deducted from {profile.user.username}'s wallet."})
 
@@ -218,9 +322,90 @@ def reject_withdrawal(request, withdrawal_id):
 @api_view(["GET"])
 @permission_classes([IsAdminUser])
 def list_withdrawals(request):
-    withdrawals = Withdrawal.objects.all().order_by('-requested_at')
+    """Newest-first withdrawals, one keyset page at a time (?status=, ?cursor=, ?limit=)"""
     from .serializers import WithdrawalSerializer
-    return Response(WithdrawalSerializer(withdrawals, many=True).data)
+    withdrawals = Withdrawal.objects.select_related("profile__user")
+    if request.query_params.get("status"):
+        withdrawals = withdrawals.filter(status=request.query_params["status"])
+    try:
+        page, next_cursor = keyset_page(
+            withdrawals, request.query_params.get("cursor"), page_size(request.query_params.get("limit")),
+            date_field="requested_at"
+        )
+    except InvalidCursor as exc:
+        return Response({"error": str(exc)}, status=400)
+    return Response({"withdrawals": WithdrawalSerializer(page, many=True).data, "next_cursor": next_cursor})
+
+def batch_payload(batch):
+    return {
+        "id": str(batch.id),
+        "status": batch.status,
+        "withdrawal_count": batch.withdrawal_count,
+        "total_amount": str(batch.total_amount),
+        "payout_reference": batch.payout_reference,
+        "created_at": batch.created_at,
+    }
+
+@api_view(["POST"])
+@permission_classes([IsAdminUser])
+def create_withdrawal_batch_view(request):
+    """Approve and debit pending withdrawals in bulk.
+
+    Optional filters: min_amount, max_amount, requested_before (YYYY-MM-DD),
+    mode (upi/bank), limit.
+    """
+    data = request.data
+    withdrawals = Withdrawal.objects.filter(status="pending")
+    try:
+        if data.get("min_amount") not in (None, ""):
+            withdrawals = withdrawals.filter(amount__gte=Decimal(str(data["min_amount"])))
+        if data.get("max_amount") not in (None, ""):
+            withdrawals = withdrawals.filter(amount__lte=Decimal(str(data["max_amount"])))
+        if data.get("requested_before"):
+            withdrawals = withdrawals.filter(requested_at__date__lt=date.fromisoformat(data["requested_before"]))
+        limit = int(data["limit"]) if data.get("limit") else None
+    except (ArithmeticError, ValueError):
+        return Response({"error": "Invalid filter value"}, status=400)
+
+    mode = data.get("mode")
+    if mode == "upi":
+        withdrawals = withdrawals.exclude(Q(upi_id__isnull=True) | Q(upi_id=""))
+    elif mode == "bank":
+        withdrawals = withdrawals.filter(Q(upi_id__isnull=True) | Q(upi_id=""))
+    if limit:
+        withdrawals = withdrawals.filter(
+            pk__in=list(withdrawals.order_by("requested_at", "pk").values_list("pk", flat=True)[:limit])
+        )
+
+    batch, skipped = create_withdrawal_batch(request.user, withdrawals)
+    if batch is None:
+        return Response({"error": "No withdrawals could be approved", "skipped": [str(pk) for pk in skipped]}, status=400)
+    return Response({"batch": batch_payload(batch), "skipped": [str(pk) for pk in skipped]})
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def withdrawal_batch_payout_file(request, batch_id):
+    """Stream the bank bulk-payout CSV for a batch"""
+    try:
+        batch = WithdrawalBatch.objects.get(pk=batch_id)
+    except WithdrawalBatch.DoesNotExist:
+        return Response({"error": "Batch not found"}, status=404)
+    response = StreamingHttpResponse(stream_payout_file(batch), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="payouts-{batch.id}.csv"'
+    return response
+
+@api_view(["POST"])
+@permission_classes([IsAdminUser])
+def mark_withdrawal_batch_paid(request, batch_id):
+    try:
+        batch = WithdrawalBatch.objects.get(pk=batch_id)
+    except WithdrawalBatch.DoesNotExist:
+        return Response({"error": "Batch not found"}, status=404)
+    if batch.status == "paid":
+        return Response({"error": "Batch is already paid"}, status=400)
+
+    marked = mark_batch_paid(batch, request.data.get("payout_reference") or f"batch-{batch.id}")
+    return Response({"message": f"{marked} withdrawals marked as paid"})
 
 @api_view(["POST"])
 @permission_classes([IsAdminUser])
@@ -306,6 +491,23 @@ def list_pending_deposits(request):
     deposits = Deposit.objects.filter(status="pending").order_by('-created_at')
     return Response(DepositSerializer(deposits, many=True).data)
 
+@api_view(["POST"])
+@permission_classes([IsAdminUser])
+def import_deposit_statement(request):
+    """Admin uploads a bank/UPI statement CSV (field "statement") to auto-approve matching deposits"""
+    upload = request.FILES.get("statement")
+    if not upload:
+        return Response({"error": "Upload the statement CSV as 'statement'"}, status=400)
+    try:
+        result = import_bank_statement(io.TextIOWrapper(upload.file, encoding="utf-8-sig"))
+    except (StatementError, UnicodeDecodeError) as exc:
+        return Response({"error": str(exc)}, status=400)
+    return Response({
+        "approved": result["approved"],
+        "credited": str(result["credited"]),
+        "review": result["review"],
+    })
+
 @api_view(["POST"])
 @permission_classes([IsAdminUser])
 def verify_deposit(request, deposit_id):
@@ -323,23 +525,14 @@ def verify_deposit(request, deposit_id):
         return Response({"error": "Request already processed"}, status=400)
 
     if action == "approve":
+        profile = dep.profile
         with transaction.atomic():
-            dep.status = "approved"
-            dep.admin_note = admin_note
-            dep.save()
-
-            # Credit User Wallet
-            profile = dep.profile
-            profile.balance += dep.amount
-            profile.save()
+            # Flip the status first so a double-approve can't credit twice
+            if not Deposit.objects.filter(pk=dep.pk, status="pending").update(status="approved", admin_note=admin_note):
+                return Response({"error": "Request already processed"}, status=400)
 
-            # Record Transaction
-            Transaction.objects.create(
-                profile=profile,
-                tx_type="credit",
-                amount=dep.amount,
-                note=f"Deposit Approved | UTR: {dep.utr_number}"
-            )
+            # Credit User Wallet and record the transaction
+            ledger.credit(profile.pk, dep.amount, f"Deposit Approved | UTR: {dep.utr_number}")
         return Response({"message": f"Approved! ₹{dep.amount} credited to {profile.user.username}"})
 
     elif action == "reject":
@@ -61,24 +61,6 @@ export default function RoomChat({ roomId }) {
   const [messages, setMessages] = useState([]);
   const messagesEndRef = useRef(null);
 
-  // ================== LOAD CHAT HISTORY ==================
-  useEffect(() => {
-    fetch(`/chat/room/${roomId}/messages/`, {
-      headers: {
-        Authorization: `Bearer ${token}`,
-      },
-    })
-      .then((res) => res.json())
-      .then((data) => {
-        if (Array.isArray(data)) {
-          setMessages(data);
-        }
-      })
-      .catch((err) =>
-        console.error("Failed to load chat history:", err)
-      );
-  }, [roomId, token]);
-
   // ================== WEBSOCKET CONNECTION ==================
   useEffect(() => {
     if (!roomId || !token) return;
@@ -98,7 +80,12 @@ export default function RoomChat({ roomId }) {
 
     ws.onmessage = (e) => {
       const data = JSON.parse(e.data);
-      setMessages((prev) => [...prev, data]);
+      // Recent history is replayed as one frame on join
+      if (data.type === "chat_history") {
+        setMessages(data.messages);
+      } else {
+        setMessages((prev) => [...prev, data]);
+      }
     };
 
     ws.onerror = (e) => {
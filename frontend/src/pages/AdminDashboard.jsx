@@ -5,7 +5,9 @@ export default function AdminDashboard() {
     const [pendingPayouts, setPendingPayouts] = useState([]);
     const [tournaments, setTournaments] = useState([]);
     const [withdrawals, setWithdrawals] = useState([]);
+    const [withdrawalsCursor, setWithdrawalsCursor] = useState(null);
     const [verifications, setVerifications] = useState([]);
+    const [verificationsCursor, setVerificationsCursor] = useState(null);
     const [deposits, setDeposits] = useState([]);
     const [loading, setLoading] = useState(true);
     const [processing, setProcessing] = useState({});
@@ -40,8 +42,10 @@ export default function AdminDashboard() {
             ]);
             setPendingPayouts(Array.isArray(payoutsData) ? payoutsData : (payoutsData.pending_payouts || []));
             setTournaments(tournamentsData || []);
-            setWithdrawals(withdrawalsData || []);
-            setVerifications(verificationsData || []);
+            setWithdrawals(withdrawalsData?.withdrawals || []);
+            setWithdrawalsCursor(withdrawalsData?.next_cursor || null);
+            setVerifications(verificationsData?.verifications || []);
+            setVerificationsCursor(verificationsData?.next_cursor || null);
             setDeposits(depositsData || []);
         } catch (error) {
             console.error('Failed to fetch admin data:', error);
@@ -184,6 +188,44 @@ export default function AdminDashboard() {
         }
     };
 
+    const sectionLabel = { kyc: 'KYC', game_id: 'Game ID', payment: 'Payment' };
+    const sectionBadge = {
+        kyc: 'bg-blue-100 text-blue-700',
+        game_id: 'bg-purple-100 text-purple-700',
+        payment: 'bg-indigo-100 text-indigo-700',
+    };
+
+    const loadMoreWithdrawals = async () => {
+        try {
+            const data = await adminService.getWithdrawals({ cursor: withdrawalsCursor });
+            setWithdrawals((prev) => [...prev, ...(data?.withdrawals || [])]);
+            setWithdrawalsCursor(data?.next_cursor || null);
+        } catch (error) {
+            alert('❌ Failed to load withdrawals: ' + error.message);
+        }
+    };
+
+    const loadMoreVerifications = async () => {
+        try {
+            const data = await adminService.getPendingVerifications({ cursor: verificationsCursor });
+            setVerifications((prev) => [...prev, ...(data?.verifications || [])]);
+            setVerificationsCursor(data?.next_cursor || null);
+        } catch (error) {
+            alert('❌ Failed to load verifications: ' + error.message);
+        }
+    };
+
+    const handleApproveAllVerifications = async () => {
+        if (!window.confirm(`Approve all ${verifications.length} shown verifications?`)) return;
+        try {
+            const data = await adminService.bulkVerify(verifications.map((item) => item.id), 'approve');
+            alert(`✅ ${data.reviewed} verifications approved`);
+            fetchData();
+        } catch (error) {
+            alert('❌ Verification failed: ' + error.message);
+        }
+    };
+
     // Group payouts by room
     const payoutsByRoom = pendingPayouts.reduce((acc, payout) => {
         const roomId = payout.room;
@@ -468,6 +510,9 @@ export default function AdminDashboard() {
                                     )}
                                 </div>
                             ))}
+                            {withdrawalsCursor && (
+                                <button onClick={loadMoreWithdrawals} className="w-full py-3 text-sm font-bold text-indigo-600 hover:bg-indigo-50 rounded-lg transition-colors">Load more</button>
+                            )}
                         </div>
                     ) : (
                         <div className="text-center py-12 text-gray-500">
@@ -528,118 +573,54 @@ export default function AdminDashboard() {
                     {loading ? (
                         <p>Loading...</p>
                     ) : verifications.length > 0 ? (
-                        <div className="space-y-6">
-                            {verifications.map((prof) => (
-                                <div key={prof.username} className="border border-gray-100 rounded-xl p-6 bg-gray-50/30">
-                                    <div className="flex justify-between items-start mb-4">
-                                        <h3 className="text-lg font-bold text-indigo-700">{prof.username} Profile</h3>
-                                        <div className="flex gap-2">
-                                            <span className={`px-2 py-1 rounded text-[10px] font-bold uppercase ${prof.kyc_status === 'pending' ? 'bg-blue-100 text-blue-700' : 'bg-gray-100 text-gray-400'}`}>KYC</span>
-                                            <span className={`px-2 py-1 rounded text-[10px] font-bold uppercase ${prof.game_id_status === 'pending' ? 'bg-purple-100 text-purple-700' : 'bg-gray-100 text-gray-400'}`}>Game ID</span>
-                                            <span className={`px-2 py-1 rounded text-[10px] font-bold uppercase ${prof.payment_details_status === 'pending' ? 'bg-indigo-100 text-indigo-700' : 'bg-gray-100 text-gray-400'}`}>Payment</span>
+                        <div className="space-y-4">
+                            <div className="flex justify-end">
+                                <button onClick={handleApproveAllVerifications} className="bg-green-600 text-white text-xs px-4 py-2 rounded-lg font-bold hover:bg-green-700 transition-all shadow-md">✓ Approve all shown</button>
+                            </div>
+                            {verifications.map((item) => (
+                                <div key={item.id} className="border border-gray-100 rounded-xl p-5 bg-gray-50/30 flex flex-col md:flex-row md:items-center justify-between gap-4">
+                                    <div>
+                                        <div className="flex items-center gap-2 mb-2">
+                                            <h3 className="text-lg font-bold text-indigo-700">{item.username}</h3>
+                                            <span className={`px-2 py-1 rounded text-[10px] font-bold uppercase ${sectionBadge[item.section]}`}>{sectionLabel[item.section]}</span>
                                         </div>
-                                    </div>
-
-                                    <div className="grid grid-cols-1 md:grid-cols-3 gap-6">
-                                        {/* Game Verification */}
-                                        <div className={`p-4 rounded-lg border relative ${prof.game_id_status === 'pending'
-                                            ? 'bg-gradient-to-br from-purple-50 to-white border-purple-300 shadow-lg ring-2 ring-purple-200'
-                                            : prof.game_id_status === 'approved'
-                                                ? 'bg-green-50/50 border-green-200'
-                                                : 'bg-gray-50 border-gray-200'
-                                            }`}>
-                                            <div className="flex items-center justify-between mb-3">
-                                                <h4 className="font-bold text-sm text-purple-600 uppercase tracking-wide">Game IDs</h4>
-                                                {prof.game_id_status === 'pending' && (
-                                                    <span className="bg-orange-500 text-white text-[9px] font-black px-2 py-0.5 rounded-full animate-pulse">NEW</span>
-                                                )}
-                                                {prof.game_id_status === 'approved' && (
-                                                    <span className="bg-green-600 text-white text-[9px] font-black px-2 py-0.5 rounded-full">✓ APPROVED</span>
-                                                )}
-                                                {prof.game_id_status === 'rejected' && (
-                                                    <span className="bg-red-600 text-white text-[9px] font-black px-2 py-0.5 rounded-full">✕ REJECTED</span>
-                                                )}
-                                            </div>
-                                            <div className="text-xs space-y-1 mb-4">
-                                                <p><strong>BGMI:</strong> {prof.bgmi_id || 'N/A'}</p>
-                                                <p><strong>FreeFire:</strong> {prof.freefire_id || 'N/A'}</p>
-                                                <p><strong>FIFA:</strong> {prof.fifa_id || 'N/A'}</p>
-                                            </div>
-                                            {prof.game_id_status === 'pending' && (
-                                                <div className="flex gap-2 mt-auto">
-                                                    <button onClick={() => handleVerifySection(prof.player_uuid, 'game_id', 'approve')} className="flex-1 bg-green-600 text-white text-[10px] py-2 rounded-lg font-bold hover:bg-green-700 transition-all shadow-md hover:shadow-lg">✓ Approve</button>
-                                                    <button onClick={() => handleVerifySection(prof.player_uuid, 'game_id', 'reject')} className="flex-1 bg-red-600 text-white text-[10px] py-2 rounded-lg font-bold hover:bg-red-700 transition-all shadow-md hover:shadow-lg">✕ Reject</button>
-                                                </div>
+                                        <div className="text-xs space-y-1">
+                                            {item.section === 'game_id' && (
+                                                <>
+                                                    <p><strong>BGMI:</strong> {item.bgmi_id || 'N/A'}</p>
+                                                    <p><strong>FreeFire:</strong> {item.freefire_id || 'N/A'}</p>
+                                                    <p><strong>FIFA:</strong> {item.fifa_id || 'N/A'}</p>
+                                                </>
                                             )}
-                                        </div>
-
-                                        {/* KYC Verification */}
-                                        <div className={`p-4 rounded-lg border relative ${prof.kyc_status === 'pending'
-                                            ? 'bg-gradient-to-br from-blue-50 to-white border-blue-300 shadow-lg ring-2 ring-blue-200'
-                                            : prof.kyc_status === 'approved'
-                                                ? 'bg-green-50/50 border-green-200'
-                                                : 'bg-gray-50 border-gray-200'
-                                            }`}>
-                                            <div className="flex items-center justify-between mb-3">
-                                                <h4 className="font-bold text-sm text-blue-600 uppercase tracking-wide">KYC Details</h4>
-                                                {prof.kyc_status === 'pending' && (
-                                                    <span className="bg-orange-500 text-white text-[9px] font-black px-2 py-0.5 rounded-full animate-pulse">NEW</span>
-                                                )}
-                                                {prof.kyc_status === 'approved' && (
-                                                    <span className="bg-green-600 text-white text-[9px] font-black px-2 py-0.5 rounded-full">✓ APPROVED</span>
-                                                )}
-                                                {prof.kyc_status === 'rejected' && (
-                                                    <span className="bg-red-600 text-white text-[9px] font-black px-2 py-0.5 rounded-full">✕ REJECTED</span>
-                                                )}
-                                            </div>
-                                            <div className="text-xs space-y-1 mb-4">
-                                                <p><strong>Name:</strong> {prof.kyc_full_name || 'N/A'}</p>
-                                                <p><strong>Mobile:</strong> {prof.mobile_number || 'N/A'}</p>
-                                                <p><strong>ID:</strong> {prof.kyc_id_type}: {prof.kyc_id_number || 'N/A'}</p>
-                                            </div>
-                                            {prof.kyc_status === 'pending' && (
-                                                <div className="flex gap-2">
-                                                    <button onClick={() => handleVerifySection(prof.player_uuid, 'kyc', 'approve')} className="flex-1 bg-green-600 text-white text-[10px] py-2 rounded-lg font-bold hover:bg-green-700 transition-all shadow-md hover:shadow-lg">✓ Approve</button>
-                                                    <button onClick={() => handleVerifySection(prof.player_uuid, 'kyc', 'reject')} className="flex-1 bg-red-600 text-white text-[10px] py-2 rounded-lg font-bold hover:bg-red-700 transition-all shadow-md hover:shadow-lg">✕ Reject</button>
-                                                </div>
+                                            {item.section === 'kyc' && (
+                                                <>
+                                                    <p><strong>Name:</strong> {item.kyc_full_name || 'N/A'}</p>
+                                                    <p><strong>Mobile:</strong> {item.mobile_number || 'N/A'}</p>
+                                                    <p><strong>ID:</strong> {item.kyc_id_type}: {item.kyc_id_number || 'N/A'}</p>
+                                                    {item.kyc_document && (
+                                                        <a href={item.kyc_document} target="_blank" rel="noreferrer" className="text-blue-600 underline">View document</a>
+                                                    )}
+                                                </>
                                             )}
-                                        </div>
-
-                                        {/* Payment Verification */}
-                                        <div className={`p-4 rounded-lg border relative ${prof.payment_details_status === 'pending'
-                                            ? 'bg-gradient-to-br from-indigo-50 to-white border-indigo-300 shadow-lg ring-2 ring-indigo-200'
-                                            : prof.payment_details_status === 'approved'
-                                                ? 'bg-green-50/50 border-green-200'
-                                                : 'bg-gray-50 border-gray-200'
-                                            }`}>
-                                            <div className="flex items-center justify-between mb-3">
-                                                <h4 className="font-bold text-sm text-indigo-600 uppercase tracking-wide">Payments</h4>
-                                                {prof.payment_details_status === 'pending' && (
-                                                    <span className="bg-orange-500 text-white text-[9px] font-black px-2 py-0.5 rounded-full animate-pulse">NEW</span>
-                                                )}
-                                                {prof.payment_details_status === 'approved' && (
-                                                    <span className="bg-green-600 text-white text-[9px] font-black px-2 py-0.5 rounded-full">✓ APPROVED</span>
-                                                )}
-                                                {prof.payment_details_status === 'rejected' && (
-                                                    <span className="bg-red-600 text-white text-[9px] font-black px-2 py-0.5 rounded-full">✕ REJECTED</span>
-                                                )}
-                                            </div>
-                                            <div className="text-xs space-y-1 mb-4">
-                                                <p><strong>UPI:</strong> {prof.upi_id || 'N/A'}</p>
-                                                <p><strong>Bank:</strong> {prof.bank_name || 'N/A'}</p>
-                                                <p><strong>A/C:</strong> {prof.account_number || 'N/A'}</p>
-                                                <p><strong>IFSC:</strong> {prof.ifsc_code || 'N/A'}</p>
-                                            </div>
-                                            {prof.payment_details_status === 'pending' && (
-                                                <div className="flex gap-2">
-                                                    <button onClick={() => handleVerifySection(prof.player_uuid, 'payment', 'approve')} className="flex-1 bg-green-600 text-white text-[10px] py-2 rounded-lg font-bold hover:bg-green-700 transition-all shadow-md hover:shadow-lg">✓ Approve</button>
-                                                    <button onClick={() => handleVerifySection(prof.player_uuid, 'payment', 'reject')} className="flex-1 bg-red-600 text-white text-[10px] py-2 rounded-lg font-bold hover:bg-red-700 transition-all shadow-md hover:shadow-lg">✕ Reject</button>
-                                                </div>
+                                            {item.section === 'payment' && (
+                                                <>
+                                                    <p><strong>UPI:</strong> {item.upi_id || 'N/A'}</p>
+                                                    <p><strong>Bank:</strong> {item.bank_name || 'N/A'}</p>
+                                                    <p><strong>A/C:</strong> {item.account_number || 'N/A'}</p>
+                                                    <p><strong>IFSC:</strong> {item.ifsc_code || 'N/A'}</p>
+                                                </>
                                             )}
                                         </div>
                                     </div>
+                                    <div className="flex gap-2 md:w-64">
+                                        <button onClick={() => handleVerifySection(item.player_uuid, item.section, 'approve')} className="flex-1 bg-green-600 text-white text-[10px] py-2 rounded-lg font-bold hover:bg-green-700 transition-all shadow-md hover:shadow-lg">✓ Approve</button>
+                                        <button onClick={() => handleVerifySection(item.player_uuid, item.section, 'reject')} className="flex-1 bg-red-600 text-white text-[10px] py-2 rounded-lg font-bold hover:bg-red-700 transition-all shadow-md hover:shadow-lg">✕ Reject</button>
+                                    </div>
                                 </div>
                             ))}
+                            {verificationsCursor && (
+                                <button onClick={loadMoreVerifications} className="w-full py-3 text-sm font-bold text-indigo-600 hover:bg-indigo-50 rounded-lg transition-colors">Load more</button>
+                            )}
                         </div>
                     ) : (
                         <p className="text-center py-8 text-gray-500">No pending verifications</p>
@@ -10,6 +10,31 @@ export default function MyInvitations() {
         fetchInvitations();
     }, []);
 
+    // Live updates: new invitations and status changes are pushed over the
+    // per-user notification socket, so the list never needs re-polling
+    useEffect(() => {
+        const token = localStorage.getItem('token');
+        if (!token) return;
+
+        const protocol = window.location.protocol === 'https:' ? 'wss' : 'ws';
+        const ws = new WebSocket(`${protocol}://${window.location.host}/ws/notifications/?token=${token}`);
+
+        ws.onmessage = (e) => {
+            const { event, payload } = JSON.parse(e.data);
+            if (event === 'invitation_created') {
+                setInvitations((prev) => [payload, ...prev.filter((inv) => inv.id !== payload.id)]);
+            } else if (event === 'invitation_updated' && payload.status !== 'pending') {
+                removeInvitation(payload.id);
+            }
+        };
+
+        return () => ws.close();
+    }, []);
+
+    const removeInvitation = (invitationId) => {
+        setInvitations((prev) => prev.filter((inv) => inv.id !== invitationId));
+    };
+
     const fetchInvitations = async () => {
         try {
             const token = localStorage.getItem('token');
@@ -59,7 +84,7 @@ export default function MyInvitations() {
                     }
                 }
                 alert(message);
-                fetchInvitations(); // Refresh list
+                removeInvitation(invitationId);
             } else {
                 // Show detailed error for debugging
                 let errorMsg = data.error || 'Failed to accept invitation';
@@ -101,7 +126,7 @@ export default function MyInvitations() {
             const data = await response.json();
             if (response.ok) {
                 alert('Invitation rejected');
-                fetchInvitations();
+                removeInvitation(invitationId);
             }
         } catch (error) {
             alert('Error rejecting invitation');
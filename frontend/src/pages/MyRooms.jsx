@@ -11,6 +11,7 @@ export default function MyRooms() {
     const [selectedRoom, setSelectedRoom] = useState(null);
     const [roomDetails, setRoomDetails] = useState(null);
     const [messages, setMessages] = useState([]);
+    const [hasOlderMessages, setHasOlderMessages] = useState(false);
     const [newMessage, setNewMessage] = useState('');
     const [activeTab, setActiveTab] = useState('participants'); // 'participants', 'results', 'messages'
     const [wsStatus, setWsStatus] = useState('connecting'); // 'connecting', 'connected', 'error'
@@ -35,8 +36,8 @@ export default function MyRooms() {
         const shouldConnect = selectedRoom && (isAdmin || activeTab === 'messages');
 
         if (shouldConnect) {
+            // Recent history is replayed by the socket on join
             connectWebSocket(selectedRoom);
-            fetchMessageHistory(selectedRoom);
         }
 
         return () => {
@@ -47,28 +48,39 @@ export default function MyRooms() {
         };
     }, [selectedRoom, activeTab, isAdmin]);
 
-    const fetchMessageHistory = async (roomId) => {
+    const toChatMessage = (msg) => ({
+        id: msg.id,
+        username: msg.sender,
+        text: msg.message,
+        timestamp: msg.created_at
+    });
+
+    const fetchMessageHistory = async (roomId, oldest) => {
         try {
             const token = localStorage.getItem('token');
-            const response = await fetch(`${import.meta.env.VITE_API_BASE_URL}/chat/room/${roomId}/messages/`, {
+            const query = oldest.id
+                ? `?before=${oldest.id}`
+                : `?before_time=${encodeURIComponent(oldest.timestamp)}`;
+            const response = await fetch(`${import.meta.env.VITE_API_BASE_URL}/chat/room/${roomId}/messages/${query}`, {
                 headers: {
                     'Authorization': `Bearer ${token}`,
                 },
             });
             if (response.ok) {
                 const data = await response.json();
-                const history = data.map(msg => ({
-                    username: msg.sender,
-                    text: msg.message,
-                    timestamp: msg.created_at
-                }));
-                setMessages(history);
+                const history = (data.messages || []).map(toChatMessage);
+                setMessages(prev => [...history, ...prev]);
+                setHasOlderMessages(data.has_more);
             }
         } catch (error) {
             console.error('Error fetching chat history:', error);
         }
     };
 
+    const loadOlderMessages = () => {
+        if (messages.length) fetchMessageHistory(selectedRoom, messages[0]);
+    };
+
     const connectWebSocket = (roomId) => {
         const token = localStorage.getItem('token');
         if (!token) return;
@@ -89,12 +101,11 @@ export default function MyRooms() {
 
         ws.onmessage = (e) => {
             const data = JSON.parse(e.data);
-            if (data.type === 'chat_message') {
-                setMessages(prev => [...prev, {
-                    username: data.sender,
-                    text: data.message,
-                    timestamp: new Date()
-                }]);
+            if (data.type === 'chat_history') {
+                setMessages(data.messages.map(toChatMessage));
+                setHasOlderMessages(data.has_more);
+            } else if (data.type === 'chat_message') {
+                setMessages(prev => [...prev, toChatMessage(data)]);
             }
         };
 
@@ -415,6 +426,9 @@ export default function MyRooms() {
                                             </div>
                                         </div>
                                         <div className="flex-1 p-6 space-y-4 overflow-y-auto bg-blue-50/10">
+                                            {hasOlderMessages && (
+                                                <button onClick={loadOlderMessages} className="w-full text-[10px] font-black uppercase tracking-widest text-blue-600 hover:underline">Load earlier messages</button>
+                                            )}
                                             {messages.length > 0 ? messages.map((msg, i) => {
                                                 const isMe = (msg.username || '').toLowerCase() === (user?.username || '').toLowerCase();
                                                 return (
@@ -532,6 +546,9 @@ export default function MyRooms() {
                                         {activeTab === 'messages' && (
                                             <div className="flex flex-col h-[500px] bg-white border border-gray-100 rounded-[2.5rem] overflow-hidden shadow-sm animate-in zoom-in-95 duration-500">
                                                 <div className="flex-1 p-6 space-y-4 overflow-y-auto bg-gray-50/30">
+                                                    {hasOlderMessages && (
+                                                        <button onClick={loadOlderMessages} className="w-full text-[10px] font-black uppercase tracking-widest text-blue-600 hover:underline">Load earlier messages</button>
+                                                    )}
                                                     {messages.map((msg, i) => {
                                                         const isMe = (msg.username || '').toLowerCase() === (user?.username || '').toLowerCase();
                                                         return (
@@ -82,6 +82,26 @@ export default function Tournament() {
   };
 
 
+  const waitForJoinTicket = async (ticketId, token) => {
+    for (let attempt = 0; attempt < 30; attempt++) {
+      await new Promise((resolve) => setTimeout(resolve, 1000));
+      const response = await fetch(`${import.meta.env.VITE_API_BASE_URL}/tournaments/join-ticket/${ticketId}/`, {
+        headers: { 'Authorization': `Bearer ${token}` },
+      });
+      const ticket = await response.json();
+      if (ticket.status === 'admitted') {
+        alert('✅ Joined successfully');
+        navigate('/my-rooms');
+        return;
+      }
+      if (ticket.status === 'rejected') {
+        alert(`❌ ${ticket.error || 'Failed to join'}`);
+        return;
+      }
+    }
+    alert('⏳ Your join request is still queued. Check My Rooms shortly.');
+  };
+
   const handleJoinSolo = async () => {
     try {
       const token = localStorage.getItem('token');
@@ -94,7 +114,11 @@ export default function Tournament() {
       });
 
       const data = await response.json();
-      if (response.ok) {
+      if (response.status === 202) {
+        // Hot tournament: the join was queued, poll the ticket for the outcome
+        setShowTeamModal(false);
+        await waitForJoinTicket(data.ticket_id, token);
+      } else if (response.ok) {
         alert(`✅ ${data.message}\nPaid: ₹${data.payment}`);
         setShowTeamModal(false);
         navigate('/my-rooms');
@@ -5,6 +5,8 @@ import { useNavigate } from "react-router-dom";
 export default function WalletTransactions() {
   const navigate = useNavigate();
   const [transactions, setTransactions] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [withdrawals, setWithdrawals] = useState([]);
   const [loading, setLoading] = useState(true);
   const [activeTab, setActiveTab] = useState("transactions"); // "transactions" or "withdrawals"
@@ -23,6 +25,7 @@ export default function WalletTransactions() {
       else if (Array.isArray(txResponse?.results)) txList = txResponse.results;
       else if (Array.isArray(txResponse?.transactions)) txList = txResponse.transactions;
       setTransactions(txList);
+      setNextCursor(txResponse?.next_cursor || null);
 
       // NORMALIZE WITHDRAWALS
       setWithdrawals(Array.isArray(wdrResponse) ? wdrResponse : []);
@@ -38,6 +41,20 @@ export default function WalletTransactions() {
     fetchData();
   }, [fetchData]);
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    try {
+      setLoadingMore(true);
+      const txResponse = await walletService.getTransactions({ cursor: nextCursor });
+      setTransactions((prev) => [...prev, ...(txResponse?.transactions || [])]);
+      setNextCursor(txResponse?.next_cursor || null);
+    } catch (error) {
+      console.error("Failed to load more transactions:", error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const getStatusColor = (status) => {
     switch (status) {
       case "pending": return "text-yellow-600 bg-yellow-50";
@@ -129,6 +146,15 @@ export default function WalletTransactions() {
                   </div>
                 </div>
               ))}
+              {nextCursor && (
+                <button
+                  onClick={loadMore}
+                  disabled={loadingMore}
+                  className="w-full p-4 text-sm font-bold text-purple-600 hover:bg-purple-50 transition-colors disabled:opacity-50"
+                >
+                  {loadingMore ? "Loading..." : "Load more"}
+                </button>
+              )}
             </div>
           )
         ) : (
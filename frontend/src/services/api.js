@@ -79,8 +79,9 @@ export const walletService = {
     return apiRequest('/wallet/balance/');
   },
 
-  getTransactions: async () => {
-    return apiRequest('/wallet/transactions/');
+  getTransactions: async (params = {}) => {
+    const query = new URLSearchParams(params).toString();
+    return apiRequest(`/wallet/transactions/${query ? `?${query}` : ''}`);
   },
 
   addMoney: async (amount) => {
@@ -223,8 +224,9 @@ export const adminService = {
     return apiRequest('/tournaments/pending-payouts/');
   },
 
-  getWithdrawals: async () => {
-    return apiRequest('/wallet/withdraw/all/');
+  getWithdrawals: async (params = {}) => {
+    const query = new URLSearchParams(params).toString();
+    return apiRequest(`/wallet/withdraw/all/${query ? `?${query}` : ''}`);
   },
 
   approveWithdrawal: async (withdrawalId) => {
@@ -240,8 +242,16 @@ export const adminService = {
     });
   },
 
-  getPendingVerifications: async () => {
-    return apiRequest('/wallet/verifications/pending/');
+  getPendingVerifications: async (params = {}) => {
+    const query = new URLSearchParams(params).toString();
+    return apiRequest(`/wallet/verifications/pending/${query ? `?${query}` : ''}`);
+  },
+
+  bulkVerify: async (ids, action, reason = '') => {
+    return apiRequest('/wallet/verifications/bulk/', {
+      method: 'POST',
+      body: JSON.stringify({ ids, action, reason }),
+    });
   },
 
   verifyProfileSection: async (profileId, section, action, reason = '') => {